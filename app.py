@@ -2,19 +2,40 @@ import streamlit as st
 import pandas as pd
 import sqlite3
 import hashlib
-from datetime import datetime, timedelta
+import hmac
+import csv
+import io
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal, ROUND_HALF_UP
 import time
+import tracemalloc
 import json
+import calendar
+import asyncio
+import atexit
+import random
 import os
+import re
+import string
+import sys
+import threading
+import types
+import multiprocessing
+import zipfile
+import weakref
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.pdfgen import canvas
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.units import inch
+from html.parser import HTMLParser
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pdf_generator
 import plotly.graph_objects as go
 import plotly.express as px
 import numpy as np
+import aiohttp
 
 # ============================================
 # PAGE CONFIGURATION
@@ -129,21 +150,280 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # ============================================
-# DATABASE CLASS (Code at 3)
+# PERFORMANCE METRICS
 # ============================================
 
-class LawyerDatabase:
-    def _init_(self, db_path="lawyer_portal.db"):
+class MetricsStore:
+    """Rolling latency samples per named stage, shown on the Performance page"""
+    
+    def __init__(self, window=500):
+        self.window = window
+        self._samples = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+    
+    def record(self, stage, seconds):
+        """Add one latency sample for a stage"""
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.window)
+            samples.append((datetime.now(), seconds * 1000))
+            self._counts[stage] = self._counts.get(stage, 0) + 1
+    
+    @contextmanager
+    def timed(self, stage):
+        """Record the wall time of the enclosed block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+    
+    @staticmethod
+    def percentile(values, fraction):
+        """Nearest-rank percentile of already sorted, non-empty values"""
+        return values[min(len(values) - 1, int(len(values) * fraction))]
+    
+    def samples(self, stage):
+        """Recent (timestamp, milliseconds) samples for a stage"""
+        with self._lock:
+            return list(self._samples.get(stage, ()))
+    
+    def summary(self):
+        """Per-stage count and latency percentiles over the rolling window"""
+        with self._lock:
+            snapshot = {stage: [ms for _, ms in samples] for stage, samples in self._samples.items()}
+            counts = dict(self._counts)
+        
+        rows = []
+        for stage, values in sorted(snapshot.items()):
+            values.sort()
+            rows.append({
+                'stage': stage,
+                'count': counts[stage],
+                'mean_ms': sum(values) / len(values),
+                'p50_ms': self.percentile(values, 0.5),
+                'p95_ms': self.percentile(values, 0.95),
+                'max_ms': values[-1]
+            })
+        return rows
+
+@st.cache_resource
+def get_metrics_store():
+    """Process-wide metrics store"""
+    return MetricsStore()
+
+@contextmanager
+def timed(stage):
+    """Time a block under a stage name in the process-wide metrics store"""
+    with get_metrics_store().timed(stage):
+        yield
+
+# ============================================
+# CONNECTION POOL
+# ============================================
+
+class ConnectionPool:
+    """Per-thread SQLite connections shared by every session of the app"""
+    
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA cache_size=-20000",
+        "PRAGMA mmap_size=268435456",
+        "PRAGMA temp_store=MEMORY",
+    )
+    
+    def __init__(self, db_path, statement_cache_size=256, timeout=30.0):
         self.db_path = db_path
-        self.init_database()
+        self.statement_cache_size = statement_cache_size
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._owned = {}
+        self._idle = []
+        self._stats = {
+            'connections': 0,
+            'reused': 0,
+            'connect_time': 0.0,
+            'queries': 0,
+            'query_time': 0.0,
+        }
     
-    def init_database(self):
-        """Initialize database with all tables"""
-        conn = sqlite3.connect(self.db_path)
+    def _open(self):
+        """Open a connection with the tuned pragmas applied"""
+        start = time.perf_counter()
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            check_same_thread=False,
+            cached_statements=self.statement_cache_size
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        elapsed = time.perf_counter() - start
+        
+        with self._lock:
+            self._stats['connections'] += 1
+            self._stats['connect_time'] += elapsed
+        return conn
+    
+    def connection(self):
+        """Return the calling thread's connection, opening one if needed"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            return conn
+        
+        thread = threading.current_thread()
+        with self._lock:
+            # Streamlit runs each script in a short-lived thread, so hand
+            # connections of finished threads over instead of leaking them
+            for ident, (thread_ref, owned_conn) in list(self._owned.items()):
+                owner = thread_ref()
+                if owner is None or not owner.is_alive():
+                    del self._owned[ident]
+                    self._idle.append(owned_conn)
+            
+            if self._idle:
+                conn = self._idle.pop()
+                self._stats['reused'] += 1
+        
+        if conn is None:
+            conn = self._open()
+        
+        with self._lock:
+            self._owned[thread.ident] = (weakref.ref(thread), conn)
+        self._local.conn = conn
+        return conn
+    
+    def _record_query(self, elapsed):
+        with self._lock:
+            self._stats['queries'] += 1
+            self._stats['query_time'] += elapsed
+    
+    @contextmanager
+    def cursor(self):
+        """Yield a cursor for read queries, timing the work done with it"""
+        conn = self.connection()
+        cursor = conn.cursor()
+        start = time.perf_counter()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+            self._record_query(time.perf_counter() - start)
+    
+    @contextmanager
+    def transaction(self):
+        """Yield a cursor inside a write transaction, committing on success"""
+        conn = self.connection()
         cursor = conn.cursor()
+        start = time.perf_counter()
+        try:
+            with timed('db_write'):
+                cursor.execute("BEGIN IMMEDIATE")
+                yield cursor
+                conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            self._record_query(time.perf_counter() - start)
+    
+    def stats(self):
+        """Return connection and query counters with timings in milliseconds"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['open_connections'] = len(self._owned) + len(self._idle)
+        stats['connect_time_ms'] = stats.pop('connect_time') * 1000
+        stats['query_time_ms'] = stats.pop('query_time') * 1000
+        stats['avg_query_ms'] = stats['query_time_ms'] / stats['queries'] if stats['queries'] else 0.0
+        return stats
+    
+    def close(self):
+        """Close every pooled connection"""
+        with self._lock:
+            connections = [conn for _, conn in self._owned.values()] + self._idle
+            self._owned.clear()
+            self._idle = []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+@st.cache_resource
+def get_connection_pool(db_path):
+    """Process-wide connection pool, shared across Streamlit sessions"""
+    return ConnectionPool(db_path)
+
+# ============================================
+# CASE CACHE
+# ============================================
+
+class CaseCache:
+    """Per-user snapshots of case lists with TTL expiry and LRU eviction"""
+    
+    def __init__(self, ttl=60.0, max_users=512):
+        self.ttl = ttl
+        self.max_users = max_users
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+    
+    def get_or_load(self, user_id, loader):
+        """Return the cached case list for a user, calling loader() on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                self._stats['hits'] += 1
+                return entry[1]
+            self._stats['misses'] += 1
+            generation = self._generations.get(user_id, 0)
+        
+        cases = loader()
         
-        # Users table
-        cursor.execute('''
+        with self._lock:
+            # A write that landed while we were reading makes this snapshot stale
+            if self._generations.get(user_id, 0) == generation:
+                self._entries[user_id] = (time.monotonic() + self.ttl, cases)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_users:
+                    self._entries.popitem(last=False)
+                    self._stats['evictions'] += 1
+        return cases
+    
+    def invalidate(self, user_id):
+        """Drop a user's snapshot after one of their cases changed"""
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            if self._entries.pop(user_id, None) is not None:
+                self._stats['invalidations'] += 1
+    
+    def stats(self):
+        """Return hit/miss counters and the current number of cached users"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['users'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+# ============================================
+# DATABASE CLASS (Code at 3)
+# ============================================
+
+class LawyerDatabase:
+    # Ordered (version, statements) pairs. Startup compares the highest
+    # version with PRAGMA user_version and only runs what is missing.
+    MIGRATIONS = [
+        (1, [
+            # Users table
+            '''
             CREATE TABLE IF NOT EXISTS users (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 email TEXT UNIQUE NOT NULL,
@@ -156,10 +436,9 @@ class LawyerDatabase:
                 experience_years INTEGER,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
-        ''')
-        
-        # Cases table
-        cursor.execute('''
+            ''',
+            # Cases table
+            '''
             CREATE TABLE IF NOT EXISTS cases (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 diary_no TEXT NOT NULL,
@@ -181,10 +460,9 @@ class LawyerDatabase:
                 FOREIGN KEY (user_id) REFERENCES users (id),
                 UNIQUE(diary_no, year)
             )
-        ''')
-        
-        # Hearings table
-        cursor.execute('''
+            ''',
+            # Hearings table
+            '''
             CREATE TABLE IF NOT EXISTS hearings (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 case_id INTEGER,
@@ -195,10 +473,9 @@ class LawyerDatabase:
                 notes TEXT,
                 FOREIGN KEY (case_id) REFERENCES cases (id)
             )
-        ''')
-        
-        # Documents table
-        cursor.execute('''
+            ''',
+            # Documents table
+            '''
             CREATE TABLE IF NOT EXISTS documents (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 case_id INTEGER,
@@ -208,10 +485,9 @@ class LawyerDatabase:
                 generated_date DATE DEFAULT CURRENT_DATE,
                 FOREIGN KEY (case_id) REFERENCES cases (id)
             )
-        ''')
-        
-        # Billing table
-        cursor.execute('''
+            ''',
+            # Billing table
+            '''
             CREATE TABLE IF NOT EXISTS billing (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 case_id INTEGER,
@@ -223,48 +499,766 @@ class LawyerDatabase:
                 status TEXT DEFAULT 'Pending',
                 FOREIGN KEY (case_id) REFERENCES cases (id)
             )
-        ''')
+            ''',
+        ]),
+        (2, [
+            # Dashboard/case list: filter on owner, sort by next hearing
+            '''
+            CREATE INDEX IF NOT EXISTS idx_cases_user_hearing
+            ON cases (user_id, next_hearing_date, created_at)
+            ''',
+            # Case details and upcoming hearings: per-case date range
+            '''
+            CREATE INDEX IF NOT EXISTS idx_hearings_case_date
+            ON hearings (case_id, hearing_date)
+            ''',
+            '''
+            CREATE INDEX IF NOT EXISTS idx_documents_case
+            ON documents (case_id)
+            ''',
+        ]),
+        (3, [
+            # Monthly rollup for the dashboard trend, maintained by triggers
+            '''
+            CREATE TABLE IF NOT EXISTS case_monthly_stats (
+                user_id INTEGER NOT NULL,
+                month TEXT NOT NULL,
+                filings INTEGER NOT NULL DEFAULT 0,
+                disposals INTEGER NOT NULL DEFAULT 0,
+                hearings INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, month)
+            ) WITHOUT ROWID
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_cases_monthly_filing
+            AFTER INSERT ON cases
+            WHEN NEW.user_id IS NOT NULL
+            BEGIN
+                INSERT INTO case_monthly_stats (user_id, month, filings)
+                VALUES (NEW.user_id,
+                        COALESCE(strftime('%Y-%m', NEW.filing_date),
+                                 strftime('%Y-%m', 'now', 'localtime')),
+                        1)
+                ON CONFLICT (user_id, month) DO UPDATE SET filings = filings + 1;
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_cases_monthly_disposal
+            AFTER UPDATE OF status ON cases
+            WHEN NEW.status = 'Disposed' AND OLD.status IS NOT 'Disposed'
+                 AND NEW.user_id IS NOT NULL
+            BEGIN
+                INSERT INTO case_monthly_stats (user_id, month, disposals)
+                VALUES (NEW.user_id, strftime('%Y-%m', 'now', 'localtime'), 1)
+                ON CONFLICT (user_id, month) DO UPDATE SET disposals = disposals + 1;
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_hearings_monthly
+            AFTER INSERT ON hearings
+            BEGIN
+                INSERT INTO case_monthly_stats (user_id, month, hearings)
+                SELECT c.user_id, strftime('%Y-%m', NEW.hearing_date), 1
+                FROM cases c
+                WHERE c.id = NEW.case_id
+                AND c.user_id IS NOT NULL
+                AND strftime('%Y-%m', NEW.hearing_date) IS NOT NULL
+                ON CONFLICT (user_id, month) DO UPDATE SET hearings = hearings + 1;
+            END
+            ''',
+            # Backfill from existing history
+            '''
+            INSERT INTO case_monthly_stats (user_id, month, filings)
+            SELECT user_id,
+                   COALESCE(strftime('%Y-%m', filing_date), strftime('%Y-%m', created_at)),
+                   COUNT(*)
+            FROM cases
+            WHERE user_id IS NOT NULL
+            GROUP BY 1, 2
+            ON CONFLICT (user_id, month) DO UPDATE SET filings = excluded.filings
+            ''',
+            '''
+            INSERT INTO case_monthly_stats (user_id, month, disposals)
+            SELECT user_id, strftime('%Y-%m', updated_at), COUNT(*)
+            FROM cases
+            WHERE user_id IS NOT NULL AND status = 'Disposed'
+            GROUP BY 1, 2
+            ON CONFLICT (user_id, month) DO UPDATE SET disposals = excluded.disposals
+            ''',
+            '''
+            INSERT INTO case_monthly_stats (user_id, month, hearings)
+            SELECT c.user_id, strftime('%Y-%m', h.hearing_date), COUNT(*)
+            FROM hearings h
+            JOIN cases c ON c.id = h.case_id
+            WHERE c.user_id IS NOT NULL AND strftime('%Y-%m', h.hearing_date) IS NOT NULL
+            GROUP BY 1, 2
+            ON CONFLICT (user_id, month) DO UPDATE SET hearings = excluded.hearings
+            ''',
+        ]),
+        (4, [
+            # Full-text index over cases; rowid is cases.id and hearing
+            # purposes/outcomes/notes are folded into one column per case
+            '''
+            CREATE VIRTUAL TABLE IF NOT EXISTS case_search USING fts5(
+                diary_no, case_title, petitioner, respondent,
+                description, lawyer_notes, hearing_notes,
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3'
+            )
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_cases_search_insert
+            AFTER INSERT ON cases
+            BEGIN
+                INSERT INTO case_search (rowid, diary_no, case_title, petitioner, respondent,
+                                         description, lawyer_notes, hearing_notes)
+                VALUES (NEW.id, NEW.diary_no, NEW.case_title, NEW.petitioner, NEW.respondent,
+                        NEW.description, NEW.lawyer_notes, '');
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_cases_search_update
+            AFTER UPDATE OF diary_no, case_title, petitioner, respondent,
+                            description, lawyer_notes ON cases
+            BEGIN
+                UPDATE case_search
+                SET diary_no = NEW.diary_no, case_title = NEW.case_title,
+                    petitioner = NEW.petitioner, respondent = NEW.respondent,
+                    description = NEW.description, lawyer_notes = NEW.lawyer_notes
+                WHERE rowid = NEW.id;
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_cases_search_delete
+            AFTER DELETE ON cases
+            BEGIN
+                DELETE FROM case_search WHERE rowid = OLD.id;
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_hearings_search_insert
+            AFTER INSERT ON hearings
+            BEGIN
+                UPDATE case_search
+                SET hearing_notes = (
+                    SELECT group_concat(COALESCE(purpose, '') || ' ' || COALESCE(outcome, '') || ' ' || COALESCE(notes, ''), ' ')
+                    FROM hearings WHERE case_id = NEW.case_id
+                )
+                WHERE rowid = NEW.case_id;
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_hearings_search_update
+            AFTER UPDATE OF purpose, outcome, notes ON hearings
+            BEGIN
+                UPDATE case_search
+                SET hearing_notes = (
+                    SELECT group_concat(COALESCE(purpose, '') || ' ' || COALESCE(outcome, '') || ' ' || COALESCE(notes, ''), ' ')
+                    FROM hearings WHERE case_id = NEW.case_id
+                )
+                WHERE rowid = NEW.case_id;
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_hearings_search_delete
+            AFTER DELETE ON hearings
+            BEGIN
+                UPDATE case_search
+                SET hearing_notes = (
+                    SELECT group_concat(COALESCE(purpose, '') || ' ' || COALESCE(outcome, '') || ' ' || COALESCE(notes, ''), ' ')
+                    FROM hearings WHERE case_id = OLD.case_id
+                )
+                WHERE rowid = OLD.case_id;
+            END
+            ''',
+            '''
+            INSERT INTO case_search (rowid, diary_no, case_title, petitioner, respondent,
+                                     description, lawyer_notes, hearing_notes)
+            SELECT c.id, c.diary_no, c.case_title, c.petitioner, c.respondent,
+                   c.description, c.lawyer_notes,
+                   (SELECT group_concat(COALESCE(h.purpose, '') || ' ' || COALESCE(h.outcome, '') || ' '
+                                        || COALESCE(h.notes, ''), ' ')
+                    FROM hearings h WHERE h.case_id = c.id)
+            FROM cases c
+            ''',
+        ]),
+        (5, [
+            # Watermarks for background jobs; last_key lets an interrupted
+            # run resume from the last committed batch
+            '''
+            CREATE TABLE IF NOT EXISTS sync_state (
+                name TEXT PRIMARY KEY,
+                last_key INTEGER DEFAULT 0,
+                started_at TIMESTAMP,
+                finished_at TIMESTAMP,
+                checked INTEGER DEFAULT 0,
+                updated INTEGER DEFAULT 0,
+                errors INTEGER DEFAULT 0
+            )
+            ''',
+        ]),
+        (6, [
+            # Last registry response per case; fetched_at is a Unix timestamp
+            '''
+            CREATE TABLE IF NOT EXISTS registry_cache (
+                diary_no TEXT NOT NULL,
+                year INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (diary_no, year)
+            ) WITHOUT ROWID
+            ''',
+        ]),
+        (7, [
+            # Last tracked registry fields per case, and the field-level
+            # changes between consecutive snapshots
+            '''
+            CREATE TABLE IF NOT EXISTS case_status_snapshots (
+                diary_no TEXT NOT NULL,
+                year INTEGER NOT NULL,
+                snapshot TEXT NOT NULL,
+                captured_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (diary_no, year)
+            ) WITHOUT ROWID
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS case_status_changes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                diary_no TEXT NOT NULL,
+                year INTEGER NOT NULL,
+                field TEXT NOT NULL,
+                old_value TEXT,
+                new_value TEXT,
+                changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''',
+            'CREATE INDEX IF NOT EXISTS idx_status_changes_time ON case_status_changes(changed_at)',
+        ]),
+        (8, [
+            # Date-led index so calendar ranges are read straight off the
+            # hearings table instead of probing every case a user owns
+            'CREATE INDEX IF NOT EXISTS idx_hearings_date ON hearings(hearing_date, case_id)',
+        ]),
+        (9, [
+            # Change tracking for calendar feeds: hearings.updated_at drives
+            # incremental feeds and calendar_versions gives each user an
+            # O(1) ETag. Every content change stamps updated_at, and the
+            # stamp in turn bumps the owner's version.
+            'ALTER TABLE hearings ADD COLUMN updated_at TIMESTAMP',
+            'UPDATE hearings SET updated_at = CURRENT_TIMESTAMP',
+            '''
+            CREATE TABLE IF NOT EXISTS calendar_versions (
+                user_id INTEGER PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0,
+                modified_at TIMESTAMP
+            )
+            ''',
+            '''
+            INSERT INTO calendar_versions (user_id, version, modified_at)
+            SELECT c.user_id, COUNT(*), MAX(h.updated_at)
+            FROM hearings h
+            JOIN cases c ON c.id = h.case_id
+            WHERE c.user_id IS NOT NULL
+            GROUP BY c.user_id
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_hearings_touch_insert
+            AFTER INSERT ON hearings
+            BEGIN
+                UPDATE hearings SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_hearings_touch_update
+            AFTER UPDATE OF case_id, hearing_date, purpose, outcome, next_date, notes ON hearings
+            BEGIN
+                UPDATE hearings SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_hearings_calendar_version
+            AFTER UPDATE OF updated_at ON hearings
+            BEGIN
+                INSERT INTO calendar_versions (user_id, version, modified_at)
+                SELECT c.user_id, 1, NEW.updated_at
+                FROM cases c
+                WHERE c.id = NEW.case_id AND c.user_id IS NOT NULL
+                ON CONFLICT (user_id) DO UPDATE SET
+                    version = version + 1, modified_at = excluded.modified_at;
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_hearings_calendar_delete
+            AFTER DELETE ON hearings
+            BEGIN
+                INSERT INTO calendar_versions (user_id, version, modified_at)
+                SELECT c.user_id, 1, CURRENT_TIMESTAMP
+                FROM cases c
+                WHERE c.id = OLD.case_id AND c.user_id IS NOT NULL
+                ON CONFLICT (user_id) DO UPDATE SET
+                    version = version + 1, modified_at = excluded.modified_at;
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_cases_calendar_version
+            AFTER UPDATE OF diary_no, year, case_title, court_name, status ON cases
+            WHEN NEW.user_id IS NOT NULL
+            BEGIN
+                INSERT INTO calendar_versions (user_id, version, modified_at)
+                VALUES (NEW.user_id, 1, CURRENT_TIMESTAMP)
+                ON CONFLICT (user_id) DO UPDATE SET
+                    version = version + 1, modified_at = excluded.modified_at;
+            END
+            ''',
+        ]),
+        (10, [
+            'ALTER TABLE hearings ADD COLUMN hearing_time TEXT',
+            'ALTER TABLE hearings ADD COLUMN court_room TEXT',
+            # Lift the room out of purposes written by the cause-list import
+            '''
+            UPDATE hearings
+            SET court_room = substr(purpose, instr(purpose, ', Court ') + 8),
+                purpose = substr(purpose, 1, instr(purpose, ', Court ') - 1)
+            WHERE purpose LIKE 'Cause list item %, Court %'
+            ''',
+            'DROP TRIGGER IF EXISTS trg_hearings_touch_update',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_hearings_touch_update
+            AFTER UPDATE OF case_id, hearing_date, hearing_time, court_room,
+                            purpose, outcome, next_date, notes ON hearings
+            BEGIN
+                UPDATE hearings SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+            END
+            ''',
+        ]),
+        (11, [
+            # Time-entry ledger on billing. user_id is copied from the case so
+            # per-user totals read one covering index range.
+            'ALTER TABLE billing ADD COLUMN activity TEXT',
+            'ALTER TABLE billing ADD COLUMN user_id INTEGER REFERENCES users (id)',
+            'ALTER TABLE billing ADD COLUMN created_at TIMESTAMP',
+            '''
+            UPDATE billing
+            SET user_id = (SELECT user_id FROM cases WHERE cases.id = billing.case_id)
+            WHERE user_id IS NULL
+            ''',
+            '''
+            CREATE INDEX IF NOT EXISTS idx_billing_user_date
+            ON billing(user_id, billing_date, case_id, activity, hours, amount)
+            ''',
+            'CREATE INDEX IF NOT EXISTS idx_billing_case_date ON billing(case_id, billing_date)',
+            # Running timers, checkpointed periodically rather than every tick
+            '''
+            CREATE TABLE IF NOT EXISTS billing_timers (
+                user_id INTEGER PRIMARY KEY,
+                case_id INTEGER NOT NULL,
+                activity TEXT,
+                description TEXT,
+                rate_per_hour DECIMAL(10,2),
+                started_at REAL NOT NULL,
+                elapsed REAL NOT NULL DEFAULT 0,
+                checkpoint_at REAL,
+                FOREIGN KEY (case_id) REFERENCES cases (id)
+            )
+            ''',
+        ]),
+        (12, [
+            # Invoices; money is stored as Decimal text so totals are exact
+            '''
+            CREATE TABLE IF NOT EXISTS invoices (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                invoice_no TEXT NOT NULL,
+                client_name TEXT NOT NULL,
+                period_start DATE,
+                period_end DATE,
+                issued_date DATE NOT NULL,
+                due_date DATE,
+                subtotal TEXT NOT NULL,
+                tax_rate TEXT NOT NULL,
+                tax_amount TEXT NOT NULL,
+                total TEXT NOT NULL,
+                status TEXT DEFAULT 'Issued',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (id),
+                UNIQUE(user_id, invoice_no)
+            )
+            ''',
+            '''
+            CREATE INDEX IF NOT EXISTS idx_invoices_user_issued
+            ON invoices(user_id, issued_date)
+            ''',
+            # Last number handed out per user and year; bumped inside the
+            # invoice transaction so a rollback never leaves a gap
+            '''
+            CREATE TABLE IF NOT EXISTS invoice_sequences (
+                user_id INTEGER NOT NULL,
+                year INTEGER NOT NULL,
+                last_no INTEGER NOT NULL,
+                PRIMARY KEY (user_id, year)
+            ) WITHOUT ROWID
+            ''',
+            'ALTER TABLE billing ADD COLUMN invoice_id INTEGER REFERENCES invoices (id)',
+            # Serves both invoice line lookups and the unbilled (NULL) backlog
+            'CREATE INDEX IF NOT EXISTS idx_billing_invoice ON billing(invoice_id)',
+        ]),
+        (13, [
+            'ALTER TABLE invoices ADD COLUMN paid_date DATE',
+            # Per-user counter bumped by every billing or payment write, so
+            # cached analytics can tell whether a user's ledger changed
+            '''
+            CREATE TABLE IF NOT EXISTS billing_versions (
+                user_id INTEGER PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+            ''',
+            '''
+            INSERT INTO billing_versions (user_id, version)
+            SELECT user_id, COUNT(*) FROM billing
+            WHERE user_id IS NOT NULL
+            GROUP BY user_id
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_billing_version_insert
+            AFTER INSERT ON billing
+            WHEN NEW.user_id IS NOT NULL
+            BEGIN
+                INSERT INTO billing_versions (user_id, version) VALUES (NEW.user_id, 1)
+                ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_billing_version_update
+            AFTER UPDATE ON billing
+            WHEN NEW.user_id IS NOT NULL
+            BEGIN
+                INSERT INTO billing_versions (user_id, version) VALUES (NEW.user_id, 1)
+                ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_billing_version_delete
+            AFTER DELETE ON billing
+            WHEN OLD.user_id IS NOT NULL
+            BEGIN
+                INSERT INTO billing_versions (user_id, version) VALUES (OLD.user_id, 1)
+                ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_invoices_billing_version
+            AFTER UPDATE OF status, paid_date, due_date ON invoices
+            BEGIN
+                INSERT INTO billing_versions (user_id, version) VALUES (NEW.user_id, 1)
+                ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+            END
+            ''',
+        ]),
+        (14, [
+            # Incremental calendar feeds key on the calendar version rather
+            # than second-resolution timestamps: every hearing or case change
+            # records the owner's version it produced, so a feed taken at
+            # version n resumes with everything stamped above n.
+            'ALTER TABLE hearings ADD COLUMN feed_version INTEGER NOT NULL DEFAULT 0',
+            'ALTER TABLE cases ADD COLUMN feed_version INTEGER NOT NULL DEFAULT 0',
+            '''
+            UPDATE hearings
+            SET feed_version = COALESCE((
+                SELECT cv.version FROM cases c
+                JOIN calendar_versions cv ON cv.user_id = c.user_id
+                WHERE c.id = hearings.case_id
+            ), 0)
+            ''',
+            'DROP TRIGGER IF EXISTS trg_hearings_calendar_version',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_hearings_calendar_version
+            AFTER UPDATE OF updated_at ON hearings
+            BEGIN
+                INSERT INTO calendar_versions (user_id, version, modified_at)
+                SELECT c.user_id, 1, NEW.updated_at
+                FROM cases c
+                WHERE c.id = NEW.case_id AND c.user_id IS NOT NULL
+                ON CONFLICT (user_id) DO UPDATE SET
+                    version = version + 1, modified_at = excluded.modified_at;
+                UPDATE hearings SET feed_version = COALESCE((
+                    SELECT cv.version FROM cases c
+                    JOIN calendar_versions cv ON cv.user_id = c.user_id
+                    WHERE c.id = NEW.case_id
+                ), 0)
+                WHERE id = NEW.id;
+            END
+            ''',
+            'DROP TRIGGER IF EXISTS trg_cases_calendar_version',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_cases_calendar_version
+            AFTER UPDATE OF diary_no, year, case_title, court_name, status ON cases
+            WHEN NEW.user_id IS NOT NULL
+            BEGIN
+                INSERT INTO calendar_versions (user_id, version, modified_at)
+                VALUES (NEW.user_id, 1, CURRENT_TIMESTAMP)
+                ON CONFLICT (user_id) DO UPDATE SET
+                    version = version + 1, modified_at = excluded.modified_at;
+                UPDATE cases SET feed_version = (
+                    SELECT version FROM calendar_versions WHERE user_id = NEW.user_id
+                )
+                WHERE id = NEW.id;
+            END
+            ''',
+        ]),
+        (15, [
+            # Rollup triggers bucket by the rows' own UTC timestamps, the
+            # same columns the migration 3 backfill groups on, instead of
+            # the local clock; disposals recorded at insert (imports) count
+            # as the backfill counts them
+            'DROP TRIGGER IF EXISTS trg_cases_monthly_filing',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_cases_monthly_filing
+            AFTER INSERT ON cases
+            WHEN NEW.user_id IS NOT NULL
+            BEGIN
+                INSERT INTO case_monthly_stats (user_id, month, filings)
+                VALUES (NEW.user_id,
+                        COALESCE(strftime('%Y-%m', NEW.filing_date), strftime('%Y-%m', NEW.created_at)),
+                        1)
+                ON CONFLICT (user_id, month) DO UPDATE SET filings = filings + 1;
+            END
+            ''',
+            'DROP TRIGGER IF EXISTS trg_cases_monthly_disposal',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_cases_monthly_disposal
+            AFTER UPDATE OF status ON cases
+            WHEN NEW.status = 'Disposed' AND OLD.status IS NOT 'Disposed'
+                 AND NEW.user_id IS NOT NULL
+            BEGIN
+                INSERT INTO case_monthly_stats (user_id, month, disposals)
+                VALUES (NEW.user_id, strftime('%Y-%m', NEW.updated_at), 1)
+                ON CONFLICT (user_id, month) DO UPDATE SET disposals = disposals + 1;
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_cases_monthly_disposal_insert
+            AFTER INSERT ON cases
+            WHEN NEW.status = 'Disposed' AND NEW.user_id IS NOT NULL
+            BEGIN
+                INSERT INTO case_monthly_stats (user_id, month, disposals)
+                VALUES (NEW.user_id, strftime('%Y-%m', NEW.updated_at), 1)
+                ON CONFLICT (user_id, month) DO UPDATE SET disposals = disposals + 1;
+            END
+            ''',
+        ]),
+    ]
+    
+    CASE_STATUSES = ('Filed', 'Pending', 'Listed', 'Disposed', 'Adjourned')
+    ACTIVE_STATUSES = ('Filed', 'Pending', 'Listed')
+    
+    # Registry fields whose changes are recorded; last_updated moves on
+    # every lookup and is deliberately left out
+    STATUS_FIELDS = ('status', 'next_date', 'bench', 'stage', 'documents')
+    
+    USER_CASES_SQL = '''
+        SELECT * FROM cases 
+        WHERE user_id = ?
+        ORDER BY next_hearing_date DESC, created_at DESC
+    '''
+    
+    # Keyset pages ordered on (next_hearing_date, created_at, id); {seek}
+    # narrows to one side of the previous page's last row
+    CASES_PAGE_SQL = '''
+        SELECT * FROM cases
+        WHERE user_id = ?
+        {seek}
+        ORDER BY next_hearing_date DESC, created_at DESC, id DESC
+        LIMIT ?
+    '''
+    
+    CASE_HEARINGS_SQL = 'SELECT * FROM hearings WHERE case_id = ? ORDER BY hearing_date DESC'
+    
+    CASE_DOCUMENTS_SQL = 'SELECT * FROM documents WHERE case_id = ?'
+    
+    # Driven from the user's cases into (case_id, hearing_date), so the
+    # dashboard reads only this user's hearings. CROSS JOIN pins that order:
+    # after ANALYZE the planner would otherwise scan every firm's hearings
+    # in the window through idx_hearings_date
+    UPCOMING_HEARINGS_SQL = '''
+        SELECT c.diary_no, c.year, c.case_title, c.petitioner, 
+               h.hearing_date, h.hearing_time, h.court_room, h.purpose, c.status
+        FROM cases c
+        CROSS JOIN hearings h ON c.id = h.case_id
+        WHERE c.user_id = ? 
+        AND h.hearing_date BETWEEN DATE('now') AND DATE('now', ?)
+        ORDER BY h.hearing_date
+    '''
+    
+    # Half-open [start, end) range of hearing dates. The unary + keeps the
+    # planner from driving off a user's whole case list, so a calendar
+    # window costs the hearings in it rather than the cases a user owns
+    HEARINGS_BETWEEN_SQL = '''
+        SELECT h.id, h.case_id, h.hearing_date, h.hearing_time, h.court_room, h.purpose,
+               c.diary_no, c.year, c.case_title, c.petitioner, c.status, c.court_name
+        FROM hearings h
+        JOIN cases c ON c.id = h.case_id
+        WHERE h.hearing_date >= ? AND h.hearing_date < ?
+        AND +c.user_id = ?
+        ORDER BY h.hearing_date, h.hearing_time, h.case_id
+    '''
+    
+    TIME_ENTRY_FIELDS = ('case_id', 'user_id', 'billing_date', 'activity', 'description',
+                         'hours', 'rate_per_hour', 'amount')
+    
+    BILLING_BY_CASE_SQL = '''
+        SELECT b.case_id, c.diary_no, c.year, c.case_title,
+               COUNT(*) AS entries, SUM(b.hours) AS hours, SUM(b.amount) AS amount
+        FROM billing b
+        JOIN cases c ON c.id = b.case_id
+        WHERE b.user_id = ? AND b.billing_date >= ? AND b.billing_date < ?
+        GROUP BY b.case_id
+        ORDER BY amount DESC
+    '''
+    
+    # Unbilled entries for [start, end), optionally narrowed by {scope}
+    UNBILLED_SQL = '''
+        SELECT b.id, b.user_id, b.case_id, b.activity, b.hours, b.rate_per_hour,
+               c.petitioner AS client_name
+        FROM billing b
+        JOIN cases c ON c.id = b.case_id
+        WHERE b.invoice_id IS NULL AND b.billing_date >= ? AND b.billing_date < ?
+        {scope}
+        ORDER BY b.user_id, client_name, b.id
+    '''
+    
+    BILLING_BY_MONTH_SQL = '''
+        SELECT strftime('%Y-%m', billing_date) AS month,
+               COUNT(*) AS entries, SUM(hours) AS hours, SUM(amount) AS amount
+        FROM billing
+        WHERE user_id = ? AND billing_date >= ? AND billing_date < ?
+        GROUP BY month
+        ORDER BY month
+    '''
+    
+    # One row per billing entry in [start, end) with its invoice's state;
+    # days_overdue is measured against the first parameter's date
+    BILLING_ANALYTICS_SQL = '''
+        SELECT b.case_id, b.activity, b.hours, b.amount, b.invoice_id,
+               i.status AS invoice_status, CAST(i.subtotal AS REAL) AS invoice_subtotal,
+               CAST(i.total AS REAL) AS invoice_total,
+               julianday(?) - julianday(i.due_date) AS days_overdue
+        FROM billing b
+        LEFT JOIN invoices i ON i.id = b.invoice_id
+        WHERE b.user_id = ? AND b.billing_date >= ? AND b.billing_date < ?
+    '''
+    
+    # Every hearing of a user for the ICS feed; {since} optionally limits it
+    # to hearings whose own or case's feed_version is above a calendar version.
+    # updated_at is the later of the hearing's and its case's change.
+    CALENDAR_FEED_SQL = '''
+        SELECT h.id, h.hearing_date, h.hearing_time, h.court_room, h.purpose, h.notes,
+               MAX(h.updated_at, COALESCE(c.updated_at, h.updated_at)) AS updated_at,
+               c.diary_no, c.year, c.case_title, c.court_name, c.status
+        FROM cases c
+        JOIN hearings h ON h.case_id = c.id
+        WHERE c.user_id = ?
+        {since}
+        ORDER BY h.hearing_date, h.id
+    '''
+    
+    STATUS_CHANGES_SQL = '''
+        SELECT ch.id, ch.diary_no, ch.year, ch.field, ch.old_value, ch.new_value,
+               ch.changed_at, c.id AS case_id, c.case_title
+        FROM case_status_changes ch
+        JOIN cases c ON c.diary_no = ch.diary_no AND c.year = ch.year
+        WHERE c.user_id = ? AND ch.changed_at >= ? AND +ch.id > ?
+        ORDER BY ch.changed_at DESC, ch.id DESC
+        LIMIT ?
+    '''
+    
+    # Hot queries and the indexes their plans must use; see check_query_plans()
+    QUERY_PLAN_CHECKS = {
+        'user_cases': (USER_CASES_SQL, (1,), ['idx_cases_user_hearing']),
+        'user_cases_page': (
+            CASES_PAGE_SQL.format(seek='AND (next_hearing_date, created_at, id) < (?, ?, ?)'),
+            (1, '2024-01-01', '2024-01-01 00:00:00', 1, 26),
+            ['idx_cases_user_hearing']
+        ),
+        'case_hearings': (CASE_HEARINGS_SQL, (1,), ['idx_hearings_case_date']),
+        'case_documents': (CASE_DOCUMENTS_SQL, (1,), ['idx_documents_case']),
+        'upcoming_hearings': (UPCOMING_HEARINGS_SQL, (1, '+30 days'),
+                              ['idx_cases_user_hearing', 'idx_hearings_case_date']),
+        'hearings_between': (HEARINGS_BETWEEN_SQL, ('2024-01-01', '2024-02-01', 1),
+                             ['idx_hearings_date']),
+        'billing_by_case': (BILLING_BY_CASE_SQL, (1, '2024-01-01', '2025-01-01'),
+                            ['idx_billing_user_date']),
+        'unbilled': (UNBILLED_SQL.format(scope='AND b.user_id = ?'), ('2024-01-01', '2024-02-01', 1),
+                     ['idx_billing_user_date']),
+        'unbilled_all_users': (UNBILLED_SQL.format(scope=''), ('2024-01-01', '2024-02-01'),
+                               ['idx_billing_invoice']),
+        'billing_by_month': (BILLING_BY_MONTH_SQL, (1, '2024-01-01', '2025-01-01'),
+                             ['idx_billing_user_date']),
+        'billing_analytics': (BILLING_ANALYTICS_SQL, ('2024-06-30', 1, '2024-01-01', '2025-01-01'),
+                              ['idx_billing_user_date']),
+        'status_changes': (STATUS_CHANGES_SQL, (1, '2024-01-01', 0, 200),
+                           ['idx_status_changes_time']),
+    }
+    
+    def __init__(self, db_path="lawyer_portal.db"):
+        self.db_path = db_path
+        self.pool = get_connection_pool(db_path)
+        self.case_cache = CaseCache()
+        self.init_database()
+    
+    @property
+    def schema_version(self):
+        """Current PRAGMA user_version of the database"""
+        with self.pool.cursor() as cursor:
+            cursor.execute('PRAGMA user_version')
+            return cursor.fetchone()[0]
+    
+    def init_database(self):
+        """Apply pending schema migrations"""
+        latest = self.MIGRATIONS[-1][0]
+        if self.schema_version >= latest:
+            return
         
-        conn.commit()
-        conn.close()
+        with self.pool.transaction() as cursor:
+            # Re-read under the write lock in case another process migrated
+            cursor.execute('PRAGMA user_version')
+            current = cursor.fetchone()[0]
+            
+            for version, statements in self.MIGRATIONS:
+                if version <= current:
+                    continue
+                for statement in statements:
+                    cursor.execute(statement)
+                cursor.execute(f'PRAGMA user_version = {version}')
     
     def add_user(self, email, password, full_name, **kwargs):
         """Register a new user"""
         password_hash = hashlib.sha256(password.encode()).hexdigest()
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute('''
-                INSERT INTO users (email, password_hash, full_name, phone, 
-                                firm_name, bar_council_id, specialization, experience_years)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (email, password_hash, full_name, 
-                  kwargs.get('phone'), kwargs.get('firm_name'),
-                  kwargs.get('bar_council_id'), kwargs.get('specialization'),
-                  kwargs.get('experience_years')))
-            conn.commit()
+            with self.pool.transaction() as cursor:
+                cursor.execute('''
+                    INSERT INTO users (email, password_hash, full_name, phone, 
+                                    firm_name, bar_council_id, specialization, experience_years)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (email, password_hash, full_name, 
+                      kwargs.get('phone'), kwargs.get('firm_name'),
+                      kwargs.get('bar_council_id'), kwargs.get('specialization'),
+                      kwargs.get('experience_years')))
             return True
         except sqlite3.IntegrityError:
             return False
-        finally:
-            conn.close()
     
     def authenticate_user(self, email, password):
         """Authenticate user login"""
         password_hash = hashlib.sha256(password.encode()).hexdigest()
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, email, full_name FROM users 
-            WHERE email = ? AND password_hash = ?
-        ''', (email, password_hash))
-        
-        user = cursor.fetchone()
-        conn.close()
+        with self.pool.cursor() as cursor:
+            cursor.execute('''
+                SELECT id, email, full_name FROM users 
+                WHERE email = ? AND password_hash = ?
+            ''', (email, password_hash))
+            
+            user = cursor.fetchone()
         
         if user:
             return {
@@ -276,410 +1270,2881 @@ class LawyerDatabase:
     
     def add_case(self, user_id, case_data):
         """Add a new case"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO cases (
-                diary_no, year, case_title, petitioner, respondent,
-                case_type, court_name, judge_name, status,
-                filing_date, next_hearing_date, description,
-                lawyer_notes, user_id
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            case_data['diary_no'], case_data['year'], case_data['case_title'],
-            case_data['petitioner'], case_data.get('respondent'),
-            case_data.get('case_type', 'Civil'), case_data.get('court_name', 'Supreme Court'),
-            case_data.get('judge_name'), case_data.get('status', 'Filed'),
-            case_data.get('filing_date'), case_data.get('next_hearing_date'),
-            case_data.get('description'), case_data.get('lawyer_notes'),
-            user_id
-        ))
+        with self.pool.transaction() as cursor:
+            cursor.execute('''
+                INSERT INTO cases (
+                    diary_no, year, case_title, petitioner, respondent,
+                    case_type, court_name, judge_name, status,
+                    filing_date, next_hearing_date, description,
+                    lawyer_notes, user_id
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                case_data['diary_no'], case_data['year'], case_data['case_title'],
+                case_data['petitioner'], case_data.get('respondent'),
+                case_data.get('case_type', 'Civil'), case_data.get('court_name', 'Supreme Court'),
+                case_data.get('judge_name'), case_data.get('status', 'Filed'),
+                case_data.get('filing_date'), case_data.get('next_hearing_date'),
+                case_data.get('description'), case_data.get('lawyer_notes'),
+                user_id
+            ))
+            
+            case_id = cursor.lastrowid
         
-        case_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        self.case_cache.invalidate(user_id)
         return case_id
     
+    CASE_IMPORT_FIELDS = (
+        'diary_no', 'year', 'case_title', 'petitioner', 'respondent',
+        'case_type', 'court_name', 'judge_name', 'status',
+        'filing_date', 'next_hearing_date', 'description', 'lawyer_notes'
+    )
+    
+    def upsert_cases(self, user_id, records):
+        """Insert or update many cases for a user in one transaction.
+        
+        records are tuples in CASE_IMPORT_FIELDS order. A (diary_no, year)
+        already owned by this user is updated in place; one owned by
+        another user is left untouched and reported back.
+        Returns (inserted, updated, conflicts) where conflicts holds the
+        positions of rejected records.
+        """
+        inserted = updated = 0
+        conflicts = []
+        columns = ', '.join(self.CASE_IMPORT_FIELDS)
+        placeholders = ', '.join('?' * (len(self.CASE_IMPORT_FIELDS) + 1))
+        assignments = ', '.join(
+            f'{field} = excluded.{field}' for field in self.CASE_IMPORT_FIELDS[2:]
+        )
+        
+        with self.pool.transaction() as cursor:
+            # Join through a temp table so the UNIQUE(diary_no, year) index is used
+            cursor.execute('''
+                CREATE TEMP TABLE IF NOT EXISTS import_keys (diary_no TEXT, year INTEGER)
+            ''')
+            cursor.execute('DELETE FROM import_keys')
+            cursor.executemany(
+                'INSERT INTO import_keys (diary_no, year) VALUES (?, ?)',
+                ((record[0], record[1]) for record in records)
+            )
+            cursor.execute('''
+                SELECT c.diary_no, c.year, c.user_id
+                FROM import_keys k
+                JOIN cases c ON c.diary_no = k.diary_no AND c.year = k.year
+            ''')
+            owners = {(row['diary_no'], row['year']): row['user_id'] for row in cursor.fetchall()}
+            
+            accepted = []
+            for position, record in enumerate(records):
+                key = (record[0], record[1])
+                owner = owners.get(key)
+                if owner is not None and owner != user_id:
+                    conflicts.append(position)
+                    continue
+                if owner is None:
+                    inserted += 1
+                    owners[key] = user_id
+                else:
+                    updated += 1
+                accepted.append((*record, user_id))
+            
+            cursor.executemany(f'''
+                INSERT INTO cases ({columns}, user_id)
+                VALUES ({placeholders})
+                ON CONFLICT (diary_no, year) DO UPDATE SET
+                    {assignments}, updated_at = CURRENT_TIMESTAMP
+                WHERE cases.user_id = excluded.user_id
+            ''', accepted)
+        
+        self.case_cache.invalidate(user_id)
+        return inserted, updated, conflicts
+    
     def get_user_cases(self, user_id):
         """Get all cases for a user"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        return list(self.case_cache.get_or_load(user_id, lambda: self._load_user_cases(user_id)))
+    
+    def _load_user_cases(self, user_id):
+        with self.pool.cursor() as cursor:
+            cursor.execute(self.USER_CASES_SQL, (user_id,))
+            
+            cases = [dict(row) for row in cursor.fetchall()]
+        return cases
+    
+    def get_user_cases_page(self, user_id, page_size=25, after=None):
+        """One page of a user's cases in keyset order.
         
-        cursor.execute('''
-            SELECT * FROM cases 
-            WHERE user_id = ?
-            ORDER BY next_hearing_date DESC, created_at DESC
-        ''', (user_id,))
+        Cases are ordered by (next_hearing_date, created_at, id) descending
+        with unscheduled cases last. Returns (cases, next_cursor); pass
+        next_cursor back as `after` for the following page. It is None on
+        the last page.
+        """
+        limit = page_size + 1
+        rows = []
+        with self.pool.cursor() as cursor:
+            if after is None or after[0] is not None:
+                seek, params = 'AND next_hearing_date IS NOT NULL', []
+                if after is not None:
+                    seek += ' AND (next_hearing_date, created_at, id) < (?, ?, ?)'
+                    params = list(after)
+                cursor.execute(self.CASES_PAGE_SQL.format(seek=seek), [user_id, *params, limit])
+                rows = cursor.fetchall()
+            
+            if len(rows) < limit:
+                # Unscheduled cases sort after every dated one
+                seek, params = 'AND next_hearing_date IS NULL', []
+                if after is not None and after[0] is None:
+                    seek += ' AND (created_at, id) < (?, ?)'
+                    params = list(after[1:])
+                cursor.execute(self.CASES_PAGE_SQL.format(seek=seek), [user_id, *params, limit - len(rows)])
+                rows += cursor.fetchall()
         
-        cases = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return cases
+        cases = [dict(row) for row in rows[:page_size]]
+        next_cursor = None
+        if len(rows) > page_size:
+            last = cases[-1]
+            next_cursor = (last['next_hearing_date'], last['created_at'], last['id'])
+        return cases, next_cursor
     
     def get_case_details(self, case_id):
         """Get detailed case information"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM cases WHERE id = ?', (case_id,))
-        case = cursor.fetchone()
-        
-        if case:
+        with self.pool.cursor() as cursor:
+            cursor.execute('SELECT * FROM cases WHERE id = ?', (case_id,))
+            case = cursor.fetchone()
+            
+            if not case:
+                return None
+            
             case_dict = dict(case)
             
             # Get hearings for this case
-            cursor.execute('SELECT * FROM hearings WHERE case_id = ? ORDER BY hearing_date DESC', (case_id,))
+            cursor.execute(self.CASE_HEARINGS_SQL, (case_id,))
             case_dict['hearings'] = [dict(row) for row in cursor.fetchall()]
             
             # Get documents for this case
-            cursor.execute('SELECT * FROM documents WHERE case_id = ?', (case_id,))
+            cursor.execute(self.CASE_DOCUMENTS_SQL, (case_id,))
             case_dict['documents'] = [dict(row) for row in cursor.fetchall()]
+        
+        return case_dict
+    
+    def get_cases_with_hearings(self, user_id, statuses=None, start=None, end=None):
+        """Cases matching a docket filter, each with its hearings attached.
+        
+        statuses limits case status; start/end (ISO dates, end exclusive)
+        keep cases with a hearing in that range. Fetches everything in two
+        queries instead of one get_case_details() call per case.
+        """
+        clauses, params = ['c.user_id = ?'], [user_id]
+        if statuses:
+            clauses.append(f"c.status IN ({', '.join('?' * len(statuses))})")
+            params.extend(statuses)
+        if start or end:
+            clauses.append('''EXISTS (
+                SELECT 1 FROM hearings r
+                WHERE r.case_id = c.id AND r.hearing_date >= ? AND r.hearing_date < ?
+            )''')
+            params.extend([start or '0000-01-01', end or '9999-12-31'])
+        where = ' AND '.join(clauses)
+        
+        with self.pool.cursor() as cursor:
+            cursor.execute(f'''
+                SELECT c.* FROM cases c
+                WHERE {where}
+                ORDER BY c.next_hearing_date, c.diary_no, c.year
+            ''', params)
+            cases = [dict(row) for row in cursor.fetchall()]
             
-            conn.close()
-            return case_dict
+            cursor.execute(f'''
+                SELECT h.* FROM hearings h
+                WHERE h.case_id IN (SELECT c.id FROM cases c WHERE {where})
+                ORDER BY h.case_id, h.hearing_date DESC
+            ''', params)
+            hearings = {}
+            for row in cursor.fetchall():
+                hearings.setdefault(row['case_id'], []).append(dict(row))
         
-        conn.close()
-        return None
+        for case in cases:
+            case['hearings'] = hearings.get(case['id'], [])
+        return cases
     
     def update_case_status(self, case_id, status, next_date=None):
         """Update case status"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        self.update_case_statuses([(case_id, status, next_date)])
+    
+    def update_case_statuses(self, updates, hearing_purpose=None):
+        """Apply many (case_id, status, next_date) updates in one transaction.
         
-        cursor.execute('''
-            UPDATE cases 
-            SET status = ?, next_hearing_date = ?, updated_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-        ''', (status, next_date, case_id))
+        With hearing_purpose set, a hearings row is also added for every
+        next_date the case does not already have on its calendar.
+        """
+        updates = list(updates)
+        if not updates:
+            return
+        
+        with self.pool.transaction() as cursor:
+            cursor.executemany('''
+                UPDATE cases 
+                SET status = ?, next_hearing_date = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', [(status, next_date, case_id) for case_id, status, next_date in updates])
+            
+            if hearing_purpose:
+                cursor.executemany('''
+                    INSERT INTO hearings (case_id, hearing_date, purpose)
+                    SELECT ?, ?, ?
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM hearings WHERE case_id = ? AND hearing_date = ?
+                    )
+                ''', [
+                    (case_id, next_date, hearing_purpose, case_id, next_date)
+                    for case_id, _, next_date in updates if next_date
+                ])
+            
+            owners = {self._case_owner(cursor, case_id) for case_id, _, _ in updates}
         
-        conn.commit()
-        conn.close()
+        for owner in owners:
+            self.case_cache.invalidate(owner)
+    
+    def get_active_cases_after(self, after_id=0, limit=200):
+        """Next batch of active cases across all users, in id order"""
+        placeholders = ', '.join('?' * len(self.ACTIVE_STATUSES))
+        with self.pool.cursor() as cursor:
+            cursor.execute(f'''
+                SELECT id, diary_no, year, status, next_hearing_date
+                FROM cases
+                WHERE id > ? AND status IN ({placeholders})
+                ORDER BY id
+                LIMIT ?
+            ''', (after_id, *self.ACTIVE_STATUSES, limit))
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def get_sync_state(self, name):
+        """Watermark row for a background job, or None if it never ran"""
+        with self.pool.cursor() as cursor:
+            cursor.execute('SELECT * FROM sync_state WHERE name = ?', (name,))
+            row = cursor.fetchone()
+        return dict(row) if row else None
+    
+    def save_sync_state(self, name, **fields):
+        """Insert or update the watermark row for a background job"""
+        columns = ', '.join(fields)
+        placeholders = ', '.join('?' * len(fields))
+        assignments = ', '.join(f'{field} = excluded.{field}' for field in fields)
+        with self.pool.transaction() as cursor:
+            cursor.execute(f'''
+                INSERT INTO sync_state (name, {columns}) VALUES (?, {placeholders})
+                ON CONFLICT (name) DO UPDATE SET {assignments}
+            ''', (name, *fields.values()))
     
     def add_hearing(self, case_id, hearing_data):
         """Add hearing record"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        self.add_hearing_series(case_id, hearing_data, [hearing_data['hearing_date']])
+    
+    def add_hearing_series(self, case_id, hearing_data, dates):
+        """Add one hearing per date, sharing every other field, in one transaction"""
+        rows = [
+            (
+                case_id, str(hearing_date), hearing_data.get('hearing_time'),
+                hearing_data.get('court_room'), hearing_data.get('purpose'),
+                hearing_data.get('outcome'), hearing_data.get('next_date'),
+                hearing_data.get('notes')
+            )
+            for hearing_date in dates
+        ]
+        with self.pool.transaction() as cursor:
+            cursor.executemany('''
+                INSERT INTO hearings (case_id, hearing_date, hearing_time, court_room,
+                                      purpose, outcome, next_date, notes)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            owner = self._case_owner(cursor, case_id)
         
-        cursor.execute('''
-            INSERT INTO hearings (case_id, hearing_date, purpose, outcome, next_date, notes)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
-            case_id, hearing_data['hearing_date'], hearing_data.get('purpose'),
-            hearing_data.get('outcome'), hearing_data.get('next_date'),
-            hearing_data.get('notes')
-        ))
+        self.case_cache.invalidate(owner)
+    
+    @staticmethod
+    def hearing_series_dates(start, frequency, occurrences):
+        """Dates of a recurring series: 'weekly', 'fortnightly' or 'monthly'.
         
-        conn.commit()
-        conn.close()
+        Monthly series keep the day of month, clamped to shorter months.
+        """
+        if frequency == 'monthly':
+            dates = []
+            for offset in range(occurrences):
+                month_index = start.month - 1 + offset
+                year, month = start.year + month_index // 12, month_index % 12 + 1
+                day = min(start.day, calendar.monthrange(year, month)[1])
+                dates.append(date(year, month, day))
+            return dates
+        
+        step = {'weekly': 7, 'fortnightly': 14}[frequency]
+        return [start + timedelta(days=step * offset) for offset in range(occurrences)]
     
-    def get_upcoming_hearings(self, user_id, days=30):
-        """Get upcoming hearings within specified days"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+    def find_hearing_conflicts(self, user_id, dates, hearing_time, window_minutes=60):
+        """Existing timed hearings within window_minutes of hearing_time on any of dates.
         
-        cursor.execute('''
-            SELECT c.diary_no, c.year, c.case_title, c.petitioner, 
-                   h.hearing_date, h.purpose, c.status
-            FROM cases c
-            JOIN hearings h ON c.id = h.case_id
-            WHERE c.user_id = ? 
-            AND h.hearing_date BETWEEN DATE('now') AND DATE('now', ?)
-            ORDER BY h.hearing_date
-        ''', (user_id, f'+{days} days'))
-        
-        hearings = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return hearings
+        Runs a single range query over the span of dates. Returns
+        (date, hearing) pairs.
+        """
+        if not dates or not hearing_time:
+            return []
+        
+        def minutes(value):
+            hours, mins = value.split(':')[:2]
+            return int(hours) * 60 + int(mins)
+        
+        wanted = {str(day) for day in dates}
+        target = minutes(hearing_time)
+        days = self.get_hearings_between(user_id, min(dates), max(dates) + timedelta(days=1))
+        return [
+            (day, hearing)
+            for day, hearings in days.items() if day in wanted
+            for hearing in hearings
+            if hearing['hearing_time'] and abs(minutes(hearing['hearing_time']) - target) < window_minutes
+        ]
+    
+    def add_cause_list_hearings(self, hearing_date, entries):
+        """Add hearings for cause-list entries that match a case, in one transaction.
+        
+        entries is an iterable of (item_no, court_room, diary_no, year) and
+        is consumed lazily. A case listed more than once gets a single
+        hearing under its first item; cases that already have a hearing on
+        hearing_date are skipped. Returns item/match/insert counts.
+        """
+        with self.pool.transaction() as cursor:
+            cursor.execute('''
+                CREATE TEMP TABLE IF NOT EXISTS cause_list_items (
+                    item_no INTEGER, court_room TEXT, diary_no TEXT, year INTEGER
+                )
+            ''')
+            cursor.execute('DELETE FROM cause_list_items')
+            cursor.executemany(
+                'INSERT INTO cause_list_items (item_no, court_room, diary_no, year) VALUES (?, ?, ?, ?)',
+                entries
+            )
+            cursor.execute('SELECT COUNT(*) FROM cause_list_items')
+            items = cursor.fetchone()[0]
+            
+            cursor.execute('''
+                SELECT COUNT(DISTINCT c.id) AS matched, group_concat(DISTINCT c.user_id) AS owners
+                FROM cause_list_items i
+                JOIN cases c ON c.diary_no = i.diary_no AND c.year = i.year
+            ''')
+            row = cursor.fetchone()
+            matched = row['matched']
+            owners = [int(owner) for owner in row['owners'].split(',')] if row['owners'] else []
+            
+            cursor.execute('''
+                INSERT INTO hearings (case_id, hearing_date, court_room, purpose)
+                SELECT c.id, ?, i.court_room,
+                       'Cause list item ' || COALESCE(MIN(i.item_no), '?')
+                FROM cause_list_items i
+                JOIN cases c ON c.diary_no = i.diary_no AND c.year = i.year
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM hearings h WHERE h.case_id = c.id AND h.hearing_date = ?
+                )
+                GROUP BY c.id
+            ''', (hearing_date, hearing_date))
+            inserted = cursor.rowcount
+            cursor.execute('DELETE FROM cause_list_items')
+        
+        for owner in owners:
+            self.case_cache.invalidate(owner)
+        return {'items': items, 'matched': matched, 'inserted': inserted}
+    
+    def add_time_entries(self, entries):
+        """Write buffered time entries (dicts keyed by TIME_ENTRY_FIELDS) in one transaction"""
+        columns = ', '.join(self.TIME_ENTRY_FIELDS)
+        placeholders = ', '.join(f':{field}' for field in self.TIME_ENTRY_FIELDS)
+        with self.pool.transaction() as cursor:
+            cursor.executemany(f'''
+                INSERT INTO billing ({columns}, created_at)
+                VALUES ({placeholders}, CURRENT_TIMESTAMP)
+            ''', entries)
+    
+    def get_time_entries(self, user_id, limit=50):
+        """Most recent time entries for a user"""
+        with self.pool.cursor() as cursor:
+            cursor.execute('''
+                SELECT b.id, b.billing_date, b.activity, b.description, b.hours,
+                       b.rate_per_hour, b.amount, b.status, c.diary_no, c.year, c.case_title
+                FROM billing b
+                JOIN cases c ON c.id = b.case_id
+                WHERE b.user_id = ?
+                ORDER BY b.billing_date DESC, b.id DESC
+                LIMIT ?
+            ''', (user_id, limit))
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def get_billing_totals(self, user_id, start='0000-01-01', end='9999-12-31'):
+        """Hours and amounts per case and per month for billing dates in [start, end)"""
+        params = (user_id, str(start), str(end))
+        with self.pool.cursor() as cursor:
+            cursor.execute(self.BILLING_BY_CASE_SQL, params)
+            by_case = [dict(row) for row in cursor.fetchall()]
+            cursor.execute(self.BILLING_BY_MONTH_SQL, params)
+            by_month = [dict(row) for row in cursor.fetchall()]
+        return {'by_case': by_case, 'by_month': by_month}
+    
+    @staticmethod
+    def invoice_totals(entries, tax_rate):
+        """Exact per-entry amounts and invoice totals.
+        
+        Each entry's amount is hours x rate rounded half-up to paise; the
+        tax is charged on the subtotal. Returns (amounts, subtotal, tax, total)
+        as Decimals.
+        """
+        cent = Decimal('0.01')
+        amounts = [
+            (Decimal(str(entry['hours'])) * Decimal(str(entry['rate_per_hour']))).quantize(cent, ROUND_HALF_UP)
+            for entry in entries
+        ]
+        subtotal = sum(amounts, Decimal('0.00'))
+        tax = (subtotal * Decimal(str(tax_rate)) / 100).quantize(cent, ROUND_HALF_UP)
+        return amounts, subtotal, tax, subtotal + tax
+    
+    def get_unbilled_clients(self, user_id, start, end):
+        """Unbilled hours per client of a user for billing dates in [start, end)"""
+        with self.pool.cursor() as cursor:
+            cursor.execute(self.UNBILLED_SQL.format(scope='AND b.user_id = ?'),
+                           (str(start), str(end), user_id))
+            rows = cursor.fetchall()
+        
+        clients = {}
+        for row in rows:
+            client = clients.setdefault(row['client_name'], {
+                'client_name': row['client_name'], 'entries': 0, 'hours': 0.0, 'cases': set()
+            })
+            client['entries'] += 1
+            client['hours'] += row['hours'] or 0
+            client['cases'].add(row['case_id'])
+        return [dict(client, cases=len(client['cases'])) for client in clients.values()]
+    
+    def create_invoices(self, start, end, tax_rate, issued_date, due_date,
+                        user_id=None, client_name=None):
+        """Invoice every unbilled entry dated in [start, end) in one transaction.
+        
+        Entries are grouped into one invoice per (lawyer, client). Numbers
+        come from invoice_sequences, INV-<year>-<nnnnn> per lawyer and
+        year, and are taken in the same transaction that writes the invoice
+        and marks its entries billed, so they stay gap-free. user_id=None
+        covers every lawyer. Returns the new invoice ids.
+        """
+        scope, params = '', [str(start), str(end)]
+        if user_id is not None:
+            scope += ' AND b.user_id = ?'
+            params.append(user_id)
+        if client_name is not None:
+            scope += ' AND c.petitioner = ?'
+            params.append(client_name)
+        
+        year = int(str(issued_date)[:4])
+        invoice_ids = []
+        with self.pool.transaction() as cursor:
+            cursor.execute(self.UNBILLED_SQL.format(scope=scope), params)
+            groups = {}
+            for row in cursor.fetchall():
+                groups.setdefault((row['user_id'], row['client_name']), []).append(row)
+            
+            for (owner, client), entries in groups.items():
+                amounts, subtotal, tax, total = self.invoice_totals(entries, tax_rate)
+                
+                cursor.execute('''
+                    INSERT INTO invoice_sequences (user_id, year, last_no) VALUES (?, ?, 1)
+                    ON CONFLICT (user_id, year) DO UPDATE SET last_no = last_no + 1
+                    RETURNING last_no
+                ''', (owner, year))
+                invoice_no = f"INV-{year}-{cursor.fetchone()[0]:05d}"
+                
+                cursor.execute('''
+                    INSERT INTO invoices (user_id, invoice_no, client_name, period_start, period_end,
+                                          issued_date, due_date, subtotal, tax_rate, tax_amount, total)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    owner, invoice_no, client, str(start), str(end), str(issued_date), str(due_date),
+                    str(subtotal), str(tax_rate), str(tax), str(total)
+                ))
+                invoice_id = cursor.lastrowid
+                invoice_ids.append(invoice_id)
+                
+                cursor.executemany('''
+                    UPDATE billing SET invoice_id = ?, amount = ?, status = 'Invoiced' WHERE id = ?
+                ''', [(invoice_id, float(amount), entry['id']) for entry, amount in zip(entries, amounts)])
+        
+        return invoice_ids
+    
+    def get_invoices(self, user_id, limit=50):
+        """Most recent invoices of a user"""
+        with self.pool.cursor() as cursor:
+            cursor.execute('''
+                SELECT * FROM invoices WHERE user_id = ?
+                ORDER BY issued_date DESC, id DESC
+                LIMIT ?
+            ''', (user_id, limit))
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def get_invoice_documents(self, invoice_ids, chunk_size=500):
+        """Invoices with issuer details and line items, ready for rendering.
+        
+        Line items group an invoice's entries by case, activity and rate;
+        money values are Decimal strings. Invoices and their lines are read
+        chunk_size invoices per query rather than per invoice.
+        """
+        invoice_ids = list(invoice_ids)
+        invoices, lines = {}, {}
+        with self.pool.cursor() as cursor:
+            for offset in range(0, len(invoice_ids), chunk_size):
+                chunk = invoice_ids[offset:offset + chunk_size]
+                placeholders = ', '.join('?' * len(chunk))
+                cursor.execute(f'''
+                    SELECT i.*, u.full_name AS lawyer_name, u.firm_name, u.email, u.bar_council_id
+                    FROM invoices i
+                    LEFT JOIN users u ON u.id = i.user_id
+                    WHERE i.id IN ({placeholders})
+                ''', chunk)
+                for row in cursor.fetchall():
+                    invoices[row['id']] = dict(row)
+                
+                cursor.execute(f'''
+                    SELECT b.invoice_id, b.hours, b.rate_per_hour, b.amount, b.activity,
+                           c.diary_no, c.year, c.case_title
+                    FROM billing b
+                    JOIN cases c ON c.id = b.case_id
+                    WHERE b.invoice_id IN ({placeholders})
+                    ORDER BY b.invoice_id, c.diary_no, c.year, b.activity, b.id
+                ''', chunk)
+                for row in cursor.fetchall():
+                    key = (row['diary_no'], row['year'], row['activity'], row['rate_per_hour'])
+                    line = lines.setdefault(row['invoice_id'], {}).setdefault(key, {
+                        'case': f"{row['diary_no']}/{row['year']} - {row['case_title']}",
+                        'activity': row['activity'] or 'Professional services',
+                        'hours': Decimal('0'),
+                        'rate': Decimal(str(row['rate_per_hour'])).quantize(Decimal('0.01')),
+                        'amount': Decimal('0.00')
+                    })
+                    line['hours'] += Decimal(str(row['hours']))
+                    line['amount'] += Decimal(str(row['amount'])).quantize(Decimal('0.01'))
+        
+        documents = []
+        for invoice_id in invoice_ids:
+            if invoice_id not in invoices:
+                continue
+            document = invoices[invoice_id]
+            document['lines'] = [
+                {key: str(value) for key, value in line.items()}
+                for line in lines.get(invoice_id, {}).values()
+            ]
+            documents.append(document)
+        return documents
+    
+    def mark_invoices_paid(self, invoice_ids, paid_date):
+        """Record payment of invoices and mark their entries paid"""
+        params = [(str(paid_date), invoice_id) for invoice_id in invoice_ids]
+        with self.pool.transaction() as cursor:
+            cursor.executemany(
+                "UPDATE invoices SET status = 'Paid', paid_date = ? WHERE id = ?", params
+            )
+            cursor.executemany(
+                "UPDATE billing SET status = 'Paid' WHERE invoice_id = ?",
+                [(invoice_id,) for invoice_id in invoice_ids]
+            )
+    
+    def get_billing_version(self, user_id):
+        """Counter bumped by every write to a user's billing entries or invoices"""
+        with self.pool.cursor() as cursor:
+            cursor.execute('SELECT version FROM billing_versions WHERE user_id = ?', (user_id,))
+            row = cursor.fetchone()
+        return row['version'] if row else 0
+    
+    def load_billing_frame(self, user_id, start, end, as_of):
+        """A user's billing entries in [start, end) as a DataFrame, read in one query"""
+        with self.pool.cursor() as cursor:
+            # Plain tuples go straight into columns without per-row Row objects
+            cursor.row_factory = None
+            cursor.execute(self.BILLING_ANALYTICS_SQL, (str(as_of), user_id, str(start), str(end)))
+            columns = [column[0] for column in cursor.description]
+            return pd.DataFrame.from_records(cursor.fetchall(), columns=columns)
+    
+    def save_timer(self, user_id, timer):
+        """Insert, replace or checkpoint a user's running timer"""
+        with self.pool.transaction() as cursor:
+            cursor.execute('''
+                INSERT INTO billing_timers (user_id, case_id, activity, description,
+                                            rate_per_hour, started_at, elapsed, checkpoint_at)
+                VALUES (:user_id, :case_id, :activity, :description,
+                        :rate_per_hour, :started_at, :elapsed, :checkpoint_at)
+                ON CONFLICT (user_id) DO UPDATE SET
+                    case_id = excluded.case_id, activity = excluded.activity,
+                    description = excluded.description, rate_per_hour = excluded.rate_per_hour,
+                    started_at = excluded.started_at, elapsed = excluded.elapsed,
+                    checkpoint_at = excluded.checkpoint_at
+            ''', dict(timer, user_id=user_id))
+    
+    def delete_timer(self, user_id):
+        with self.pool.transaction() as cursor:
+            cursor.execute('DELETE FROM billing_timers WHERE user_id = ?', (user_id,))
+    
+    def load_timers(self):
+        """Every checkpointed timer, keyed by user_id"""
+        with self.pool.cursor() as cursor:
+            cursor.execute('SELECT * FROM billing_timers')
+            return {row['user_id']: dict(row) for row in cursor.fetchall()}
+    
+    def get_case_metrics(self, user_id):
+        """Dashboard counters from a single grouped query.
+        
+        Returns totals, active/disposed counts, today's hearings, the
+        per-status breakdown and filings per month (YYYY-MM).
+        """
+        today = datetime.now().strftime('%Y-%m-%d')
+        with self.pool.cursor() as cursor:
+            cursor.execute('''
+                SELECT status,
+                       strftime('%Y-%m', filing_date) AS month,
+                       COUNT(*) AS cases,
+                       SUM(next_hearing_date = ?) AS hearings_today
+                FROM cases
+                WHERE user_id = ?
+                GROUP BY status, month
+            ''', (today, user_id))
+            rows = cursor.fetchall()
+        
+        status_counts = {}
+        monthly_filings = {}
+        hearings_today = 0
+        for row in rows:
+            status_counts[row['status']] = status_counts.get(row['status'], 0) + row['cases']
+            if row['month']:
+                monthly_filings[row['month']] = monthly_filings.get(row['month'], 0) + row['cases']
+            hearings_today += row['hearings_today'] or 0
+        
+        total_cases = sum(status_counts.values())
+        active_cases = sum(status_counts.get(status, 0) for status in self.ACTIVE_STATUSES)
+        
+        return {
+            'total': total_cases,
+            'active': active_cases,
+            'disposed': status_counts.get('Disposed', 0),
+            'hearings_today': hearings_today,
+            'pending_ratio': active_cases / total_cases if total_cases > 0 else 0,
+            'status_counts': dict(sorted(status_counts.items(), key=lambda item: -item[1])),
+            'monthly_filings': dict(sorted(monthly_filings.items()))
+        }
+    
+    def get_monthly_trend(self, user_id, months=12):
+        """Filings, disposals and hearings for the last N calendar months.
+        
+        Reads the precomputed case_monthly_stats rollup; months with no
+        activity are filled with zeros.
+        """
+        today = datetime.now()
+        keys = []
+        year, month = today.year, today.month
+        for _ in range(months):
+            keys.append(f"{year:04d}-{month:02d}")
+            year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+        keys.reverse()
+        
+        with self.pool.cursor() as cursor:
+            cursor.execute('''
+                SELECT month, filings, disposals, hearings
+                FROM case_monthly_stats
+                WHERE user_id = ? AND month BETWEEN ? AND ?
+            ''', (user_id, keys[0], keys[-1]))
+            rows = {row['month']: row for row in cursor.fetchall()}
+        
+        trend = []
+        for key in keys:
+            row = rows.get(key)
+            trend.append({
+                'month': key,
+                'label': datetime.strptime(key, '%Y-%m').strftime('%b %y'),
+                'filings': row['filings'] if row else 0,
+                'disposals': row['disposals'] if row else 0,
+                'hearings': row['hearings'] if row else 0
+            })
+        return trend
+    
+    def search_cases(self, user_id, query='', statuses=None, limit=50):
+        """Ranked full-text search over a user's cases.
+        
+        Every word in the query is matched as a prefix across diary number,
+        title, parties, description, lawyer notes and hearing notes. Results
+        carry a 'snippet' with matches wrapped in ** for st.markdown. An
+        empty query just applies the status filter.
+        """
+        terms = re.findall(r'\w+', query or '')
+        status_clause = ''
+        params = []
+        if statuses:
+            status_clause = f"AND c.status IN ({', '.join('?' * len(statuses))})"
+        
+        with self.pool.cursor() as cursor:
+            if terms:
+                match = ' '.join(f'"{term}"*' for term in terms)
+                cursor.execute(f'''
+                    SELECT c.*,
+                           snippet(case_search, -1, '**', '**', '…', 12) AS snippet
+                    FROM case_search
+                    JOIN cases c ON c.id = case_search.rowid
+                    WHERE case_search MATCH ?
+                    AND c.user_id = ?
+                    {status_clause}
+                    ORDER BY bm25(case_search, 10.0, 5.0, 3.0, 2.0, 1.0, 1.0, 1.0)
+                    LIMIT ?
+                ''', [match, user_id, *(statuses or []), limit])
+            else:
+                cursor.execute(f'''
+                    SELECT c.*, NULL AS snippet
+                    FROM cases c
+                    WHERE c.user_id = ?
+                    {status_clause}
+                    ORDER BY c.next_hearing_date DESC, c.created_at DESC
+                    LIMIT ?
+                ''', [user_id, *(statuses or []), limit])
+            
+            results = [dict(row) for row in cursor.fetchall()]
+        return results
+    
+    def _case_owner(self, cursor, case_id):
+        """user_id owning a case, read inside the caller's transaction"""
+        cursor.execute('SELECT user_id FROM cases WHERE id = ?', (case_id,))
+        row = cursor.fetchone()
+        return row['user_id'] if row else None
+    
+    def get_upcoming_hearings(self, user_id, days=30):
+        """Get upcoming hearings within specified days"""
+        with self.pool.cursor() as cursor:
+            cursor.execute(self.UPCOMING_HEARINGS_SQL, (user_id, f'+{days} days'))
+            
+            hearings = [dict(row) for row in cursor.fetchall()]
+        return hearings
+    
+    def get_hearings_between(self, user_id, start, end):
+        """A user's hearings in the half-open range [start, end), bucketed by day.
+        
+        start and end are dates or ISO strings. Returns a dict mapping each
+        ISO date that has hearings to its rows, in date order.
+        """
+        start, end = str(start), str(end)
+        days = {}
+        with self.pool.cursor() as cursor:
+            cursor.execute(self.HEARINGS_BETWEEN_SQL, (start, end, user_id))
+            for row in cursor.fetchall():
+                days.setdefault(row['hearing_date'], []).append(dict(row))
+        return days
+    
+    def get_month_calendar(self, user_id, year, month, firstweekday=0):
+        """Month grid of hearings fetched in a single range query.
+        
+        Returns weeks as lists of seven {'date', 'in_month', 'hearings'}
+        cells, including the leading and trailing days of adjacent months
+        that fill the first and last week.
+        """
+        weeks = calendar.Calendar(firstweekday).monthdatescalendar(year, month)
+        days = self.get_hearings_between(user_id, weeks[0][0], weeks[-1][-1] + timedelta(days=1))
+        return [
+            [
+                {'date': day, 'in_month': day.month == month,
+                 'hearings': days.get(day.isoformat(), [])}
+                for day in week
+            ]
+            for week in weeks
+        ]
+    
+    def get_calendar_version(self, user_id):
+        """(version, modified_at) of a user's hearing calendar; (0, None) if empty"""
+        with self.pool.cursor() as cursor:
+            cursor.execute(
+                'SELECT version, modified_at FROM calendar_versions WHERE user_id = ?', (user_id,)
+            )
+            row = cursor.fetchone()
+        return (row['version'], row['modified_at']) if row else (0, None)
+    
+    def iter_calendar_hearings(self, user_id, since=None, chunk_size=500):
+        """Yield a user's hearings for the calendar feed, chunk_size rows at a time.
+        
+        since is a calendar version; only hearings changed after it, directly
+        or through their case, are returned.
+        """
+        if since is not None:
+            sql = self.CALENDAR_FEED_SQL.format(since='AND (h.feed_version > ? OR c.feed_version > ?)')
+            params = (user_id, since, since)
+        else:
+            sql, params = self.CALENDAR_FEED_SQL.format(since=''), (user_id,)
+        
+        with self.pool.cursor() as cursor:
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+    
+    def check_query_plans(self):
+        """Run EXPLAIN QUERY PLAN over the hot queries.
+        
+        Returns one entry per query with the plan steps and whether every
+        expected index is used without a full table scan.
+        """
+        results = []
+        with self.pool.cursor() as cursor:
+            for name, (sql, params, indexes) in self.QUERY_PLAN_CHECKS.items():
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+                plan = [row['detail'] for row in cursor.fetchall()]
+                missing = [idx for idx in indexes if not any(idx in step for step in plan)]
+                scans = [step for step in plan if step.startswith('SCAN ')]
+                results.append({
+                    'query': name,
+                    'plan': plan,
+                    'missing_indexes': missing,
+                    'full_scans': scans,
+                    'ok': not missing and not scans
+                })
+        return results
+    
+    def get_registry_response(self, diary_no, year):
+        """Cached (payload, fetched_at) for a diary number, or None"""
+        with self.pool.cursor() as cursor:
+            cursor.execute(
+                'SELECT payload, fetched_at FROM registry_cache WHERE diary_no = ? AND year = ?',
+                (diary_no, year)
+            )
+            row = cursor.fetchone()
+        return (json.loads(row['payload']), row['fetched_at']) if row else None
+    
+    def save_registry_response(self, diary_no, year, payload, fetched_at):
+        """Store the latest registry response for a diary number"""
+        with self.pool.transaction() as cursor:
+            cursor.execute('''
+                INSERT INTO registry_cache (diary_no, year, payload, fetched_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (diary_no, year) DO UPDATE SET
+                    payload = excluded.payload, fetched_at = excluded.fetched_at
+            ''', (diary_no, year, json.dumps(payload), fetched_at))
+    
+    @classmethod
+    def status_snapshot(cls, payload):
+        """Tracked fields of a registry response in comparable form"""
+        snapshot = {field: payload.get(field) for field in cls.STATUS_FIELDS}
+        if snapshot['documents'] is not None:
+            snapshot['documents'] = sorted(snapshot['documents'])
+        return snapshot
+    
+    @staticmethod
+    def diff_snapshots(old, new):
+        """(field, old_value, new_value) for every field that differs"""
+        return [
+            (field, old.get(field), value)
+            for field, value in new.items()
+            if old.get(field) != value
+        ]
+    
+    def record_status_snapshots(self, responses):
+        """Diff registry responses against the stored snapshots.
+        
+        responses are (diary_no, year, payload) tuples. The first snapshot
+        of a case is stored as a baseline; after that only changed
+        snapshots are rewritten and one case_status_changes row is added
+        per changed field. Returns the changes as dicts.
+        """
+        snapshots = {
+            (str(diary_no), int(year)): self.status_snapshot(payload)
+            for diary_no, year, payload in responses
+            if payload.get('found')
+        }
+        if not snapshots:
+            return []
+        
+        def encode(value):
+            return value if value is None or isinstance(value, str) else json.dumps(value)
+        
+        with self.pool.transaction() as cursor:
+            cursor.execute('''
+                CREATE TEMP TABLE IF NOT EXISTS snapshot_keys (diary_no TEXT, year INTEGER)
+            ''')
+            cursor.execute('DELETE FROM snapshot_keys')
+            cursor.executemany('INSERT INTO snapshot_keys (diary_no, year) VALUES (?, ?)', snapshots)
+            cursor.execute('''
+                SELECT s.diary_no, s.year, s.snapshot
+                FROM snapshot_keys k
+                JOIN case_status_snapshots s ON s.diary_no = k.diary_no AND s.year = k.year
+            ''')
+            previous = {(row['diary_no'], row['year']): json.loads(row['snapshot'])
+                        for row in cursor.fetchall()}
+            
+            changed = []
+            changes = []
+            for key, snapshot in snapshots.items():
+                old = previous.get(key)
+                if old == snapshot:
+                    continue
+                changed.append((*key, json.dumps(snapshot)))
+                if old is not None:
+                    changes.extend(
+                        {'diary_no': key[0], 'year': key[1], 'field': field,
+                         'old_value': encode(old_value), 'new_value': encode(new_value)}
+                        for field, old_value, new_value in self.diff_snapshots(old, snapshot)
+                    )
+            
+            cursor.executemany('''
+                INSERT INTO case_status_snapshots (diary_no, year, snapshot)
+                VALUES (?, ?, ?)
+                ON CONFLICT (diary_no, year) DO UPDATE SET
+                    snapshot = excluded.snapshot, captured_at = CURRENT_TIMESTAMP
+            ''', changed)
+            cursor.executemany('''
+                INSERT INTO case_status_changes (diary_no, year, field, old_value, new_value)
+                VALUES (:diary_no, :year, :field, :old_value, :new_value)
+            ''', changes)
+        
+        return changes
+    
+    def get_status_changes(self, user_id, since=None, after_id=0, limit=200):
+        """A user's registry changes since a UTC timestamp, newest first.
+        
+        changed_at is stored as UTC, so the default, the start of today in
+        the server's local time zone, is converted to UTC before comparing.
+        """
+        if since is None:
+            midnight = datetime.now().astimezone().replace(hour=0, minute=0, second=0, microsecond=0)
+            since = midnight.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        with self.pool.cursor() as cursor:
+            cursor.execute(self.STATUS_CHANGES_SQL, (user_id, since, after_id, limit))
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def pool_stats(self):
+        """Connection and query timing counters for the shared pool"""
+        return self.pool.stats()
+    
+    def cache_stats(self):
+        """Hit/miss counters for the per-user case cache"""
+        return self.case_cache.stats()
+
+@st.cache_resource
+def get_database(db_path="lawyer_portal.db"):
+    """Single LawyerDatabase shared by every session in the process"""
+    return LawyerDatabase(db_path)
+
+# ============================================
+# BULK CASE IMPORT
+# ============================================
+
+class CaseFileError(ValueError):
+    """Raised when an import file cannot be parsed as CSV or Excel"""
+
+class CaseImporter:
+    """Streams CSV/XLSX case files into the database in batched upserts"""
+    
+    REQUIRED_FIELDS = ('diary_no', 'year', 'case_title', 'petitioner')
+    DATE_FIELDS = ('filing_date', 'next_hearing_date')
+    ISO_DATE = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})')
+    DAY_FIRST_DATE = re.compile(r'(\d{1,2})[-/.](\d{1,2})[-/.](\d{4})')
+    MAX_REPORTED_ERRORS = 1000
+    
+    def __init__(self, db, batch_size=5000):
+        self.db = db
+        self.batch_size = batch_size
+    
+    @staticmethod
+    def _header(name):
+        return re.sub(r'\W+', '_', str(name or '').strip().lower()).strip('_')
+    
+    def iter_rows(self, file, filename):
+        """Yield (row_number, row_dict) pairs without loading the whole file"""
+        if filename.lower().endswith(('.xlsx', '.xlsm')):
+            try:
+                from openpyxl import load_workbook
+                from openpyxl.utils.exceptions import InvalidFileException
+            except ImportError:
+                raise ValueError("Excel import requires the openpyxl package")
+            
+            # A corrupt workbook surfaces as whichever zip/XML error openpyxl hit
+            try:
+                workbook = load_workbook(file, read_only=True, data_only=True)
+                try:
+                    rows = workbook.active.iter_rows(values_only=True)
+                    headers = [self._header(name) for name in next(rows, ())]
+                    for row_number, values in enumerate(rows, start=2):
+                        if any(value is not None for value in values):
+                            yield row_number, dict(zip(headers, values))
+                finally:
+                    workbook.close()
+            except (InvalidFileException, zipfile.BadZipFile, KeyError, SyntaxError) as exc:
+                raise CaseFileError(f"unreadable Excel file: {exc}") from exc
+        else:
+            text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+            try:
+                reader = csv.reader(text)
+                headers = [self._header(name) for name in next(reader, [])]
+                for row_number, values in enumerate(reader, start=2):
+                    if any(value.strip() for value in values):
+                        yield row_number, dict(zip(headers, values))
+            except (csv.Error, UnicodeDecodeError) as exc:
+                raise CaseFileError(f"malformed CSV: {exc}") from exc
+            finally:
+                text.detach()
+    
+    def _parse_date(self, value):
+        if value in (None, ''):
+            return None
+        if isinstance(value, datetime):
+            return value.strftime('%Y-%m-%d')
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        
+        text = str(value).strip()
+        match = self.ISO_DATE.fullmatch(text)
+        if match:
+            year, month, day = match.groups()
+        else:
+            match = self.DAY_FIRST_DATE.fullmatch(text)
+            if not match:
+                raise ValueError(f"unrecognised date '{value}'")
+            day, month, year = match.groups()
+        
+        try:
+            return date(int(year), int(month), int(day)).isoformat()
+        except ValueError:
+            raise ValueError(f"invalid date '{value}'")
+    
+    def validate(self, row):
+        """Return a record tuple in CASE_IMPORT_FIELDS order or raise ValueError"""
+        values = {}
+        for field in LawyerDatabase.CASE_IMPORT_FIELDS:
+            value = row.get(field)
+            if isinstance(value, float) and value.is_integer():
+                value = int(value)
+            if isinstance(value, str):
+                value = value.strip()
+            values[field] = value if value not in ('', None) else None
+        
+        missing = [field for field in self.REQUIRED_FIELDS if values[field] is None]
+        if missing:
+            raise ValueError(f"missing {', '.join(missing)}")
+        
+        values['diary_no'] = str(values['diary_no'])
+        try:
+            values['year'] = int(values['year'])
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid year '{values['year']}'")
+        if not 1950 <= values['year'] <= 2100:
+            raise ValueError(f"year {values['year']} out of range")
+        
+        values['status'] = values['status'] or 'Filed'
+        if values['status'] not in LawyerDatabase.CASE_STATUSES:
+            raise ValueError(f"unknown status '{values['status']}'")
+        values['case_type'] = values['case_type'] or 'Civil'
+        values['court_name'] = values['court_name'] or 'Supreme Court'
+        
+        for field in self.DATE_FIELDS:
+            values[field] = self._parse_date(values[field])
+        
+        return tuple(values[field] for field in LawyerDatabase.CASE_IMPORT_FIELDS)
+    
+    def import_file(self, user_id, file, filename, progress=None):
+        """Import a case file for a user.
+        
+        Rows are validated as they stream in and written batch_size at a
+        time, one transaction per batch. progress(rows_read) is called after
+        every batch. Returns a report with counts, throughput and the first
+        MAX_REPORTED_ERRORS row errors. A file that stops parsing part way
+        keeps the batches already written and reports where reading stopped.
+        """
+        report = {'rows': 0, 'inserted': 0, 'updated': 0, 'failed': 0, 'errors': []}
+        start = time.perf_counter()
+        
+        def error(row_number, message):
+            report['failed'] += 1
+            if len(report['errors']) < self.MAX_REPORTED_ERRORS:
+                report['errors'].append({'row': row_number, 'error': message})
+        
+        def flush(batch, row_numbers):
+            inserted, updated, conflicts = self.db.upsert_cases(user_id, batch)
+            report['inserted'] += inserted
+            report['updated'] += updated
+            for position in conflicts:
+                error(row_numbers[position], "diary number/year belongs to another user")
+            if progress:
+                progress(report['rows'])
+        
+        batch, row_numbers = [], []
+        row_number = 1
+        try:
+            for row_number, row in self.iter_rows(file, filename):
+                report['rows'] += 1
+                try:
+                    batch.append(self.validate(row))
+                    row_numbers.append(row_number)
+                except ValueError as exc:
+                    error(row_number, str(exc))
+                
+                if len(batch) >= self.batch_size:
+                    flush(batch, row_numbers)
+                    batch, row_numbers = [], []
+        except CaseFileError as exc:
+            error(row_number + 1, str(exc))
+        
+        if batch:
+            flush(batch, row_numbers)
+        
+        report['elapsed'] = time.perf_counter() - start
+        report['rows_per_sec'] = report['rows'] / report['elapsed'] if report['elapsed'] else 0.0
+        return report
+
+# ============================================
+# CAUSE LIST INGESTION
+# ============================================
+
+class _CauseListHTMLText(HTMLParser):
+    """Collects the text of an HTML cause list one row/paragraph at a time"""
+    
+    BREAK_TAGS = {'tr', 'p', 'br', 'li', 'div', 'h1', 'h2', 'h3', 'h4', 'table'}
+    
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+        self._parts = []
+    
+    def _flush(self):
+        line = ' '.join(''.join(self._parts).split())
+        if line:
+            self.lines.append(line)
+        self._parts = []
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in self.BREAK_TAGS:
+            self._flush()
+        elif tag in ('td', 'th'):
+            self._parts.append(' ')
+    
+    def handle_endtag(self, tag):
+        if tag in self.BREAK_TAGS:
+            self._flush()
+    
+    def handle_data(self, data):
+        self._parts.append(data)
+    
+    def close(self):
+        super().close()
+        self._flush()
+
+class CauseListIngester:
+    """Streams a daily cause list and turns listed cases into hearings.
+    
+    Text, HTML and PDF lists are read line by line; court room headings
+    set the room for the items that follow, and every diary number on an
+    item line is matched against cases through UNIQUE(diary_no, year).
+    """
+    
+    COURT_ROOM = re.compile(r'\bCOURT\s*(?:ROOM\s*)?(?:NO\.?|NUMBER|ROOM)?\s*[:.\-]?\s*(\d{1,3})\b', re.I)
+    ITEM = re.compile(r'^\s*(\d{1,5})\s*[.)]?\s+\S')
+    DIARY = re.compile(r'\b(?:DIARY|D\.)\s*NO\.?\s*[:.\-]?\s*(\d{1,7})\s*[-/]\s*(\d{4})\b', re.I)
+    
+    def __init__(self, db, chunk_size=64 * 1024):
+        self.db = db
+        self.chunk_size = chunk_size
+    
+    def iter_lines(self, file, filename):
+        """Yield text lines from a cause list without loading the whole file"""
+        name = filename.lower()
+        if name.endswith('.pdf'):
+            try:
+                from pypdf import PdfReader
+            except ImportError:
+                raise ValueError("PDF cause lists require the pypdf package")
+            for page in PdfReader(file).pages:
+                yield from (page.extract_text() or '').splitlines()
+        elif name.endswith(('.html', '.htm')):
+            text = io.TextIOWrapper(file, encoding='utf-8', errors='replace')
+            parser = _CauseListHTMLText()
+            try:
+                while True:
+                    chunk = text.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    parser.feed(chunk)
+                    yield from parser.lines
+                    parser.lines.clear()
+                parser.close()
+                yield from parser.lines
+            finally:
+                text.detach()
+        else:
+            text = io.TextIOWrapper(file, encoding='utf-8-sig', errors='replace')
+            try:
+                yield from text
+            finally:
+                text.detach()
+    
+    def parse(self, lines):
+        """Yield (item_no, court_room, diary_no, year) for every listed diary number.
+        
+        Diary numbers on lines without an item number (connected matters)
+        belong to the preceding item.
+        """
+        court_room = None
+        item_no = None
+        for line in lines:
+            diaries = self.DIARY.findall(line)
+            if not diaries:
+                match = self.COURT_ROOM.search(line)
+                if match:
+                    court_room = match.group(1)
+                    item_no = None
+                continue
+            
+            match = self.ITEM.match(line)
+            if match:
+                item_no = int(match.group(1))
+            for diary_no, year in diaries:
+                yield item_no, court_room, diary_no, int(year)
+    
+    def ingest(self, file, filename, hearing_date):
+        """Parse a cause list and add a hearing on hearing_date for every matched case"""
+        start = time.perf_counter()
+        with timed('cause_list_ingest'):
+            report = self.db.add_cause_list_hearings(
+                hearing_date, self.parse(self.iter_lines(file, filename))
+            )
+        report['elapsed'] = time.perf_counter() - start
+        return report
+
+# ============================================
+# CALENDAR EXPORT
+# ============================================
+
+class CalendarFeed:
+    """RFC 5545 hearing feed for a user, generated as a stream of bytes.
+    
+    The ETag comes from the per-user calendar version kept by triggers, so
+    checking whether a feed changed costs one primary-key lookup. Passing
+    since (the version of a previous export) limits the feed to hearings
+    added or changed after it, including changes to their cases.
+    """
+    
+    PRODID = '-//Lawyer Portal//Hearing Calendar//EN'
+    
+    def __init__(self, db):
+        self.db = db
+    
+    @staticmethod
+    def _escape(value):
+        return (str(value or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+                .replace('\r\n', '\\n').replace('\n', '\\n'))
+    
+    @staticmethod
+    def _stamp(timestamp):
+        """SQLite UTC timestamp to an iCalendar UTC date-time"""
+        return datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S').strftime('%Y%m%dT%H%M%SZ')
+    
+    @staticmethod
+    def _fold(line):
+        """Encode one content line, folded at 75 octets without splitting UTF-8 sequences"""
+        data = line.encode('utf-8')
+        parts = []
+        limit = 75
+        while len(data) > limit:
+            cut = limit
+            while data[cut] & 0xC0 == 0x80:
+                cut -= 1
+            parts.append(data[:cut])
+            data = data[cut:]
+            limit = 74
+        parts.append(data)
+        return b'\r\n '.join(parts) + b'\r\n'
+    
+    def etag(self, user_id):
+        """(etag, last_modified, version) for a user's feed"""
+        version, modified_at = self.db.get_calendar_version(user_id)
+        return f'"{user_id}-{version}"', modified_at, version
+    
+    def _event(self, hearing, now):
+        try:
+            day = date.fromisoformat(hearing['hearing_date'])
+        except (TypeError, ValueError):
+            return b''
+        
+        stamp = self._stamp(hearing['updated_at']) if hearing['updated_at'] else now
+        if hearing['hearing_time']:
+            # Floating local time: the hearing is at this clock time in court
+            start = datetime.combine(day, datetime.strptime(hearing['hearing_time'][:5], '%H:%M').time())
+            timing = [f'DTSTART:{start.strftime("%Y%m%dT%H%M%S")}',
+                      f'DTEND:{(start + timedelta(hours=1)).strftime("%Y%m%dT%H%M%S")}']
+        else:
+            timing = [f'DTSTART;VALUE=DATE:{day.strftime("%Y%m%d")}',
+                      f'DTEND;VALUE=DATE:{(day + timedelta(days=1)).strftime("%Y%m%d")}']
+        location = hearing['court_name'] or 'Supreme Court'
+        if hearing['court_room']:
+            location += f", Court Room {hearing['court_room']}"
+        description = f"Purpose: {hearing['purpose'] or 'Hearing'}\nStatus: {hearing['status']}"
+        if hearing['notes']:
+            description += f"\nNotes: {hearing['notes']}"
+        
+        lines = [
+            'BEGIN:VEVENT',
+            f"UID:hearing-{hearing['id']}@lawyer-portal",
+            f'DTSTAMP:{stamp}',
+            f'LAST-MODIFIED:{stamp}',
+            *timing,
+            f"SUMMARY:{self._escape(hearing['case_title'])} ({hearing['diary_no']}/{hearing['year']})",
+            f'DESCRIPTION:{self._escape(description)}',
+            f'LOCATION:{self._escape(location)}',
+            'END:VEVENT',
+        ]
+        return b''.join(self._fold(line) for line in lines)
+    
+    def iter_ics(self, user_id, since=None, name="Court Hearings"):
+        """Yield the feed as byte chunks: header, one chunk per event, footer"""
+        now = time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())
+        yield b''.join(self._fold(line) for line in [
+            'BEGIN:VCALENDAR',
+            'VERSION:2.0',
+            f'PRODID:{self.PRODID}',
+            'CALSCALE:GREGORIAN',
+            'METHOD:PUBLISH',
+            f'X-WR-CALNAME:{self._escape(name)}',
+        ])
+        for hearing in self.db.iter_calendar_hearings(user_id, since=since):
+            yield self._event(hearing, now)
+        yield self._fold('END:VCALENDAR')
+    
+    def export(self, user_id, if_none_match=None, since=None):
+        """Conditional feed request.
+        
+        Returns etag, last_modified, version and not_modified; body is a
+        byte-chunk generator, or None when the caller's copy is already
+        current.
+        """
+        etag, last_modified, version = self.etag(user_id)
+        not_modified = if_none_match == etag or (since is not None and version <= since)
+        return {
+            'etag': etag,
+            'last_modified': last_modified,
+            'version': version,
+            'not_modified': not_modified,
+            'body': None if not_modified else self.iter_ics(user_id, since=since)
+        }
+
+class CalendarFeedServer:
+    """Serves each user's feed at a calendar subscription URL.
+    
+    GET /calendar/<user_id>.ics?token=..[&since=<version>] streams the feed
+    with chunked transfer encoding, one event per chunk, and answers a
+    matching If-None-Match with 304. Tokens are an HMAC of the user id, so
+    a URL only ever opens its own user's calendar.
+    """
+    
+    def __init__(self, db, secret, host="127.0.0.1", port=0, base_url=None):
+        server = self
+        feed = CalendarFeed(db)
+        self._secret = secret.encode()
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                match = re.fullmatch(r'/calendar/(\d+)\.ics', url.path)
+                if not match:
+                    return self._send_empty(404)
+                user_id = int(match.group(1))
+                if not hmac.compare_digest(query.get('token', [''])[0], server.token(user_id)):
+                    return self._send_empty(403)
+                since = query.get('since', [''])[0]
+                
+                result = feed.export(user_id, if_none_match=self.headers.get('If-None-Match'),
+                                     since=int(since) if since.isdigit() else None)
+                headers = {'ETag': result['etag'], 'Cache-Control': 'private, no-cache'}
+                if result['last_modified']:
+                    modified = datetime.strptime(result['last_modified'], '%Y-%m-%d %H:%M:%S')
+                    headers['Last-Modified'] = formatdate(calendar.timegm(modified.timetuple()), usegmt=True)
+                if result['not_modified']:
+                    return self._send_empty(304, headers)
+                
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/calendar; charset=utf-8')
+                self.send_header('Transfer-Encoding', 'chunked')
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                for chunk in result['body']:
+                    if chunk:
+                        self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+                self.wfile.write(b'0\r\n\r\n')
+            
+            def _send_empty(self, status, headers=None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                if status != 304:
+                    self.send_header('Content-Length', '0')
+                self.end_headers()
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.base_url = (base_url or f"http://{host}:{self._server.server_address[1]}").rstrip('/')
+        self._thread = threading.Thread(target=self._server.serve_forever, name="calendar-feed", daemon=True)
+        self._thread.start()
+    
+    def token(self, user_id):
+        return hmac.new(self._secret, f"calendar:{user_id}".encode(), hashlib.sha256).hexdigest()[:32]
+    
+    def url(self, user_id, since=None):
+        """Subscription URL for a user's feed, optionally only changes after a version"""
+        url = f"{self.base_url}/calendar/{user_id}.ics?token={self.token(user_id)}"
+        return url if since is None else f"{url}&since={since}"
+    
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+@st.cache_resource
+def get_calendar_feed_server():
+    """Subscription server on CALENDAR_FEED_PORT, or None when it is not set.
+    
+    CALENDAR_FEED_SECRET signs the URLs and must be stable across restarts;
+    CALENDAR_FEED_URL is the public base URL when behind a proxy.
+    """
+    port = os.environ.get('CALENDAR_FEED_PORT')
+    if not port:
+        return None
+    secret = os.environ.get('CALENDAR_FEED_SECRET')
+    if not secret:
+        raise RuntimeError("CALENDAR_FEED_SECRET must be set to serve calendar feeds")
+    return CalendarFeedServer(
+        get_database(), secret,
+        host=os.environ.get('CALENDAR_FEED_HOST', '127.0.0.1'), port=int(port),
+        base_url=os.environ.get('CALENDAR_FEED_URL')
+    )
+
+# ============================================
+# TIME LEDGER
+# ============================================
+
+class TimeLedger:
+    """Buffered writer for billable time entries plus per-user running timers.
+    
+    Entries are queued in memory and written batch_size at a time, or every
+    flush_interval seconds by a background thread; reads flush first so
+    totals never miss a queued entry. Running timers live in memory and are
+    checkpointed to billing_timers at most once per checkpoint_interval,
+    by the same thread whether or not any page is open. A restarted
+    process resumes each timer from its last checkpoint, so downtime is
+    never billed.
+    """
+    
+    def __init__(self, db, batch_size=200, flush_interval=5.0, checkpoint_interval=60.0):
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.checkpoint_interval = checkpoint_interval
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # Orders timer writes so a late checkpoint cannot revive a stopped timer
+        self._timer_lock = threading.Lock()
+        self._stats = {'queued': 0, 'flushed': 0, 'batches': 0, 'checkpoints': 0,
+                       'errors': 0, 'last_error': None}
+        
+        now = time.monotonic()
+        self._timers = {}
+        for user_id, timer in db.load_timers().items():
+            timer['resumed_at'] = now
+            self._timers[user_id] = timer
+        
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="time-ledger", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+    
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            # Entries stay buffered and timers keep their last checkpoint
+            # for the next attempt
+            for step in (self.flush, self.checkpoint_timers):
+                try:
+                    step()
+                except Exception as exc:
+                    with self._lock:
+                        self._stats['errors'] += 1
+                        self._stats['last_error'] = f"{type(exc).__name__}: {exc}"
+    
+    def add(self, user_id, case_id, hours, rate, activity=None, description=None, billing_date=None):
+        """Queue one time entry; returns it with the computed amount"""
+        hours = round(float(hours), 2)
+        if hours <= 0:
+            raise ValueError("hours must be positive")
+        
+        entry = {
+            'case_id': case_id,
+            'user_id': user_id,
+            'billing_date': str(billing_date or date.today()),
+            'activity': activity,
+            'description': description,
+            'hours': hours,
+            'rate_per_hour': float(rate),
+            'amount': round(hours * float(rate), 2)
+        }
+        with self._lock:
+            self._buffer.append(entry)
+            self._stats['queued'] += 1
+            full = len(self._buffer) >= self.batch_size
+        
+        if full:
+            self.flush()
+        return entry
+    
+    def flush(self):
+        """Write every queued entry in one transaction"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+            if not batch:
+                return 0
+            
+            try:
+                self.db.add_time_entries(batch)
+            except Exception:
+                with self._lock:
+                    self._buffer[:0] = batch
+                raise
+            
+            with self._lock:
+                self._stats['flushed'] += len(batch)
+                self._stats['batches'] += 1
+                self._stats['last_error'] = None
+            return len(batch)
+    
+    def recent(self, user_id, limit=50):
+        self.flush()
+        return self.db.get_time_entries(user_id, limit)
+    
+    def totals(self, user_id, start='0000-01-01', end='9999-12-31'):
+        self.flush()
+        return self.db.get_billing_totals(user_id, start, end)
+    
+    def start_timer(self, user_id, case_id, rate, activity=None, description=None):
+        """Start (or restart) a user's running timer"""
+        timer = {
+            'case_id': case_id,
+            'activity': activity,
+            'description': description,
+            'rate_per_hour': float(rate),
+            'started_at': time.time(),
+            'elapsed': 0.0,
+            'checkpoint_at': time.time()
+        }
+        with self._timer_lock:
+            self.db.save_timer(user_id, timer)
+            with self._lock:
+                self._timers[user_id] = dict(timer, resumed_at=time.monotonic())
+    
+    def timer(self, user_id):
+        """The running timer with its current elapsed seconds, or None"""
+        with self._lock:
+            timer = self._timers.get(user_id)
+            if timer is None:
+                return None
+            return dict(timer, elapsed=timer['elapsed'] + time.monotonic() - timer['resumed_at'])
+    
+    def tick(self, user_id):
+        """Checkpoint a running timer if checkpoint_interval has passed"""
+        with self._timer_lock:
+            timer = self.timer(user_id)
+            if timer is None or time.time() - timer['checkpoint_at'] < self.checkpoint_interval:
+                return timer
+            
+            timer['checkpoint_at'] = time.time()
+            self.db.save_timer(user_id, {key: value for key, value in timer.items() if key != 'resumed_at'})
+            with self._lock:
+                if user_id in self._timers:
+                    self._timers[user_id]['checkpoint_at'] = timer['checkpoint_at']
+                self._stats['checkpoints'] += 1
+        return timer
+    
+    def checkpoint_timers(self):
+        """Checkpoint every running timer that is due"""
+        with self._lock:
+            user_ids = list(self._timers)
+        for user_id in user_ids:
+            self.tick(user_id)
+    
+    def stop_timer(self, user_id, billing_date=None):
+        """Stop a running timer and queue its time as an entry"""
+        with self._timer_lock:
+            timer = self.timer(user_id)
+            if timer is None:
+                return None
+            
+            with self._lock:
+                self._timers.pop(user_id, None)
+            self.db.delete_timer(user_id)
+        
+        hours = max(round(timer['elapsed'] / 3600, 2), 0.01)
+        return self.add(user_id, timer['case_id'], hours, timer['rate_per_hour'],
+                        timer['activity'], timer['description'], billing_date)
+    
+    def discard_timer(self, user_id):
+        with self._timer_lock:
+            with self._lock:
+                self._timers.pop(user_id, None)
+            self.db.delete_timer(user_id)
+    
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['buffered'] = len(self._buffer)
+            stats['timers'] = len(self._timers)
+        return stats
+    
+    def close(self):
+        self._stop.set()
+        self.flush()
+
+@st.cache_resource
+def get_time_ledger():
+    """Process-wide time ledger"""
+    return TimeLedger(get_database())
+
+# ============================================
+# PDF GENERATOR CLASS (Code at 4)
+# ============================================
+
+class PDFGenerator(pdf_generator.PDFGenerator):
+    """Renders PDFs in this process, recording render times in the metrics store"""
+    
+    @classmethod
+    def _render(cls, story, pagesize, output_path=None):
+        with timed('pdf_render'):
+            return super()._render(story, pagesize, output_path)
+    
+    @staticmethod
+    def benchmark(iterations=50):
+        """Measure per-document render latency and peak allocation"""
+        case_data = {
+            'diary_no': '12345', 'year': 2024, 'case_title': 'Benchmark vs State',
+            'petitioner': 'Petitioner', 'respondent': 'Respondent',
+            'court_name': 'Supreme Court', 'status': 'Listed',
+            'description': 'Facts of the case. ' * 40,
+            'lawyer_notes': 'Notes. ' * 20,
+            'hearings': [
+                {'hearing_date': f'2024-{month:02d}-10', 'purpose': 'Hearing',
+                 'outcome': 'Adjourned', 'notes': 'Listed again'}
+                for month in range(1, 13)
+            ]
+        }
+        draft_data = {'doc_type': 'Writ Petition', 'facts': case_data['description']}
+        
+        results = {}
+        for name, render, data in [
+            ('case_summary', PDFGenerator.generate_case_summary_pdf, case_data),
+            ('legal_draft', PDFGenerator.generate_legal_draft_pdf, draft_data),
+        ]:
+            render(data)  # warm-up
+            timings = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                pdf = render(data)
+                timings.append((time.perf_counter() - start) * 1000)
+            
+            # Memory is traced on a separate pass so it does not skew timings
+            tracemalloc.start()
+            render(data)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            
+            timings.sort()
+            results[name] = {
+                'iterations': iterations,
+                'mean_ms': sum(timings) / len(timings),
+                'p95_ms': MetricsStore.percentile(timings, 0.95),
+                'peak_kb': peak / 1024,
+                'size_kb': len(pdf) / 1024
+            }
+        return results
+
+# ============================================
+# PDF CACHE
+# ============================================
+
+class PDFCache:
+    """On-disk cache of rendered PDFs keyed by a hash of their inputs"""
+    
+    # Temp files older than this were left by a write that never finished
+    STALE_TMP_SECONDS = 3600
+    
+    def __init__(self, directory=".pdf_cache", max_bytes=200 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        
+        # Least recently used first, rebuilt from file mtimes on startup
+        files = sorted(self.directory.glob("*.pdf"), key=lambda path: path.stat().st_mtime)
+        self._entries = OrderedDict((path.stem, path.stat().st_size) for path in files)
+        self._total = sum(self._entries.values())
+        self._sweep_tmp()
+    
+    def _sweep_tmp(self):
+        """Remove temp files abandoned by crashed writes"""
+        cutoff = time.time() - self.STALE_TMP_SECONDS
+        for path in self.directory.glob("*.tmp"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except FileNotFoundError:
+                pass
+    
+    @staticmethod
+    def key(kind, data):
+        """Content hash of the normalised render inputs.
+        
+        The render date is part of the key because generated PDFs print it.
+        """
+        payload = json.dumps(
+            {'kind': kind, 'date': datetime.now().strftime('%Y-%m-%d'), 'data': data},
+            sort_keys=True, default=str, separators=(',', ':')
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    def _path(self, key):
+        return self.directory / f"{key}.pdf"
+    
+    def get(self, key):
+        """Cached PDF bytes, or None on a miss"""
+        with self._lock:
+            if key not in self._entries:
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+        
+        path = self._path(key)
+        try:
+            pdf = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._total -= self._entries.pop(key, 0)
+            return None
+        return pdf
+    
+    def put(self, key, pdf):
+        """Store a PDF, evicting least recently used entries over the limit"""
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(pdf)
+        os.replace(tmp_path, path)
+        
+        evicted = []
+        with self._lock:
+            self._total += len(pdf) - self._entries.pop(key, 0)
+            self._entries[key] = len(pdf)
+            while self._total > self.max_bytes and len(self._entries) > 1:
+                old_key, size = self._entries.popitem(last=False)
+                self._total -= size
+                self._stats['evictions'] += 1
+                evicted.append(old_key)
+        
+        for old_key in evicted:
+            self._path(old_key).unlink(missing_ok=True)
+        if evicted:
+            self._sweep_tmp()
+    
+    def get_or_render(self, kind, data, render):
+        """Serve a PDF from cache, calling render(data) only on a miss"""
+        key = self.key(kind, data)
+        pdf = self.get(key)
+        if pdf is None:
+            pdf = render(data)
+            self.put(key, pdf)
+        return pdf
+    
+    def stats(self):
+        """Hit/miss/eviction counters and current size"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['size_mb'] = self._total / (1024 * 1024)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+@st.cache_resource
+def get_pdf_cache():
+    """Process-wide PDF cache"""
+    return PDFCache()
+
+# ============================================
+# BATCH PDF EXPORT
+# ============================================
+
+@st.cache_resource
+def get_pdf_executor():
+    """Process-wide render pool, created on the first parallel export.
+    
+    By then the server is running Streamlit's threads and holds pooled
+    SQLite connections, which a forked child must not inherit, so workers
+    come from a forkserver (spawn where there is none) and only import
+    pdf_generator.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(['pdf_generator'])
+    else:
+        context = multiprocessing.get_context('spawn')
+    max_workers = os.cpu_count() or 1
+    executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+    
+    # Streamlit installs this script as sys.modules['__main__'], which new
+    # workers would re-run. Start every worker now behind a bare __main__;
+    # the pool starts no more once it is full.
+    script = sys.modules['__main__']
+    sys.modules['__main__'] = types.ModuleType('__main__')
+    try:
+        started = [executor.submit(int) for _ in range(max_workers)]
+    finally:
+        sys.modules['__main__'] = script
+    for future in started:
+        future.result()
+    return executor
+
+def _bounded_map(executor, worker, items, limit):
+    """Like executor.map, in order, with at most limit calls in flight"""
+    in_flight = deque()
+    for item in items:
+        if len(in_flight) >= limit:
+            yield in_flight.popleft().result()
+        in_flight.append(executor.submit(worker, item))
+    while in_flight:
+        yield in_flight.popleft().result()
+
+def render_pdf_zip(items, worker, kind, file_name, max_workers, cache=None, progress=None):
+    """Render items with worker across the shared process pool into one ZIP.
+    
+    Cached PDFs go straight into the archive; the rest are rendered in
+    parallel, or in this process when max_workers is 1, and written back to
+    the cache under kind. At most max_workers documents are in the pool at
+    once, so one batch cannot take over the pool from other exports.
+    progress(done, total) is called after every document.
+    """
+    buffer = io.BytesIO()
+    total = len(items)
+    done = 0
+    
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        pending = []
+        for item in items:
+            key = cache.key(kind, item) if cache else None
+            pdf = cache.get(key) if key else None
+            if pdf is None:
+                pending.append((key, item))
+                continue
+            archive.writestr(file_name(item), pdf)
+            done += 1
+            if progress:
+                progress(done, total)
+        
+        to_render = [item for _, item in pending]
+        if max_workers == 1 or len(to_render) <= 1:
+            results = map(worker, to_render)
+        else:
+            results = _bounded_map(get_pdf_executor(), worker, to_render, max_workers)
+        # Pool workers have no metrics store, so the parent times the whole batch
+        with timed('pdf_batch_render'):
+            for (key, item), pdf in zip(pending, results):
+                archive.writestr(file_name(item), pdf)
+                if key:
+                    cache.put(key, pdf)
+                done += 1
+                if progress:
+                    progress(done, total)
+    return buffer.getvalue()
+
+class BatchPDFExporter:
+    """Renders case summaries for a whole docket across a process pool"""
+    
+    def __init__(self, db, max_workers=None, cache=None):
+        self.db = db
+        # 1 renders in-process; more spreads a batch over that many pool workers
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.cache = cache
+    
+    @staticmethod
+    def _file_name(case_data):
+        return f"case_{case_data['diary_no']}_{case_data['year']}.pdf"
+    
+    def render_zip(self, cases, progress=None):
+        """Render each case in parallel and stream the PDFs into one ZIP"""
+        cases = [PDFGenerator.case_summary_data(case) for case in cases]
+        return render_pdf_zip(cases, pdf_generator.render_case_summary, 'case_summary', self._file_name,
+                              self.max_workers, cache=self.cache, progress=progress)
+    
+    def export(self, user_id, statuses=None, start=None, end=None, fmt='zip', progress=None):
+        """Export case summaries for a docket filter.
+        
+        fmt is 'zip' (one PDF per case, rendered in parallel) or 'pdf' (a
+        single merged document). Returns (data, case_count).
+        """
+        cases = self.db.get_cases_with_hearings(user_id, statuses=statuses, start=start, end=end)
+        if not cases:
+            return None, 0
+        
+        if fmt == 'pdf':
+            data = PDFGenerator.generate_docket_pdf(cases)
+            if progress:
+                progress(len(cases), len(cases))
+        else:
+            data = self.render_zip(cases, progress=progress)
+        return data, len(cases)
+    
+    @staticmethod
+    def benchmark(n_cases=200, worker_counts=(1, None)):
+        """Docket throughput (documents/sec) for each worker count"""
+        cases = [
+            {
+                'diary_no': str(10000 + i), 'year': 2024, 'case_title': f'Benchmark {i} vs State',
+                'petitioner': 'Petitioner', 'respondent': 'Respondent', 'status': 'Listed',
+                'description': 'Facts of the case. ' * 30,
+                'hearings': [{'hearing_date': f'2024-{month:02d}-10', 'purpose': 'Hearing'}
+                             for month in range(1, 7)]
+            }
+            for i in range(n_cases)
+        ]
+        
+        results = []
+        for workers in worker_counts:
+            exporter = BatchPDFExporter(None, max_workers=workers)
+            start = time.perf_counter()
+            data = exporter.render_zip(cases)
+            elapsed = time.perf_counter() - start
+            results.append({
+                'workers': exporter.max_workers,
+                'cases': n_cases,
+                'seconds': elapsed,
+                'docs_per_sec': n_cases / elapsed,
+                'zip_kb': len(data) / 1024
+            })
+        return results
+
+# ============================================
+# INVOICE ENGINE
+# ============================================
+
+class InvoiceEngine:
+    """Turns unbilled time entries into numbered invoices and their PDFs.
+    
+    With a TimeLedger, entries still buffered in it are written before
+    anything is invoiced.
+    """
+    
+    def __init__(self, db, tax_rate=Decimal('18'), due_days=30, max_workers=None, cache=None, ledger=None):
+        self.db = db
+        self.ledger = ledger
+        self.tax_rate = Decimal(str(tax_rate))
+        self.due_days = due_days
+        # 1 renders in-process; more spreads a batch over that many pool workers
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.cache = cache
+    
+    @staticmethod
+    def month_range(year, month):
+        """[start, end) dates of a calendar month"""
+        start = date(year, month, 1)
+        return start, (start + timedelta(days=32)).replace(day=1)
+    
+    @staticmethod
+    def _file_name(invoice):
+        return f"{invoice['invoice_no']}_{re.sub(r'[^A-Za-z0-9]+', '_', invoice['client_name']).strip('_')}.pdf"
+    
+    def create(self, start, end, user_id=None, client_name=None, issued_date=None):
+        """Invoice unbilled entries in [start, end); returns the new invoice ids"""
+        if self.ledger:
+            self.ledger.flush()
+        issued_date = issued_date or date.today()
+        return self.db.create_invoices(
+            start, end, self.tax_rate, issued_date, issued_date + timedelta(days=self.due_days),
+            user_id=user_id, client_name=client_name
+        )
+    
+    def render(self, invoice_id):
+        """PDF bytes for one invoice"""
+        invoice = self.db.get_invoice_documents([invoice_id])[0]
+        if self.cache:
+            return self.cache.get_or_render('invoice', invoice, PDFGenerator.generate_invoice_pdf)
+        return PDFGenerator.generate_invoice_pdf(invoice)
+    
+    def render_zip(self, invoices, progress=None):
+        """Render invoice documents in parallel into one ZIP"""
+        return render_pdf_zip(invoices, pdf_generator.render_invoice, 'invoice', self._file_name,
+                              self.max_workers, cache=self.cache, progress=progress)
+    
+    def close_month(self, year, month, user_id=None, progress=None):
+        """Invoice every client for a month and render all invoices.
+        
+        Numbering and billing updates run in one transaction; rendering is
+        spread across worker processes. user_id=None closes the month for
+        every lawyer. Returns (zip_bytes, invoice_count).
+        """
+        start, end = self.month_range(year, month)
+        with timed('invoice_close_month'):
+            invoice_ids = self.create(start, end, user_id=user_id, issued_date=end - timedelta(days=1))
+            if not invoice_ids:
+                return None, 0
+            invoices = self.db.get_invoice_documents(invoice_ids)
+            return self.render_zip(invoices, progress=progress), len(invoices)
+    
+    @staticmethod
+    def benchmark(n_invoices=1000, lines_per_invoice=6, worker_counts=(1, None)):
+        """Invoice throughput (totals and rendering) for each worker count"""
+        invoices = []
+        for i in range(n_invoices):
+            entries = [{'hours': 0.25 * (j + 1), 'rate_per_hour': 5000 + 250 * j}
+                       for j in range(lines_per_invoice)]
+            amounts, subtotal, tax, total = LawyerDatabase.invoice_totals(entries, Decimal('18'))
+            invoices.append({
+                'invoice_no': f"INV-2024-{i + 1:05d}", 'client_name': f"Client {i}",
+                'lawyer_name': 'Benchmark Advocate', 'issued_date': '2024-01-31',
+                'due_date': '2024-03-01', 'period_start': '2024-01-01', 'period_end': '2024-02-01',
+                'subtotal': str(subtotal), 'tax_rate': '18', 'tax_amount': str(tax), 'total': str(total),
+                'lines': [
+                    {'case': f"{10000 + i}/2024 - Matter {i}", 'activity': 'Drafting',
+                     'hours': str(entry['hours']), 'rate': str(entry['rate_per_hour']), 'amount': str(amount)}
+                    for entry, amount in zip(entries, amounts)
+                ]
+            })
+        
+        results = []
+        for workers in worker_counts:
+            engine = InvoiceEngine(None, max_workers=workers)
+            start = time.perf_counter()
+            data = engine.render_zip(invoices)
+            elapsed = time.perf_counter() - start
+            results.append({
+                'workers': engine.max_workers,
+                'invoices': n_invoices,
+                'seconds': elapsed,
+                'invoices_per_sec': n_invoices / elapsed,
+                'zip_kb': len(data) / 1024
+            })
+        return results
+
+# ============================================
+# BILLING ANALYTICS
+# ============================================
+
+class BillingAnalytics:
+    """Receivables ageing, realisation and profitability over billing entries.
+    
+    A period's entries are read in one query into columnar arrays and every
+    figure is computed with vectorised NumPy operations. Reports are cached
+    per user and period and reused until the user's billing_versions
+    counter moves, which triggers bump on every billing or invoice write.
+    """
+    
+    AGEING_BUCKETS = ('Unbilled', 'Not Due', '1-30 days', '31-60 days', '61-90 days', '90+ days')
+    # Lower bounds, in days past due, of the overdue buckets
+    AGEING_EDGES = np.array([1, 31, 61, 91])
+    
+    def __init__(self, db, max_entries=256):
+        self.db = db
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+    
+    @staticmethod
+    def _ratio(numerator, denominator):
+        """Element-wise numerator / denominator, 0 where the denominator is 0"""
+        numerator = np.asarray(numerator, dtype=float)
+        denominator = np.asarray(denominator, dtype=float)
+        return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator != 0)
+    
+    @classmethod
+    def compute(cls, frame):
+        """Every report figure for a frame shaped like BILLING_ANALYTICS_SQL rows.
+        
+        Amounts are recorded values; billed and collected are the parts on
+        an invoice and on a paid invoice. Receivables come from the issued
+        invoice totals, tax included, each spread over its lines by amount
+        so they sum back to the invoice; they are aged by days past the due
+        date, and unbilled work is its own bucket. Money figures are rounded
+        to paise.
+        """
+        hours = frame['hours'].fillna(0).to_numpy(dtype=float)
+        amount = frame['amount'].fillna(0).to_numpy(dtype=float)
+        invoiced = frame['invoice_id'].notna().to_numpy()
+        paid = (frame['invoice_status'] == 'Paid').to_numpy()
+        billed = np.where(invoiced, amount, 0.0)
+        collected = np.where(paid, amount, 0.0)
+        
+        line_share = cls._ratio(amount, frame['invoice_subtotal'].fillna(0).to_numpy(dtype=float))
+        invoice_total = frame['invoice_total'].fillna(0).to_numpy(dtype=float)
+        receivable = np.where(invoiced & ~paid, line_share * invoice_total, 0.0)
+        overdue = frame['days_overdue'].fillna(0).to_numpy(dtype=float)
+        bucket = np.where(invoiced, 1 + np.searchsorted(cls.AGEING_EDGES, overdue, side='right'), 0)
+        ageing = np.bincount(bucket, weights=np.where(invoiced, receivable, amount),
+                             minlength=len(cls.AGEING_BUCKETS)).round(2)
+        
+        totals = {
+            'entries': len(frame),
+            'hours': float(hours.sum()),
+            'recorded': float(amount.sum()),
+            'billed': float(billed.sum()),
+            'collected': float(collected.sum()),
+            'receivable': round(float(receivable.sum()), 2),
+            'unbilled': float(ageing[0]),
+        }
+        realisation = {
+            'billing': float(cls._ratio(totals['billed'], totals['recorded'])),
+            'collection': float(cls._ratio(totals['collected'], totals['billed'])),
+            'overall': float(cls._ratio(totals['collected'], totals['recorded'])),
+        }
+        
+        codes, case_ids = pd.factorize(frame['case_id'])
+        def per_case(values):
+            return np.bincount(codes, weights=values, minlength=len(case_ids))
+        case_hours, case_recorded = per_case(hours), per_case(amount)
+        case_billed, case_collected = per_case(billed), per_case(collected)
+        by_case = pd.DataFrame({
+            'case_id': case_ids,
+            'hours': case_hours,
+            'recorded': case_recorded,
+            'billed': case_billed,
+            'collected': case_collected,
+            'receivable': per_case(receivable).round(2),
+            'standard_rate': cls._ratio(case_recorded, case_hours),
+            'realised_rate': cls._ratio(case_collected, case_hours),
+            'realisation': cls._ratio(case_collected, case_recorded),
+            'share': cls._ratio(case_collected, np.full(len(case_ids), totals['collected'])),
+        }).sort_values(['collected', 'recorded'], ascending=False, ignore_index=True)
+        
+        codes, activities = pd.factorize(frame['activity'].fillna('Unspecified'))
+        activity_hours = np.bincount(codes, weights=hours, minlength=len(activities))
+        by_activity = pd.DataFrame({
+            'activity': activities,
+            'hours': activity_hours,
+            'recorded': np.bincount(codes, weights=amount, minlength=len(activities)),
+            'share': cls._ratio(activity_hours, np.full(len(activities), totals['hours'])),
+        }).sort_values('hours', ascending=False, ignore_index=True)
+        
+        return {
+            'totals': totals,
+            'realisation': realisation,
+            'ageing': pd.DataFrame({'bucket': cls.AGEING_BUCKETS, 'amount': ageing}),
+            'by_case': by_case,
+            'by_activity': by_activity,
+        }
+    
+    def report(self, user_id, start='0000-01-01', end='9999-12-31', as_of=None):
+        """Analytics for a user's entries dated in [start, end), aged as of as_of"""
+        as_of = as_of or date.today()
+        key = (user_id, str(start), str(end), str(as_of))
+        # Read before loading so a write that lands mid-load leaves this report stale
+        version = self.db.get_billing_version(user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry[1]
+            self._stats['misses'] += 1
+        
+        with timed('billing_analytics'):
+            report = self.compute(self.db.load_billing_frame(user_id, start, end, as_of))
+        
+        with self._lock:
+            self._entries[key] = (version, report)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+        return report
+    
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+    
+    @classmethod
+    def benchmark(cls, n_rows=1_000_000, n_cases=5000, repeat=3, seed=7):
+        """Best-of-repeat compute() time over a synthetic ledger of n_rows entries"""
+        rng = np.random.default_rng(seed)
+        hours = rng.integers(1, 33, n_rows) * 0.25
+        amount = hours * rng.choice([2500.0, 5000.0, 7500.0, 10000.0], n_rows)
+        invoiced = rng.random(n_rows) < 0.7
+        invoice_ids = np.where(invoiced, rng.integers(1, n_rows // 20 + 2, n_rows), 0)
+        subtotals = np.bincount(invoice_ids, weights=amount)[invoice_ids]
+        invoice_paid = rng.random(invoice_ids.max() + 1) < 0.6
+        frame = pd.DataFrame({
+            'case_id': rng.integers(1, n_cases + 1, n_rows),
+            'activity': pd.Categorical.from_codes(
+                rng.integers(0, 6, n_rows),
+                ["Case Research", "Drafting", "Court Appearance",
+                 "Client Meeting", "Document Review", "Other"]
+            ),
+            'hours': hours,
+            'amount': amount,
+            'invoice_id': np.where(invoiced, invoice_ids, np.nan),
+            'invoice_status': np.where(invoiced, np.where(invoice_paid[invoice_ids], 'Paid', 'Issued'), None),
+            'invoice_subtotal': np.where(invoiced, subtotals, np.nan),
+            'invoice_total': np.where(invoiced, (subtotals * 1.18).round(2), np.nan),
+            'days_overdue': np.where(invoiced, rng.integers(-30, 180, n_rows), np.nan),
+        })
+        
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            cls.compute(frame)
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        return {'rows': n_rows, 'cases': n_cases, 'seconds': best, 'rows_per_sec': n_rows / best}
+
+@st.cache_resource
+def get_billing_analytics():
+    """Process-wide billing analytics with its report cache"""
+    return BillingAnalytics(get_database())
+
+# ============================================
+# AI DRAFTING ASSISTANT
+# ============================================
+
+class DraftTemplate:
+    """A drafting template compiled once into a str.format_map string"""
+    
+    def __init__(self, text):
+        # Template $placeholders become {placeholders}; literal braces are
+        # escaped so a render is one C-level format_map pass
+        parts = []
+        self.placeholders = set()
+        position = 0
+        for match in string.Template.pattern.finditer(text):
+            parts.append(text[position:match.start()].replace('{', '{{').replace('}', '}}'))
+            name = match.group('named') or match.group('braced')
+            if name:
+                parts.append('{' + name + '}')
+                self.placeholders.add(name)
+            elif match.group('escaped') is not None:
+                parts.append('$')
+            else:
+                raise ValueError(f"Invalid placeholder at position {match.start()}")
+            position = match.end()
+        parts.append(text[position:].replace('{', '{{').replace('}', '}}'))
+        self.format_string = ''.join(parts)
+    
+    def render(self, values):
+        return self.format_string.format_map(values)
+
+class TemplateRegistry:
+    """Drafting templates loaded and compiled once per process"""
+    
+    TEMPLATE_FILES = {
+        "Writ Petition": "writ_petition.txt",
+        "SLP (Special Leave Petition)": "slp.txt",
+        "Affidavit": "affidavit.txt",
+        "Reply": "reply.txt",
+        "IA (Interim Application)": "interim_application.txt",
+        "Written Submissions": "written_submissions.txt",
+    }
+    DEFAULT_TYPE = "Writ Petition"
+    
+    def __init__(self, directory):
+        self.templates = {
+            doc_type: DraftTemplate((Path(directory) / file_name).read_text(encoding='utf-8').rstrip('\n'))
+            for doc_type, file_name in self.TEMPLATE_FILES.items()
+        }
+        self.templates["SLP"] = self.templates["SLP (Special Leave Petition)"]
+    
+    @property
+    def document_types(self):
+        return list(self.TEMPLATE_FILES)
+    
+    def render(self, doc_type, values):
+        template = self.templates.get(doc_type) or self.templates[self.DEFAULT_TYPE]
+        return template.render(values)
+
+@st.cache_resource
+def get_template_registry():
+    """Template registry built from the templates/ directory next to the app"""
+    return TemplateRegistry(Path(__file__).parent / "templates")
+
+class AI_Drafting_Assistant:
+    @staticmethod
+    def generate_draft_from_facts(facts, doc_type="Writ Petition"):
+        """Generate legal draft from case facts"""
+        now = datetime.now()
+        with timed('template_render'):
+            return get_template_registry().render(doc_type, {
+                'facts': facts,
+                'date': now.strftime('%d %B, %Y'),
+                'year': now.year
+            })
+
+# ============================================
+# SESSION STATE INITIALIZATION
+# ============================================
+
+if 'db' not in st.session_state:
+    st.session_state.db = get_database()
+
+if 'logged_in' not in st.session_state:
+    st.session_state.logged_in = False
+
+if 'current_user' not in st.session_state:
+    st.session_state.current_user = None
+
+if 'current_case' not in st.session_state:
+    st.session_state.current_case = None
+
+# ============================================
+# SUPREME COURT REGISTRY CLIENT
+# ============================================
+
+class RegistryError(Exception):
+    """Raised when the registry cannot be reached after all retries"""
+
+class TokenBucket:
+    """Async token bucket allowing `rate` requests/sec with bursts up to `capacity`"""
+    
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = None
+        self._lock = None
+    
+    async def acquire(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        loop = asyncio.get_running_loop()
+        
+        async with self._lock:
+            while True:
+                now = loop.time()
+                if self._updated is not None:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+class RegistryClient:
+    """Async registry client running on its own event loop thread.
+    
+    One keep-alive aiohttp session is shared by every lookup; requests pass
+    through a token bucket and are retried with exponential backoff on
+    timeouts, connection errors, 429 and 5xx responses; other 4xx responses
+    fail at once. Streamlit threads call fetch()/fetch_many() which hand
+    coroutines to the loop.
+    """
+    
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    
+    def __init__(self, base_url, rate=5.0, burst=10, timeout=10.0, max_retries=3,
+                 backoff=0.5, max_connections=20):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_connections = max_connections
+        self._bucket = TokenBucket(rate, burst)
+        self._session = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="registry-client", daemon=True)
+        self._thread.start()
+    
+    def _get_session(self):
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={'Accept': 'application/json'}
+            )
+        return self._session
+    
+    async def _fetch(self, diary_no, year):
+        session = self._get_session()
+        params = {'diary_no': str(diary_no), 'year': str(year)}
+        last_error = None
+        
+        for attempt in range(self.max_retries + 1):
+            await self._bucket.acquire()
+            retry_after = None
+            try:
+                async with session.get(f"{self.base_url}/case-status", params=params) as response:
+                    if response.status == 404:
+                        return {'found': False}
+                    if response.status in self.RETRY_STATUSES:
+                        retry_after = response.headers.get('Retry-After')
+                        last_error = RegistryError(f"registry returned HTTP {response.status}")
+                    elif response.status >= 400:
+                        # A rejected request fails the same way on every retry
+                        raise RegistryError(f"{diary_no}/{year}: registry returned HTTP {response.status}")
+                    else:
+                        data = await response.json()
+                        data.setdefault('found', True)
+                        return data
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                last_error = exc
+            
+            if attempt < self.max_retries:
+                delay = self.backoff * (2 ** attempt) * (1 + random.random() * 0.25)
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, float(retry_after))
+                await asyncio.sleep(delay)
+        
+        raise RegistryError(f"{diary_no}/{year}: {last_error}")
+    
+    async def _fetch_many(self, keys):
+        results = await asyncio.gather(
+            *(self._fetch(diary_no, year) for diary_no, year in keys),
+            return_exceptions=True
+        )
+        return dict(zip(keys, results))
+    
+    def submit(self, diary_no, year):
+        """Start a lookup without waiting; returns a concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(self._fetch(diary_no, year), self._loop)
+    
+    def fetch(self, diary_no, year):
+        """Look up one diary number, raising RegistryError on failure"""
+        return self.submit(diary_no, year).result()
+    
+    def fetch_many(self, keys):
+        """Look up many (diary_no, year) keys concurrently.
+        
+        Returns a dict mapping each key to its result or the exception it
+        failed with.
+        """
+        keys = list(dict.fromkeys(keys))
+        return asyncio.run_coroutine_threadsafe(self._fetch_many(keys), self._loop).result()
+    
+    def close(self):
+        if self._session is not None:
+            asyncio.run_coroutine_threadsafe(self._session.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+class RegistryStubServer:
+    """Local stand-in for the registry API, for tests and SCI_REGISTRY_STUB=1.
+    
+    Serves GET /case-status?diary_no=..&year=.. over keep-alive HTTP/1.1.
+    latency and failure_rate let tests exercise timeouts and retries;
+    fail_first fails the first n requests outright, with failure_status
+    and an optional Retry-After header.
+    """
+    
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, failure_rate=0.0,
+                 fail_first=0, failure_status=503, retry_after=None):
+        stub = self
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.fail_first = fail_first
+        self.failure_status = failure_status
+        self.retry_after = retry_after
+        self.requests = 0
+        self._lock = threading.Lock()
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                    scripted_failure = stub.requests <= stub.fail_first
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                diary_no = query.get('diary_no', [''])[0]
+                year = query.get('year', [''])[0]
+                
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if scripted_failure or (stub.failure_rate and random.random() < stub.failure_rate):
+                    headers = {'Retry-After': str(stub.retry_after)} if stub.retry_after is not None else {}
+                    self._send(stub.failure_status, {'error': 'unavailable'}, headers)
+                elif url.path != '/case-status' or not (diary_no and year.isdigit()):
+                    self._send(404, {'found': False})
+                else:
+                    self._send(200, {
+                        "found": True,
+                        "diary_no": diary_no,
+                        "year": int(year),
+                        "status": "Listed",
+                        "next_date": "2024-12-15",
+                        "bench": "Hon'ble Chief Justice",
+                        "stage": "Final Hearing",
+                        "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                        "documents": ["Petition", "Counter Affidavit", "Rejoinder"],
+                        "remarks": "Case is ready for final hearing"
+                    })
+            
+            def _send(self, status, payload, headers=None):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://{host}:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, name="registry-stub", daemon=True)
+        self._thread.start()
+    
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+def registry_source():
+    """'live', 'stub' or None, depending on how the registry is configured"""
+    if os.environ.get('SCI_REGISTRY_URL'):
+        return 'live'
+    if os.environ.get('SCI_REGISTRY_STUB') == '1':
+        return 'stub'
+    return None
 
-# ============================================
-# PDF GENERATOR CLASS (Code at 4)
-# ============================================
+@st.cache_resource
+def get_registry_client():
+    """Shared client for SCI_REGISTRY_URL.
+    
+    SCI_REGISTRY_STUB=1 opts into the local stub's canned data instead; with
+    neither set this raises RegistryError rather than inventing statuses.
+    """
+    source = registry_source()
+    if source is None:
+        raise RegistryError("No registry configured: set SCI_REGISTRY_URL "
+                            "(or SCI_REGISTRY_STUB=1 for the local stub)")
+    base_url = os.environ['SCI_REGISTRY_URL'] if source == 'live' else RegistryStubServer().url
+    return RegistryClient(
+        base_url,
+        rate=float(os.environ.get('SCI_REGISTRY_RATE', 5)),
+        timeout=float(os.environ.get('SCI_REGISTRY_TIMEOUT', 10))
+    )
 
-class PDFGenerator:
-    @staticmethod
-    def generate_case_summary_pdf(case_data, output_path="case_summary.pdf"):
-        """Generate PDF summary for a case"""
-        doc = SimpleDocTemplate(output_path, pagesize=A4)
-        story = []
-        styles = getSampleStyleSheet()
-        
-        # Title
-        title = f"Case Summary: {case_data['diary_no']}/{case_data['year']}"
-        story.append(Paragraph(title, styles['Title']))
-        story.append(Spacer(1, 12))
-        
-        # Case Details
-        details = f"""
-        <b>Case Title:</b> {case_data.get('case_title', 'N/A')}<br/>
-        <b>Petitioner:</b> {case_data.get('petitioner', 'N/A')}<br/>
-        <b>Respondent:</b> {case_data.get('respondent', 'N/A')}<br/>
-        <b>Court:</b> {case_data.get('court_name', 'N/A')}<br/>
-        <b>Judge:</b> {case_data.get('judge_name', 'N/A')}<br/>
-        <b>Status:</b> {case_data.get('status', 'N/A')}<br/>
-        <b>Next Hearing:</b> {case_data.get('next_hearing_date', 'N/A')}<br/>
-        <b>Filing Date:</b> {case_data.get('filing_date', 'N/A')}<br/>
-        """
-        story.append(Paragraph(details, styles['Normal']))
-        story.append(Spacer(1, 12))
-        
-        # Description
-        if case_data.get('description'):
-            story.append(Paragraph("<b>Case Description:</b>", styles['Heading2']))
-            story.append(Paragraph(case_data['description'], styles['Normal']))
-            story.append(Spacer(1, 12))
-        
-        # Lawyer Notes
-        if case_data.get('lawyer_notes'):
-            story.append(Paragraph("<b>Lawyer Notes:</b>", styles['Heading2']))
-            story.append(Paragraph(case_data['lawyer_notes'], styles['Normal']))
-            story.append(Spacer(1, 12))
-        
-        # Hearings History
-        if case_data.get('hearings'):
-            story.append(Paragraph("<b>Hearing History:</b>", styles['Heading2']))
-            for hearing in case_data['hearings']:
-                hearing_text = f"""
-                Date: {hearing.get('hearing_date', 'N/A')}<br/>
-                Purpose: {hearing.get('purpose', 'N/A')}<br/>
-                Outcome: {hearing.get('outcome', 'N/A')}<br/>
-                Notes: {hearing.get('notes', 'N/A')}<br/>
-                """
-                story.append(Paragraph(hearing_text, styles['Normal']))
-                story.append(Spacer(1, 6))
-        
-        # Footer
-        story.append(Spacer(1, 36))
-        footer = Paragraph(f"Generated on: {datetime.now().strftime('%d %B, %Y')}<br/>Lawyer Portal Pro", 
-                          styles['Italic'])
-        story.append(footer)
-        
-        doc.build(story)
-        return output_path
+class RegistryCache:
+    """Shared (diary_no, year) -> registry response cache.
+    
+    Entries younger than ttl are served as-is. Entries within the following
+    stale window are served immediately while one background refresh per
+    key runs; older entries are fetched inline. Responses live in memory
+    and in the registry_cache table, so a restart starts warm. Refreshed
+    responses are persisted on a writer thread, never on the client's
+    event loop.
+    """
+    
+    def __init__(self, db, client, ttl=900.0, stale_ttl=86400.0, max_entries=4096):
+        self.db = db
+        self.client = client
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="registry-cache")
+        self._stats = {'hits': 0, 'stale': 0, 'misses': 0, 'refreshes': 0, 'errors': 0}
     
     @staticmethod
-    def generate_legal_draft_pdf(draft_data, output_path="legal_draft.pdf"):
-        """Generate legal draft PDF"""
-        doc = SimpleDocTemplate(output_path, pagesize=letter)
-        story = []
-        styles = getSampleStyleSheet()
-        
-        # Header
-        header = f"""
-        IN THE {draft_data.get('court', 'SUPREME COURT').upper()} OF INDIA<br/>
-        {draft_data.get('jurisdiction', 'ORIGINAL JURISDICTION').upper()}<br/>
-        {draft_data.get('doc_type', 'WRIT PETITION').upper()} NO. ___ OF {datetime.now().year}<br/>
-        """
-        story.append(Paragraph(header, styles['Heading1']))
-        story.append(Spacer(1, 24))
-        
-        # Parties
-        parties = f"""
-        <b>IN THE MATTER OF:</b><br/>
-        {draft_data.get('petitioner', '[Petitioner Name]')}<br/>
-        <i>Petitioner(s)</i><br/><br/>
-        
-        <b>VERSUS</b><br/><br/>
+    def _key(diary_no, year):
+        return str(diary_no).strip(), int(year)
+    
+    def _remember(self, key, payload, fetched_at):
+        with self._lock:
+            self._entries[key] = (payload, fetched_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
         
-        {draft_data.get('respondent', '[Respondent Name]')}<br/>
-        <i>Respondent(s)</i><br/>
-        """
-        story.append(Paragraph(parties, styles['Normal']))
-        story.append(Spacer(1, 24))
-        
-        # Facts
-        if draft_data.get('facts'):
-            story.append(Paragraph("<b>BRIEF FACTS OF THE CASE:</b>", styles['Heading2']))
-            story.append(Paragraph(draft_data['facts'], styles['Normal']))
-            story.append(Spacer(1, 12))
-        
-        # Grounds
-        story.append(Paragraph("<b>GROUNDS:</b>", styles['Heading2']))
-        grounds = draft_data.get('grounds', [
-            "Violation of Fundamental Rights under the Constitution.",
-            "Error apparent on the face of the record.",
-            "Substantial questions of law of general importance."
-        ])
+        entry = self.db.get_registry_response(*key)
+        if entry is not None:
+            self._remember(key, *entry)
+        return entry
+    
+    def store(self, diary_no, year, payload):
+        """Record a fresh registry response"""
+        key = self._key(diary_no, year)
+        fetched_at = time.time()
+        self.db.save_registry_response(*key, payload, fetched_at)
+        self.db.record_status_snapshots([(*key, payload)])
+        self._remember(key, payload, fetched_at)
+    
+    def _refresh(self, key):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            self._stats['refreshes'] += 1
         
-        for i, ground in enumerate(grounds, 1):
-            story.append(Paragraph(f"{i}. {ground}", styles['Normal']))
+        start = time.perf_counter()
         
-        story.append(Spacer(1, 24))
+        def persist(future, elapsed):
+            get_metrics_store().record('registry_fetch', elapsed)
+            try:
+                self.store(*key, future.result())
+            except Exception:
+                with self._lock:
+                    self._stats['errors'] += 1
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
         
-        # Prayer
-        story.append(Paragraph("<b>PRAYER:</b>", styles['Heading2']))
-        prayer = f"""
-        For the reasons stated above, it is respectfully prayed that this Hon'ble Court may be pleased to:<br/><br/>
+        # Runs on the client's event loop: a SQLite write waiting on a busy
+        # lock there would stall every other lookup in flight
+        def done(future):
+            self._writer.submit(persist, future, time.perf_counter() - start)
         
-        a) {draft_data.get('prayer_a', 'Issue appropriate writ, order or direction')};<br/>
-        b) {draft_data.get('prayer_b', 'Grant interim relief')};<br/>
-        c) {draft_data.get('prayer_c', 'Pass any other order(s) as this Hon'ble Court may deem fit')}.<br/><br/>
+        self.client.submit(*key).add_done_callback(done)
+    
+    def get(self, diary_no, year):
+        """Registry response for a case, raising RegistryError if it cannot be fetched"""
+        key = self._key(diary_no, year)
+        entry = self._lookup(key)
+        age = time.time() - entry[1] if entry is not None else None
         
-        <b>PLACE:</b> New Delhi<br/>
-        <b>DATE:</b> {datetime.now().strftime('%d %B, %Y')}<br/><br/>
+        if age is not None and age < self.ttl:
+            with self._lock:
+                self._stats['hits'] += 1
+            return entry[0]
         
-        <b>COUNSEL FOR THE PETITIONER(S)</b><br/>
-        [Signature]<br/>
-        """
-        story.append(Paragraph(prayer, styles['Normal']))
+        if age is not None and age < self.ttl + self.stale_ttl:
+            with self._lock:
+                self._stats['stale'] += 1
+            self._refresh(key)
+            return entry[0]
         
-        doc.build(story)
-        return output_path
+        with self._lock:
+            self._stats['misses'] += 1
+        try:
+            with timed('registry_fetch'):
+                payload = self.client.fetch(*key)
+        except RegistryError:
+            with self._lock:
+                self._stats['errors'] += 1
+            raise
+        self.store(*key, payload)
+        return payload
+    
+    def stats(self):
+        """Hit/stale/miss counters and the number of entries held in memory"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['stale'] + stats['misses']
+        stats['hit_rate'] = (stats['hits'] + stats['stale']) / lookups if lookups else 0.0
+        return stats
+
+@st.cache_resource
+def get_registry_cache():
+    """Process-wide registry response cache"""
+    return RegistryCache(
+        get_database(), get_registry_client(),
+        ttl=float(os.environ.get('SCI_REGISTRY_CACHE_TTL', 900)),
+        stale_ttl=float(os.environ.get('SCI_REGISTRY_STALE_TTL', 86400))
+    )
 
 # ============================================
-# AI DRAFTING ASSISTANT
+# COURT STATUS SYNC
 # ============================================
 
-class AI_Drafting_Assistant:
+class CourtSyncWorker:
+    """Background job that refreshes every active case from the registry.
+    
+    Walks Filed/Pending/Listed cases in id order, looks each batch up
+    concurrently through the registry client and writes the changes back
+    in one transaction per batch. The last committed id is kept in
+    sync_state so a restart resumes mid-run instead of starting over.
+    """
+    
+    NAME = 'court_status'
+    
+    def __init__(self, db, client, interval=3600, batch_size=200):
+        self.db = db
+        self.client = client
+        self.interval = interval
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        # (timestamp, message) of the last failed scheduled run, cleared by a good one
+        self.last_error = None
+    
     @staticmethod
-    def generate_draft_from_facts(facts, doc_type="Writ Petition"):
-        """Generate legal draft from case facts"""
+    def _changes(case, result):
+        """(status, next_date) to write for a case, or None if nothing changed"""
+        status = result.get('status')
+        if status not in LawyerDatabase.CASE_STATUSES:
+            status = case['status']
         
-        templates = {
-            "Writ Petition": {
-                "structure": [
-                    "IN THE SUPREME COURT OF INDIA",
-                    "WRIT PETITION (CIVIL) NO. ___ OF 2024",
-                    "",
-                    "IN THE MATTER OF:",
-                    "Petitioner(s)   : [Name]",
-                    "Versus",
-                    "Respondent(s)   : [Name]",
-                    "",
-                    "TO",
-                    "THE HON'BLE THE CHIEF JUSTICE OF INDIA",
-                    "AND HIS COMPANION JUSTICES OF THE HON'BLE SUPREME COURT",
-                    "",
-                    "HUMBLE PETITION OF THE PETITIONER(S) ABOVENAMED",
-                    "",
-                    "MOST RESPECTFULLY SHEWETH:",
-                    "",
-                    "1. BRIEF FACTS:",
-                    facts,
-                    "",
-                    "2. GROUNDS:",
-                    "A. Violation of Fundamental Rights under Articles 14, 19 and 21 of the Constitution.",
-                    "B. Arbitrary and unreasonable exercise of power.",
-                    "C. Error apparent on the face of the record.",
-                    "",
-                    "3. PRAYER:",
-                    "In view of the aforesaid facts and circumstances, it is most respectfully prayed that this Hon'ble Court may be pleased to:",
-                    "a) Issue a writ of certiorari/mandamus/prohibition or any other appropriate writ;",
-                    "b) Grant interim relief as deemed fit;",
-                    "c) Pass any other order(s) as this Hon'ble Court may deem fit in the interest of justice.",
-                    "",
-                    f"PLACE: New Delhi",
-                    f"DATE: {datetime.now().strftime('%d %B, %Y')}",
-                    "",
-                    "COUNSEL FOR THE PETITIONER(S)",
-                    "[Signature]"
-                ]
-            },
-            "SLP": {
-                "structure": [
-                    "IN THE SUPREME COURT OF INDIA",
-                    "SPECIAL LEAVE PETITION (CIVIL) NO. ___ OF 2024",
-                    "",
-                    "UNDER ARTICLE 136 OF THE CONSTITUTION OF INDIA",
-                    "",
-                    "IN THE MATTER OF:",
-                    "Petitioner(s)   : [Name]",
-                    "Versus",
-                    "Respondent(s)   : [Name]",
-                    "",
-                    "PETITION FOR SPECIAL LEAVE TO APPEAL",
-                    "",
-                    "The humble petition of the Petitioner(s) above named:",
-                    "",
-                    "1. The Petitioner seeks Special Leave to Appeal against the judgment dated [...] passed by [...].",
-                    "",
-                    "2. FACTS IN BRIEF:",
-                    facts,
-                    "",
-                    "3. SUBSTANTIAL QUESTIONS OF LAW:",
-                    "A. Whether the impugned judgment suffers from error apparent on the face of the record?",
-                    "B. Whether substantial questions of law of general importance arise for consideration?",
-                    "",
-                    "4. GROUNDS FOR SEEKING SPECIAL LEAVE:",
-                    "A. The judgment under appeal is contrary to established principles of law.",
-                    "B. Different High Courts have taken divergent views on the same issue.",
-                    "C. The matter involves substantial questions of law of public importance.",
-                    "",
-                    "PRAYER:",
-                    "In the premises, it is most respectfully prayed that this Hon'ble Court may be pleased to:",
-                    "a) Grant Special Leave to Appeal;",
-                    "b) Condone the delay, if any;",
-                    "c) Pass such other order(s) as this Hon'ble Court may deem fit.",
-                    "",
-                    f"PLACE: New Delhi",
-                    f"DATE: {datetime.now().strftime('%d %B, %Y')}",
-                    "",
-                    "ADVOCATE FOR THE PETITIONER(S)",
-                    "[Signature]"
-                ]
-            }
-        }
+        next_date = result.get('next_date') or case['next_hearing_date']
+        try:
+            date.fromisoformat(next_date)
+        except (TypeError, ValueError):
+            next_date = case['next_hearing_date']
         
-        template = templates.get(doc_type, templates["Writ Petition"])
-        return "\n".join(template["structure"])
-
-# ============================================
-# SESSION STATE INITIALIZATION
-# ============================================
-
-if 'db' not in st.session_state:
-    st.session_state.db = LawyerDatabase()
-
-if 'logged_in' not in st.session_state:
-    st.session_state.logged_in = False
-
-if 'current_user' not in st.session_state:
-    st.session_state.current_user = None
+        if (status, next_date) == (case['status'], case['next_hearing_date']):
+            return None
+        return status, next_date
+    
+    def sync_batch(self, cases):
+        """Look up and apply one batch; returns (updated, errors)"""
+        results = self.client.fetch_many([(case['diary_no'], case['year']) for case in cases])
+        
+        updates = []
+        responses = []
+        errors = 0
+        for case in cases:
+            result = results[(case['diary_no'], case['year'])]
+            if isinstance(result, Exception):
+                errors += 1
+                continue
+            if not result.get('found'):
+                continue
+            responses.append((case['diary_no'], case['year'], result))
+            changes = self._changes(case, result)
+            if changes:
+                updates.append((case['id'], *changes))
+        
+        self.db.record_status_snapshots(responses)
+        self.db.update_case_statuses(updates, hearing_purpose='Listed by registry')
+        return len(updates), errors
+    
+    def run_once(self, progress=None):
+        """Sync every active case, resuming from the stored watermark"""
+        with self._lock, timed('court_sync'):
+            state = self.db.get_sync_state(self.NAME)
+            if state and state['last_key']:
+                after = state['last_key']
+                checked, updated, errors = state['checked'], state['updated'], state['errors']
+            else:
+                after = checked = updated = errors = 0
+                self.db.save_sync_state(
+                    self.NAME, last_key=0, checked=0, updated=0, errors=0,
+                    started_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'), finished_at=None
+                )
+            
+            while True:
+                if self._stop.is_set():
+                    # Leave last_key in place so the next run resumes here
+                    return self.db.get_sync_state(self.NAME)
+                
+                cases = self.db.get_active_cases_after(after, self.batch_size)
+                if not cases:
+                    break
+                
+                batch_updated, batch_errors = self.sync_batch(cases)
+                after = cases[-1]['id']
+                checked += len(cases)
+                updated += batch_updated
+                errors += batch_errors
+                self.db.save_sync_state(self.NAME, last_key=after, checked=checked,
+                                        updated=updated, errors=errors)
+                if progress:
+                    progress(checked, updated)
+            
+            self.db.save_sync_state(self.NAME, last_key=0,
+                                    finished_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            return self.db.get_sync_state(self.NAME)
+    
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+                self.last_error = None
+            except Exception as exc:
+                self.last_error = (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), f"{type(exc).__name__}: {exc}")
+            self._stop.wait(self.interval)
+    
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="court-sync", daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+    
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+    
+    @property
+    def busy(self):
+        return self._lock.locked()
 
-if 'current_case' not in st.session_state:
-    st.session_state.current_case = None
+@st.cache_resource
+def get_court_sync_worker():
+    """Process-wide sync worker, or None when no registry is configured.
+    
+    The schedule only starts against a real registry (SCI_REGISTRY_URL), so
+    the local stub never overwrites case data.
+    """
+    if registry_source() is None:
+        return None
+    worker = CourtSyncWorker(
+        get_database(), get_registry_client(),
+        interval=float(os.environ.get('SCI_SYNC_INTERVAL', 3600))
+    )
+    if registry_source() == 'live':
+        worker.start()
+    return worker
 
 # ============================================
 # HELPER FUNCTIONS
 # ============================================
 
+def format_hearing_time(value):
+    """'14:30' -> '02:30 PM'; hearings without a time read 'Time TBC'"""
+    if not value:
+        return "Time TBC"
+    return datetime.strptime(value[:5], '%H:%M').strftime('%I:%M %p')
+
+def notify_status_changes(user_id):
+    """Toast registry changes recorded since this session last looked"""
+    changes = st.session_state.db.get_status_changes(
+        user_id, after_id=st.session_state.get('last_change_id', 0), limit=20
+    )
+    if changes and 'last_change_id' in st.session_state:
+        for change in reversed(changes):
+            st.toast(f"{change['diary_no']}/{change['year']}: {change['field'].replace('_', ' ')} "
+                     f"changed to {change['new_value'] or '—'}")
+    if changes:
+        st.session_state.last_change_id = changes[0]['id']
+    elif 'last_change_id' not in st.session_state:
+        st.session_state.last_change_id = 0
+
 def fetch_supreme_court_status(diary_no, year):
-    """Mock function to fetch case status from Supreme Court"""
-    # In production, this would connect to real API
-    time.sleep(1)  # Simulate API delay
+    """Fetch case status from the Supreme Court registry"""
+    if not (diary_no and year):
+        return {"found": False}
     
-    # Mock response based on input
-    if diary_no and year:
-        return {
-            "found": True,
-            "diary_no": diary_no,
-            "year": year,
-            "status": "Listed",
-            "next_date": "2024-12-15",
-            "bench": "Hon'ble Chief Justice",
-            "stage": "Final Hearing",
-            "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "documents": ["Petition", "Counter Affidavit", "Rejoinder"],
-            "remarks": "Case is ready for final hearing"
-        }
-    return {"found": False}
-
-def calculate_case_metrics(cases):
-    """Calculate metrics from cases data"""
-    total_cases = len(cases)
-    active_cases = len([c for c in cases if c['status'] in ['Filed', 'Pending', 'Listed']])
-    disposed_cases = len([c for c in cases if c['status'] == 'Disposed'])
-    hearings_today = len([c for c in cases if c.get('next_hearing_date') == datetime.now().strftime('%Y-%m-%d')])
-    
-    return {
-        'total': total_cases,
-        'active': active_cases,
-        'disposed': disposed_cases,
-        'hearings_today': hearings_today,
-        'pending_ratio': active_cases / total_cases if total_cases > 0 else 0
-    }
+    try:
+        return get_registry_cache().get(diary_no, year)
+    except RegistryError as exc:
+        return {"found": False, "error": str(exc)}
 
 # ============================================
 # PAGE FUNCTIONS
@@ -767,11 +4232,15 @@ def show_dashboard():
     
     # Get user cases
     cases = st.session_state.db.get_user_cases(st.session_state.current_user['id'])
-    metrics = calculate_case_metrics(cases)
+    metrics = st.session_state.db.get_case_metrics(st.session_state.current_user['id'])
     
     # Metrics Row
     st.markdown('<div class="section-header">Dashboard Overview</div>', unsafe_allow_html=True)
     
+    sync_state = st.session_state.db.get_sync_state(CourtSyncWorker.NAME)
+    if sync_state and sync_state['finished_at']:
+        st.caption(f"🔄 Registry statuses last synced {sync_state['finished_at']}")
+    
     col1, col2, col3, col4 = st.columns(4)
     with col1:
         st.markdown(f'''
@@ -816,11 +4285,11 @@ def show_dashboard():
     
     with col1:
         st.subheader("Case Status Distribution")
-        if cases:
-            status_counts = pd.Series([c['status'] for c in cases]).value_counts()
+        if metrics['status_counts']:
+            status_counts = metrics['status_counts']
             fig = px.pie(
-                values=status_counts.values,
-                names=status_counts.index,
+                values=list(status_counts.values()),
+                names=list(status_counts.keys()),
                 hole=0.3,
                 color_discrete_sequence=px.colors.sequential.RdBu
             )
@@ -831,24 +4300,52 @@ def show_dashboard():
     with col2:
         st.subheader("Monthly Case Trend")
         if cases:
-            # Create mock monthly data for visualization
-            months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 
-                     'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-            monthly_cases = np.random.randint(1, 10, size=12)
-            
-            fig = go.Figure(data=go.Scatter(
-                x=months,
-                y=monthly_cases,
-                mode='lines+markers',
-                line=dict(color='#3498db', width=3),
-                marker=dict(size=8)
-            ))
+            trend = st.session_state.db.get_monthly_trend(st.session_state.current_user['id'])
+            months = [point['label'] for point in trend]
+            
+            fig = go.Figure()
+            for field, name, color in [('filings', 'Filed', '#3498db'),
+                                       ('disposals', 'Disposed', '#27ae60'),
+                                       ('hearings', 'Hearings', '#e67e22')]:
+                fig.add_trace(go.Scatter(
+                    x=months,
+                    y=[point[field] for point in trend],
+                    name=name,
+                    mode='lines+markers',
+                    line=dict(color=color, width=3),
+                    marker=dict(size=8)
+                ))
             fig.update_layout(
                 plot_bgcolor='white',
                 yaxis_title="Number of Cases"
             )
             st.plotly_chart(fig, use_container_width=True)
     
+    # Registry Changes
+    st.markdown('<div class="section-header">What Changed Today</div>', unsafe_allow_html=True)
+    
+    changes = st.session_state.db.get_status_changes(st.session_state.current_user['id'])
+    if changes:
+        by_case = {}
+        for change in changes:
+            by_case.setdefault(change['case_id'], []).append(change)
+        for case_changes in by_case.values():
+            first = case_changes[0]
+            lines = ''.join(
+                f"<p style=\"margin: 0.25rem 0;\"><b>{change['field'].replace('_', ' ').title()}:</b> "
+                f"{change['old_value'] or '—'} → {change['new_value'] or '—'}</p>"
+                for change in reversed(case_changes)
+            )
+            st.markdown(f'''
+            <div class="case-card">
+                <h4 style="margin: 0; color: #2c3e50;">{first['case_title']}</h4>
+                <p style="margin: 0.25rem 0; color: #7f8c8d;">{first['diary_no']}/{first['year']}</p>
+                {lines}
+            </div>
+            ''', unsafe_allow_html=True)
+    else:
+        st.info("No registry changes recorded today.")
+    
     # Recent Cases
     st.markdown('<div class="section-header">Recent Cases</div>', unsafe_allow_html=True)
     
@@ -897,7 +4394,7 @@ def show_dashboard():
                     </span>
                 </div>
                 <p style="margin: 0.5rem 0;">
-                    <b>Date:</b> {hearing['hearing_date']} • 
+                    <b>Date:</b> {hearing['hearing_date']} {format_hearing_time(hearing['hearing_time'])} • 
                     <b>Purpose:</b> {hearing['purpose']}
                 </p>
                 <p style="margin: 0;"><b>Petitioner:</b> {hearing['petitioner']}</p>
@@ -910,7 +4407,9 @@ def show_case_management():
     """Case management page"""
     st.markdown('<div class="section-header">Case Management</div>', unsafe_allow_html=True)
     
-    tab1, tab2, tab3 = st.tabs(["Add Case", "View Cases", "Search & Filter"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(
+        ["Add Case", "View Cases", "Search & Filter", "Bulk Import", "Docket Export"]
+    )
     
     with tab1:
         with st.form("add_case_form", clear_on_submit=True):
@@ -976,7 +4475,18 @@ def show_case_management():
     with tab2:
         st.subheader("Your Cases")
         
-        cases = st.session_state.db.get_user_cases(st.session_state.current_user['id'])
+        user_id = st.session_state.current_user['id']
+        page_size = st.selectbox("Cases per page", [10, 25, 50, 100], index=1, key="cases_page_size")
+        
+        # Stack of keyset cursors, one per page visited so far
+        if st.session_state.get('cases_page_key') != (user_id, page_size):
+            st.session_state.cases_page_key = (user_id, page_size)
+            st.session_state.cases_page_cursors = [None]
+        page_cursors = st.session_state.cases_page_cursors
+        
+        cases, next_cursor = st.session_state.db.get_user_cases_page(
+            user_id, page_size, page_cursors[-1]
+        )
         
         if cases:
             # Create DataFrame for display
@@ -984,6 +4494,25 @@ def show_case_management():
             display_cols = ['diary_no', 'year', 'case_title', 'petitioner', 'status', 'next_hearing_date']
             st.dataframe(df[display_cols], use_container_width=True)
             
+            total_cases = st.session_state.db.get_case_metrics(user_id)['total']
+            total_pages = max(1, -(-total_cases // page_size))
+            
+            col_prev, col_page, col_next = st.columns([1, 2, 1])
+            with col_prev:
+                if st.button("◀ Previous", disabled=len(page_cursors) == 1, key="cases_prev_page"):
+                    page_cursors.pop()
+                    st.rerun()
+            with col_page:
+                st.markdown(
+                    f"<p style='text-align: center;'>Page {len(page_cursors)} of {total_pages} "
+                    f"• {total_cases} cases</p>",
+                    unsafe_allow_html=True
+                )
+            with col_next:
+                if st.button("Next ▶", disabled=next_cursor is None, key="cases_next_page"):
+                    page_cursors.append(next_cursor)
+                    st.rerun()
+            
             # Case details expander
             st.subheader("Case Details")
             case_options = [f"{c['diary_no']}/{c['year']} - {c['case_title']}" for c in cases]
@@ -1022,13 +4551,17 @@ def show_case_management():
                     col_a, col_b, col_c = st.columns(3)
                     with col_a:
                         if st.button("Generate Case Summary PDF"):
-                            pdf_path = PDFGenerator.generate_case_summary_pdf(selected_case_data)
-                            with open(pdf_path, "rb") as f:
-                                st.download_button(
-                                    "Download PDF",
-                                    f,
-                                    file_name=f"case_{selected_case_data['diary_no']}_{selected_case_data['year']}.pdf"
-                                )
+                            case_details = st.session_state.db.get_case_details(selected_case_data['id'])
+                            pdf_bytes = get_pdf_cache().get_or_render(
+                                'case_summary', PDFGenerator.case_summary_data(case_details),
+                                PDFGenerator.generate_case_summary_pdf
+                            )
+                            st.download_button(
+                                "Download PDF",
+                                pdf_bytes,
+                                file_name=f"case_{selected_case_data['diary_no']}_{selected_case_data['year']}.pdf",
+                                mime="application/pdf"
+                            )
                     
                     with col_b:
                         if st.button("Update Status"):
@@ -1068,31 +4601,126 @@ def show_case_management():
     with tab3:
         st.subheader("Search & Filter Cases")
         
-        search_term = st.text_input("Search by Diary No, Title, or Petitioner")
+        search_term = st.text_input("Search by Diary No, Title, Parties, Notes or Hearings")
         status_filter = st.multiselect("Filter by Status", 
                                       ["Filed", "Pending", "Listed", "Disposed", "Adjourned"])
         
-        cases = st.session_state.db.get_user_cases(st.session_state.current_user['id'])
-        
-        if search_term:
-            cases = [c for c in cases if 
-                    search_term.lower() in str(c['diary_no']).lower() or
-                    search_term.lower() in str(c['case_title']).lower() or
-                    search_term.lower() in str(c['petitioner']).lower()]
-        
-        if status_filter:
-            cases = [c for c in cases if c['status'] in status_filter]
+        search_limit = 50
+        cases = st.session_state.db.search_cases(
+            st.session_state.current_user['id'],
+            search_term,
+            statuses=status_filter,
+            limit=search_limit
+        )
         
         if cases:
-            st.write(f"Found {len(cases)} cases")
+            if len(cases) == search_limit:
+                st.write(f"Showing the top {search_limit} matches")
+            else:
+                st.write(f"Found {len(cases)} cases")
             
             for case in cases:
                 with st.expander(f"{case['diary_no']}/{case['year']} - {case['case_title']}"):
+                    if case['snippet']:
+                        st.markdown(case['snippet'])
                     st.write(f"*Status:* {case['status']}")
                     st.write(f"*Petitioner:* {case['petitioner']}")
                     st.write(f"*Next Hearing:* {case['next_hearing_date'] or 'Not scheduled'}")
         else:
             st.info("No cases match your search criteria.")
+    
+    with tab4:
+        st.subheader("Bulk Import Cases")
+        st.caption(
+            "Upload a CSV or Excel file with a header row. Required columns: "
+            "diary_no, year, case_title, petitioner. Optional: respondent, case_type, "
+            "court_name, judge_name, status, filing_date, next_hearing_date, "
+            "description, lawyer_notes. Existing diary numbers are updated."
+        )
+        
+        upload = st.file_uploader("Case file", type=["csv", "xlsx"], key="case_import_file")
+        
+        if upload and st.button("Import Cases", type="primary"):
+            progress_text = st.empty()
+            importer = CaseImporter(st.session_state.db)
+            
+            try:
+                report = importer.import_file(
+                    st.session_state.current_user['id'],
+                    upload,
+                    upload.name,
+                    progress=lambda rows: progress_text.write(f"Processed {rows:,} rows...")
+                )
+            except ValueError as exc:
+                st.error(f"Import failed: {exc}")
+            else:
+                progress_text.empty()
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Rows Read", f"{report['rows']:,}")
+                col2.metric("Inserted", f"{report['inserted']:,}")
+                col3.metric("Updated", f"{report['updated']:,}")
+                col4.metric("Failed", f"{report['failed']:,}")
+                st.success(
+                    f"Imported in {report['elapsed']:.1f}s "
+                    f"({report['rows_per_sec']:,.0f} rows/sec)"
+                )
+                
+                if report['errors']:
+                    st.warning(f"{report['failed']:,} rows were skipped")
+                    st.dataframe(pd.DataFrame(report['errors']), use_container_width=True)
+    
+    with tab5:
+        st.subheader("Export Case Summaries")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            export_statuses = st.multiselect(
+                "Status", ["Filed", "Pending", "Listed", "Disposed", "Adjourned"],
+                default=["Listed"], key="export_statuses"
+            )
+            range_mode = st.radio("Hearings", ["Any date", "Hearing week", "Date range"],
+                                  horizontal=True, key="export_range_mode")
+        with col2:
+            export_start = export_end = None
+            if range_mode == "Hearing week":
+                week_of = st.date_input("Week of", value=datetime.now(), key="export_week")
+                export_start = week_of - timedelta(days=week_of.weekday())
+                export_end = export_start + timedelta(days=7)
+            elif range_mode == "Date range":
+                export_start = st.date_input("From", value=datetime.now(), key="export_from")
+                export_end = st.date_input("To", value=datetime.now() + timedelta(days=6),
+                                           key="export_to") + timedelta(days=1)
+            export_format = st.radio("Format", ["ZIP (one PDF per case)", "Single merged PDF"],
+                                     key="export_format")
+        
+        if st.button("Export Summaries", type="primary"):
+            progress_bar = st.progress(0.0)
+            exporter = BatchPDFExporter(st.session_state.db, cache=get_pdf_cache())
+            fmt = 'pdf' if export_format.startswith("Single") else 'zip'
+            
+            started = time.perf_counter()
+            data, count = exporter.export(
+                st.session_state.current_user['id'],
+                statuses=export_statuses,
+                start=export_start.isoformat() if export_start else None,
+                end=export_end.isoformat() if export_end else None,
+                fmt=fmt,
+                progress=lambda done, total: progress_bar.progress(done / total)
+            )
+            elapsed = time.perf_counter() - started
+            
+            if count:
+                st.success(f"Rendered {count} case summaries in {elapsed:.1f}s "
+                           f"({count / elapsed:,.1f} docs/sec)")
+                st.download_button(
+                    "Download Export",
+                    data,
+                    file_name=f"docket_{datetime.now().strftime('%Y%m%d')}.{fmt}",
+                    mime="application/pdf" if fmt == 'pdf' else "application/zip"
+                )
+            else:
+                progress_bar.empty()
+                st.info("No cases match the selected filters.")
 
 def show_ai_drafting():
     """AI Drafting Assistant page"""
@@ -1104,8 +4732,7 @@ def show_ai_drafting():
         # Document Type Selection
         doc_type = st.selectbox(
             "Select Document Type",
-            ["Writ Petition", "SLP (Special Leave Petition)", "Affidavit", 
-             "Reply", "IA (Interim Application)", "Written Submissions"]
+            get_template_registry().document_types
         )
         
         # Case Facts Input
@@ -1133,9 +4760,7 @@ The petitioner is a 45-year-old businessperson from Mumbai. On January 15, 2024,
         # Generate Draft Button
         if st.button("Generate Draft", type="primary", use_container_width=True):
             if facts:
-                with st.spinner("Generating draft... This may take a few seconds."):
-                    time.sleep(2)  # Simulate AI processing
-                    
+                with st.spinner("Generating draft..."):
                     draft = AI_Drafting_Assistant.generate_draft_from_facts(facts, doc_type)
                     st.session_state.generated_draft = draft
                     st.session_state.draft_facts = facts
@@ -1192,14 +4817,15 @@ The petitioner is a 45-year-old businessperson from Mumbai. On January 15, 2024,
                     'respondent': '[Respondent Name]'
                 }
                 
-                pdf_path = PDFGenerator.generate_legal_draft_pdf(draft_data)
-                with open(pdf_path, "rb") as f:
-                    st.download_button(
-                        "Download PDF",
-                        f,
-                        file_name=f"legal_draft_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
-                        mime="application/pdf"
-                    )
+                pdf_bytes = get_pdf_cache().get_or_render(
+                    'legal_draft', draft_data, PDFGenerator.generate_legal_draft_pdf
+                )
+                st.download_button(
+                    "Download PDF",
+                    pdf_bytes,
+                    file_name=f"legal_draft_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+                    mime="application/pdf"
+                )
         
         with col3:
             if st.button("✏️ Edit Draft", use_container_width=True):
@@ -1254,22 +4880,78 @@ def show_court_sync():
             if st.button("🔍 Fetch Case Status", type="primary", use_container_width=True):
                 if diary_no and year:
                     with st.spinner("Connecting to Supreme Court Registry..."):
-                        # Simulate API call
-                        progress_bar = st.progress(0)
-                        for i in range(100):
-                            time.sleep(0.01)
-                            progress_bar.progress(i + 1)
-                        
                         status = fetch_supreme_court_status(diary_no, year)
                         st.session_state.court_status = status
                         
                         if status['found']:
                             st.success("✅ Connection successful! Case found in registry.")
+                        elif status.get('error'):
+                            st.error(f"❌ Registry unavailable: {status['error']}")
                         else:
                             st.error("❌ Case not found in registry.")
                 else:
                     st.error("Please enter Diary Number and Year")
         
+        # Bulk Sync Panel
+        with st.expander("🔄 Sync All Active Cases"):
+            worker = get_court_sync_worker()
+            sync_state = st.session_state.db.get_sync_state(CourtSyncWorker.NAME)
+            
+            if sync_state:
+                col_a, col_b, col_c = st.columns(3)
+                col_a.metric("Cases Checked", sync_state['checked'])
+                col_b.metric("Cases Updated", sync_state['updated'])
+                col_c.metric("Lookup Errors", sync_state['errors'])
+                if sync_state['finished_at']:
+                    st.caption(f"Last completed: {sync_state['finished_at']}")
+                elif sync_state['last_key']:
+                    st.caption(f"Run in progress since {sync_state['started_at']}")
+            
+            if worker and worker.last_error:
+                failed_at, message = worker.last_error
+                st.warning(f"Scheduled sync failed at {failed_at}: {message}")
+            if registry_source() == 'live':
+                st.caption(f"Scheduled every {int(worker.interval // 60)} minutes")
+            else:
+                st.caption("Set SCI_REGISTRY_URL to sync against the live registry.")
+            
+            if st.button("Sync Now", disabled=registry_source() != 'live' or worker.busy):
+                progress_text = st.empty()
+                worker.run_once(
+                    progress=lambda checked, updated: progress_text.write(
+                        f"Checked {checked} cases, {updated} updated"
+                    )
+                )
+                st.success("Sync complete")
+                st.rerun()
+        
+        # Cause List Panel
+        with st.expander("📥 Import Daily Cause List"):
+            st.caption("Text, HTML or PDF cause list. Every listed diary number that matches "
+                       "a case in the portal becomes a hearing on the listing date.")
+            
+            col_a, col_b = st.columns([2, 1])
+            with col_a:
+                cause_list = st.file_uploader("Cause list", type=["txt", "html", "htm", "pdf"],
+                                              key="cause_list_file")
+            with col_b:
+                listing_date = st.date_input("Listing Date", value=date.today(), key="cause_list_date")
+            
+            if cause_list and st.button("Import Cause List", type="primary"):
+                with st.spinner("Matching cause list against cases..."):
+                    try:
+                        report = CauseListIngester(st.session_state.db).ingest(
+                            cause_list, cause_list.name, listing_date.isoformat()
+                        )
+                    except ValueError as exc:
+                        st.error(str(exc))
+                    else:
+                        col_a, col_b, col_c = st.columns(3)
+                        col_a.metric("Listed Items", f"{report['items']:,}")
+                        col_b.metric("Matched Cases", f"{report['matched']:,}")
+                        col_c.metric("Hearings Added", f"{report['inserted']:,}")
+                        st.caption(f"Processed in {report['elapsed']:.2f}s")
+        
         # Display Status
         if 'court_status' in st.session_state:
             status = st.session_state.court_status
@@ -1327,8 +5009,8 @@ def show_court_sync():
                 
                 col1, col2, col3 = st.columns(3)
                 with col1:
-                    if st.button("📥 Download Cause List", use_container_width=True):
-                        st.info("Cause list download feature coming soon!")
+                    st.link_button("📥 Download Cause List", "https://main.sci.gov.in/causelist",
+                                   use_container_width=True)
                 
                 with col2:
                     if st.button("📧 Request Certified Copy", use_container_width=True):
@@ -1345,15 +5027,27 @@ def show_court_sync():
         # API Status Panel
         st.subheader("API Status")
         
-        st.markdown(f'''
-        <div class="card">
-            <h4 style="margin-top: 0;">Supreme Court Live API</h4>
-            <p style="color: #27ae60; font-weight: bold;">✅ Connected</p>
-            <p><b>Response Time:</b> 1.2s</p>
-            <p><b>Last Sync:</b> {datetime.now().strftime("%H:%M:%S")}</p>
-            <p><b>API Version:</b> 2.1.4</p>
-        </div>
-        ''', unsafe_allow_html=True)
+        fetch_stats = next(
+            (row for row in get_metrics_store().summary() if row['stage'] == 'registry_fetch'), None
+        )
+        response_time = f"{fetch_stats['p50_ms']:.0f} ms (p95 {fetch_stats['p95_ms']:.0f} ms)" if fetch_stats else "—"
+        source = {'live': "Live registry", 'stub': "Local stub"}.get(registry_source())
+        
+        if source is None:
+            st.error("❌ No registry configured. Set SCI_REGISTRY_URL, or SCI_REGISTRY_STUB=1 "
+                     "for the local stub.")
+        else:
+            registry_stats = get_registry_cache().stats()
+            st.markdown(f'''
+            <div class="card">
+                <h4 style="margin-top: 0;">Supreme Court Live API</h4>
+                <p style="color: #27ae60; font-weight: bold;">✅ {source}</p>
+                <p><b>Response Time:</b> {response_time}</p>
+                <p><b>Cache Hit Rate:</b> {registry_stats['hit_rate']:.0%}</p>
+                <p><b>Hits / Stale / Misses:</b> {registry_stats['hits']} / {registry_stats['stale']} / {registry_stats['misses']}</p>
+                <p><b>Cached Responses:</b> {registry_stats['entries']}</p>
+            </div>
+            ''', unsafe_allow_html=True)
         
         # Quick Stats
         st.subheader("Quick Stats")
@@ -1382,35 +5076,59 @@ def show_calendar():
         current_date = datetime.now()
         selected_month = st.selectbox(
             "Select Month",
-            options=[
-                "January", "February", "March", "April", "May", "June",
-                "July", "August", "September", "October", "November", "December"
-            ],
+            options=list(range(1, 13)),
+            format_func=lambda month: calendar.month_name[month],
             index=current_date.month - 1
         )
         
         selected_year = st.number_input("Year", min_value=2020, max_value=2030, value=current_date.year)
+        month_label = f"{calendar.month_name[selected_month]} {selected_year}"
         
-        # Generate calendar (simplified view)
-        st.subheader(f"Hearings for {selected_month} {selected_year}")
+        st.subheader(f"Hearings for {month_label}")
+        
+        # One range query covers the whole grid, spill-over days included
+        weeks = st.session_state.db.get_month_calendar(
+            st.session_state.current_user['id'], int(selected_year), selected_month
+        )
+        today = date.today()
         
-        # Get hearings for selected period
-        hearings = st.session_state.db.get_upcoming_hearings(st.session_state.current_user['id'], 365)
+        header = ''.join(
+            f'<th style="padding: 0.4rem; color: #7f8c8d;">{calendar.day_abbr[day]}</th>'
+            for day in calendar.Calendar().iterweekdays()
+        )
+        rows = ''
+        for week in weeks:
+            cells = ''
+            for cell in week:
+                count = len(cell['hearings'])
+                background = '#fff3cd' if cell['date'] == today else ('#eaf2f8' if count else 'white')
+                color = '#2c3e50' if cell['in_month'] else '#bdc3c7'
+                badge = (f'<div style="font-size: 0.75rem; color: #e74c3c; font-weight: bold;">'
+                         f'{count} hearing{"s" if count != 1 else ""}</div>') if count else ''
+                cells += (f'<td style="border: 1px solid #ecf0f1; padding: 0.4rem; height: 3.5rem; '
+                          f'vertical-align: top; background: {background}; color: {color};">'
+                          f'{cell["date"].day}{badge}</td>')
+            rows += f'<tr>{cells}</tr>'
+        st.markdown(f'''
+        <table style="width: 100%; border-collapse: collapse; table-layout: fixed;">
+            <tr>{header}</tr>
+            {rows}
+        </table>
+        ''', unsafe_allow_html=True)
         
-        # Filter for selected month/year
-        filtered_hearings = [
-            h for h in hearings 
-            if datetime.strptime(h['hearing_date'], '%Y-%m-%d').month == list([
-                "January", "February", "March", "April", "May", "June",
-                "July", "August", "September", "October", "November", "December"
-            ]).index(selected_month) + 1
-            and datetime.strptime(h['hearing_date'], '%Y-%m-%d').year == selected_year
+        month_hearings = [
+            (cell['date'], hearing)
+            for week in weeks for cell in week if cell['in_month']
+            for hearing in cell['hearings']
         ]
         
-        if filtered_hearings:
-            for hearing in filtered_hearings:
-                hearing_date = datetime.strptime(hearing['hearing_date'], '%Y-%m-%d')
-                days_until = (hearing_date - datetime.now()).days
+        if month_hearings:
+            for hearing_date, hearing in month_hearings:
+                days_until = (hearing_date - today).days
+                if days_until >= 0:
+                    remaining = f"{days_until} days remaining"
+                else:
+                    remaining = f"{-days_until} days ago"
                 
                 st.markdown(f'''
                 <div class="case-card">
@@ -1426,24 +5144,26 @@ def show_calendar():
                         </span>
                     </div>
                     <p style="margin: 0.5rem 0;">
-                        <b>Time:</b> 10:30 AM • 
-                        <b>Court:</b> {hearing.get('court', 'Supreme Court')}
+                        <b>Time:</b> {format_hearing_time(hearing['hearing_time'])} • 
+                        <b>Court:</b> {hearing['court_name'] or 'Supreme Court'}
+                        {f"• <b>Court Room:</b> {hearing['court_room']}" if hearing['court_room'] else ''}
                     </p>
                     <p style="margin: 0;"><b>Purpose:</b> {hearing['purpose']}</p>
-                    <p style="margin: 0.5rem 0; color: {'#e74c3c' if days_until <= 3 else '#f39c12'};">
-                        {days_until} days remaining
+                    <p style="margin: 0.5rem 0; color: {'#e74c3c' if 0 <= days_until <= 3 else '#f39c12'};">
+                        {remaining}
                     </p>
                 </div>
                 ''', unsafe_allow_html=True)
         else:
-            st.info(f"No hearings scheduled for {selected_month} {selected_year}")
+            st.info(f"No hearings scheduled for {month_label}")
     
     with col2:
         # Today's Hearings
         st.subheader("Today's Schedule")
         
-        today = datetime.now().strftime('%Y-%m-%d')
-        today_hearings = [h for h in hearings if h['hearing_date'] == today]
+        today_hearings = st.session_state.db.get_hearings_between(
+            st.session_state.current_user['id'], today, today + timedelta(days=1)
+        ).get(today.isoformat(), [])
         
         if today_hearings:
             for hearing in today_hearings:
@@ -1451,7 +5171,10 @@ def show_calendar():
                 <div style="background: #fff3cd; padding: 0.75rem; border-radius: 8px; margin-bottom: 0.5rem;">
                     <p style="margin: 0; font-weight: bold;">{hearing['case_title']}</p>
                     <p style="margin: 0; font-size: 0.9rem;">{hearing['purpose']}</p>
-                    <p style="margin: 0; font-size: 0.8rem; color: #856404;">10:30 AM</p>
+                    <p style="margin: 0; font-size: 0.8rem; color: #856404;">
+                        {format_hearing_time(hearing['hearing_time'])}
+                        {f"• Court {hearing['court_room']}" if hearing['court_room'] else ''}
+                    </p>
                 </div>
                 ''', unsafe_allow_html=True)
         else:
@@ -1462,20 +5185,85 @@ def show_calendar():
         
         with st.form("add_hearing_form"):
             case_options = st.session_state.db.get_user_cases(st.session_state.current_user['id'])
-            case_list = [f"{c['diary_no']}/{c['year']} - {c['case_title']}" for c in case_options]
             
-            selected_case = st.selectbox("Select Case", case_list)
+            selected_case = st.selectbox(
+                "Select Case", range(len(case_options)),
+                format_func=lambda i: f"{case_options[i]['diary_no']}/{case_options[i]['year']} - "
+                                      f"{case_options[i]['case_title']}"
+            )
             hearing_date = st.date_input("Hearing Date", min_value=datetime.now())
             hearing_time = st.time_input("Time", value=datetime.strptime("10:30", "%H:%M").time())
+            court_room = st.text_input("Court Room", placeholder="e.g., 3")
             purpose = st.text_input("Purpose")
             
+            repeat = st.selectbox("Repeat", ["Does not repeat", "Weekly", "Fortnightly", "Monthly"])
+            occurrences = st.number_input("Occurrences", min_value=1, max_value=52, value=4,
+                                          help="Number of hearings in a repeating series")
+            allow_conflicts = st.checkbox("Schedule even if it clashes with another hearing")
+            
             if st.form_submit_button("Add to Calendar", type="primary"):
-                st.success("Hearing added to calendar!")
+                if selected_case is None:
+                    st.error("Add a case before scheduling hearings")
+                else:
+                    case = case_options[selected_case]
+                    if repeat == "Does not repeat":
+                        dates = [hearing_date]
+                    else:
+                        dates = LawyerDatabase.hearing_series_dates(hearing_date, repeat.lower(), int(occurrences))
+                    slot = hearing_time.strftime('%H:%M')
+                    
+                    conflicts = st.session_state.db.find_hearing_conflicts(
+                        st.session_state.current_user['id'], dates, slot
+                    )
+                    if conflicts and not allow_conflicts:
+                        st.warning("This clashes with existing hearings:")
+                        for day, other in conflicts:
+                            st.write(f"• {day} {format_hearing_time(other['hearing_time'])} — {other['case_title']}")
+                    else:
+                        st.session_state.db.add_hearing_series(case['id'], {
+                            'hearing_time': slot,
+                            'court_room': court_room.strip() or None,
+                            'purpose': purpose or None
+                        }, dates)
+                        st.success(f"{len(dates)} hearing{'s' if len(dates) > 1 else ''} added to calendar!")
         
         # Export Calendar
         st.divider()
-        if st.button("📅 Export to Google Calendar", use_container_width=True):
-            st.info("Calendar export feature coming soon!")
+        feed = CalendarFeed(st.session_state.db)
+        feed_server = get_calendar_feed_server()
+        user_id = st.session_state.current_user['id']
+        etag, last_modified, version = feed.etag(user_id)
+        
+        if feed_server:
+            # Streamed by the feed server, which also answers conditional
+            # requests, rather than assembled in memory by this session
+            st.link_button("📅 Export to Google Calendar", feed_server.url(user_id),
+                           use_container_width=True)
+            st.caption("Or subscribe from Google Calendar (Other calendars → From URL) to keep it in sync:")
+            st.code(feed_server.url(user_id), language=None)
+        else:
+            exported_version = st.session_state.get('ics_exported_version')
+            changes_only = st.checkbox("Only changes since last export", value=False,
+                                       disabled=exported_version is None)
+            since = exported_version if changes_only else None
+            
+            def mark_exported():
+                st.session_state.ics_exported_version = version
+            
+            if since is not None and version <= since:
+                st.caption("Calendar unchanged since your last export.")
+            else:
+                # download_button needs the whole payload; CALENDAR_FEED_PORT streams it instead
+                st.download_button(
+                    "📅 Export to Google Calendar",
+                    data=lambda: b''.join(feed.iter_ics(user_id, since=since)),
+                    file_name="hearings-changes.ics" if since is not None else "hearings.ics",
+                    mime="text/calendar",
+                    on_click=mark_exported,
+                    use_container_width=True
+                )
+        if last_modified:
+            st.caption(f"Last change: {last_modified} UTC")
 
 def show_billing():
     """Billing and Invoices page"""
@@ -1486,82 +5274,355 @@ def show_billing():
     with tab1:
         st.subheader("Track Billable Hours")
         
+        ledger = get_time_ledger()
+        user_id = st.session_state.current_user['id']
+        case_options = st.session_state.db.get_user_cases(user_id)
+        
+        ledger_stats = ledger.stats()
+        if ledger_stats['last_error']:
+            st.warning(f"Saving time entries failed: {ledger_stats['last_error']}. "
+                       f"{ledger_stats['buffered']} entries are queued and will be retried.")
+        activities = ["Case Research", "Drafting", "Court Appearance",
+                      "Client Meeting", "Document Review", "Other"]
+        
+        if not case_options:
+            st.info("Add a case before recording time against it.")
+        
+        mode = st.radio("Mode", ["Manual Entry", "Timer"], horizontal=True)
+        
         col1, col2 = st.columns(2)
         with col1:
-            case_options = st.session_state.db.get_user_cases(st.session_state.current_user['id'])
-            case_list = [f"{c['diary_no']}/{c['year']} - {c['case_title']}" for c in case_options]
-            selected_case = st.selectbox("Select Case", case_list)
+            selected_case = st.selectbox(
+                "Select Case", range(len(case_options)),
+                format_func=lambda i: f"{case_options[i]['diary_no']}/{case_options[i]['year']} - "
+                                      f"{case_options[i]['case_title']}"
+            )
             
-            activity = st.selectbox("Activity", 
-                                  ["Case Research", "Drafting", "Court Appearance", 
-                                   "Client Meeting", "Document Review", "Other"])
+            activity = st.selectbox("Activity", activities)
             
-            hours = st.number_input("Hours", min_value=0.25, max_value=24.0, 
-                                   value=2.0, step=0.25)
+            if mode == "Manual Entry":
+                hours = st.number_input("Hours", min_value=0.25, max_value=24.0, 
+                                       value=2.0, step=0.25)
         
         with col2:
-            date = st.date_input("Date", value=datetime.now())
+            entry_date = st.date_input("Date", value=datetime.now())
             description = st.text_area("Description", height=100)
             rate = st.number_input("Hourly Rate (₹)", min_value=0, value=5000, step=500)
         
-        if st.button("Add Time Entry", type="primary"):
-            amount = hours * rate
-            st.success(f"Entry added: {hours} hours × ₹{rate}/hr = ₹{amount:,.2f}")
+        if mode == "Manual Entry":
+            if st.button("Add Time Entry", type="primary", disabled=selected_case is None):
+                entry = ledger.add(user_id, case_options[selected_case]['id'], hours, rate,
+                                   activity, description or None, entry_date)
+                st.success(f"Entry added: {entry['hours']} hours × ₹{rate}/hr = ₹{entry['amount']:,.2f}")
+        else:
+            timer = ledger.timer(user_id)
+            if timer is None:
+                if st.button("▶️ Start Timer", type="primary", disabled=selected_case is None):
+                    ledger.start_timer(user_id, case_options[selected_case]['id'], rate,
+                                       activity, description or None)
+                    st.rerun()
+            else:
+                @st.fragment(run_every=1)
+                def timer_display():
+                    # Redraws every second; the ledger only writes on checkpoints
+                    running = ledger.tick(user_id)
+                    if running is None:
+                        return
+                    elapsed = int(running['elapsed'])
+                    st.metric(f"⏱️ {running['activity'] or 'Timer'} running",
+                              f"{elapsed // 3600:02d}:{elapsed % 3600 // 60:02d}:{elapsed % 60:02d}")
+                
+                timer_display()
+                col_a, col_b = st.columns(2)
+                with col_a:
+                    if st.button("⏹️ Stop & Save", type="primary", use_container_width=True):
+                        entry = ledger.stop_timer(user_id, entry_date)
+                        st.success(f"Entry added: {entry['hours']} hours = ₹{entry['amount']:,.2f}")
+                with col_b:
+                    if st.button("Discard Timer", use_container_width=True):
+                        ledger.discard_timer(user_id)
+                        st.rerun()
+        
+        # Totals
+        st.markdown('<div class="section-header">Billable Time</div>', unsafe_allow_html=True)
+        
+        today = date.today()
+        month_start = today.replace(day=1)
+        year_start = today.replace(month=1, day=1)
+        totals = ledger.totals(user_id, year_start, today + timedelta(days=1))
+        this_month = next((row for row in totals['by_month'] if row['month'] == today.strftime('%Y-%m')), None)
+        
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Hours This Month", f"{(this_month or {}).get('hours') or 0:,.2f}")
+        col2.metric("Billed This Month", f"₹{(this_month or {}).get('amount') or 0:,.2f}")
+        col3.metric("Billed This Year", f"₹{sum(row['amount'] or 0 for row in totals['by_month']):,.2f}")
+        
+        if totals['by_month']:
+            col1, col2 = st.columns(2)
+            with col1:
+                fig = px.bar(pd.DataFrame(totals['by_month']), x='month', y='amount',
+                             labels={'month': 'Month', 'amount': 'Amount (₹)'},
+                             color_discrete_sequence=['#3498db'])
+                fig.update_layout(plot_bgcolor='white')
+                st.plotly_chart(fig, use_container_width=True)
+            with col2:
+                by_case = pd.DataFrame(totals['by_case'])
+                by_case['case'] = by_case['diary_no'] + '/' + by_case['year'].astype(str)
+                st.dataframe(
+                    by_case[['case', 'case_title', 'entries', 'hours', 'amount']].round(2),
+                    use_container_width=True, hide_index=True
+                )
+        
+        entries = ledger.recent(user_id, limit=20)
+        if entries:
+            st.subheader("Recent Entries")
+            st.dataframe(
+                pd.DataFrame(entries)[['billing_date', 'diary_no', 'case_title', 'activity',
+                                       'hours', 'rate_per_hour', 'amount', 'status']],
+                use_container_width=True, hide_index=True
+            )
     
     with tab2:
         st.subheader("Generate Invoice")
         
-        # Invoice form
-        with st.form("invoice_form"):
-            col1, col2 = st.columns(2)
+        user_id = st.session_state.current_user['id']
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            today = date.today()
+            invoice_month = st.selectbox(
+                "Billing Month", range(1, 13), index=today.month - 1,
+                format_func=lambda month: calendar.month_name[month]
+            )
+            invoice_year = st.number_input("Billing Year", min_value=2020, max_value=2030, value=today.year)
+        with col2:
+            tax_rate = st.number_input("GST Rate (%)", min_value=0.0, value=18.0, step=0.5)
+            due_days = st.number_input("Payment Terms (days)", min_value=0, value=30, step=15)
+        
+        ledger = get_time_ledger()
+        engine = InvoiceEngine(st.session_state.db, tax_rate=Decimal(str(tax_rate)), due_days=int(due_days),
+                               cache=get_pdf_cache(), ledger=ledger)
+        ledger.flush()
+        period_start, period_end = InvoiceEngine.month_range(int(invoice_year), invoice_month)
+        clients = st.session_state.db.get_unbilled_clients(user_id, period_start, period_end)
+        
+        with col3:
+            st.metric("Unbilled Clients", len(clients))
+            st.metric("Unbilled Hours", f"{sum(client['hours'] for client in clients):,.2f}")
+        
+        if clients:
+            st.dataframe(pd.DataFrame(clients).round(2), use_container_width=True, hide_index=True)
             
+            col1, col2 = st.columns(2)
             with col1:
-                client_name = st.text_input("Client Name")
-                client_address = st.text_area("Client Address", height=80)
-                invoice_date = st.date_input("Invoice Date", value=datetime.now())
-                due_date = st.date_input("Due Date", value=datetime.now() + timedelta(days=30))
-            
+                client_name = st.selectbox("Client", [client['client_name'] for client in clients])
+                if st.button("Generate Invoice PDF", type="primary", use_container_width=True):
+                    invoice_ids = engine.create(period_start, period_end, user_id=user_id,
+                                                client_name=client_name)
+                    if invoice_ids:
+                        st.session_state.last_invoice = (invoice_ids[0], engine.render(invoice_ids[0]))
+                        st.success("Invoice generated successfully!")
             with col2:
-                invoice_number = st.text_input("Invoice Number", 
-                                             value=f"INV-{datetime.now().strftime('%Y%m%d')}-001")
-                tax_rate = st.number_input("Tax Rate (%)", min_value=0.0, value=18.0, step=0.5)
-                payment_terms = st.text_input("Payment Terms", value="Net 30")
-            
-            # Line items
-            st.subheader("Line Items")
-            
-            line_items = []
-            for i in range(3):
-                col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
-                with col1:
-                    desc = st.text_input(f"Description {i+1}", key=f"desc_{i}")
-                with col2:
-                    qty = st.number_input(f"Qty {i+1}", min_value=1.0, value=1.0, key=f"qty_{i}")
-                with col3:
-                    rate = st.number_input(f"Rate {i+1}", min_value=0, value=5000, key=f"rate_{i}")
-                with col4:
-                    amount = qty * rate
-                    st.text_input(f"Amount {i+1}", value=f"₹{amount:,.2f}", disabled=True, key=f"amount_{i}")
-                
-                if desc:
-                    line_items.append({
-                        'description': desc,
-                        'quantity': qty,
-                        'rate': rate,
-                        'amount': amount
-                    })
-            
-            if st.form_submit_button("Generate Invoice PDF", type="primary"):
-                st.success("Invoice generated successfully!")
-                # Here you would generate the actual PDF
+                st.write("")
+                st.write("")
+                if st.button("Close Month (all clients)", use_container_width=True):
+                    progress = st.progress(0.0, text="Generating invoices...")
+                    data, count = engine.close_month(
+                        int(invoice_year), invoice_month, user_id=user_id,
+                        progress=lambda done, total: progress.progress(done / total, text=f"Rendered {done}/{total}")
+                    )
+                    progress.empty()
+                    if count:
+                        st.session_state.month_close_zip = (f"invoices_{invoice_year}_{invoice_month:02d}.zip", data)
+                        st.success(f"Generated {count} invoices")
+        else:
+            st.info(f"No unbilled time for {calendar.month_name[invoice_month]} {invoice_year}.")
+        
+        if 'last_invoice' in st.session_state:
+            invoice_id, pdf = st.session_state.last_invoice
+            st.download_button("📥 Download Invoice PDF", data=pdf, file_name=f"invoice_{invoice_id}.pdf",
+                               mime="application/pdf")
+        if 'month_close_zip' in st.session_state:
+            file_name, data = st.session_state.month_close_zip
+            st.download_button("📥 Download All Invoices (ZIP)", data=data, file_name=file_name,
+                               mime="application/zip")
+        
+        invoices = st.session_state.db.get_invoices(user_id, limit=20)
+        if invoices:
+            st.subheader("Recent Invoices")
+            st.dataframe(
+                pd.DataFrame(invoices)[['invoice_no', 'client_name', 'issued_date', 'due_date',
+                                        'subtotal', 'tax_amount', 'total', 'status']],
+                use_container_width=True, hide_index=True
+            )
     
     with tab3:
         st.subheader("Payment Records")
         
-        # Mock payment data
-        payments = [
-            {"date": "2024-01-15", "client": "ABC Corp", "amount": 125000, "status": "Paid"},
-            {"date": "2024-01-10", "client": 
+        user_id = st.session_state.current_user['id']
+        today = date.today()
+        periods = {
+            "This Month": (today.replace(day=1), today + timedelta(days=1)),
+            "This Year": (today.replace(month=1, day=1), today + timedelta(days=1)),
+            "Last 12 Months": (today - timedelta(days=365), today + timedelta(days=1)),
+            "All Time": ('0000-01-01', '9999-12-31'),
+        }
+        period = st.selectbox("Period", list(periods), index=1)
+        period_start, period_end = periods[period]
+        
+        get_time_ledger().flush()
+        report = get_billing_analytics().report(user_id, period_start, period_end, as_of=today)
+        totals, realisation = report['totals'], report['realisation']
+        
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Recorded", f"₹{totals['recorded']:,.0f}", f"{totals['hours']:,.1f} hours")
+        col2.metric("Billed", f"₹{totals['billed']:,.0f}", f"{realisation['billing']:.0%} of recorded")
+        col3.metric("Collected", f"₹{totals['collected']:,.0f}", f"{realisation['collection']:.0%} of billed")
+        col4.metric("Receivable", f"₹{totals['receivable']:,.0f}", f"₹{totals['unbilled']:,.0f} unbilled",
+                    delta_color="off")
+        
+        if totals['entries']:
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown("**Receivables Ageing**")
+                ageing = report['ageing']
+                fig = go.Figure(data=go.Bar(
+                    x=ageing['bucket'], y=ageing['amount'],
+                    marker_color=['#95a5a6', '#2ecc71', '#f1c40f', '#e67e22', '#e74c3c', '#c0392b']
+                ))
+                fig.update_layout(plot_bgcolor='white', yaxis_title="Amount (₹)")
+                st.plotly_chart(fig, use_container_width=True)
+            with col2:
+                st.markdown("**Hours by Activity**")
+                by_activity = report['by_activity']
+                fig = px.pie(by_activity, values='hours', names='activity', hole=0.4)
+                st.plotly_chart(fig, use_container_width=True)
+            
+            st.markdown("**Case Profitability**")
+            by_case = report['by_case'].head(25).copy()
+            labels = {
+                case['id']: f"{case['diary_no']}/{case['year']} - {case['case_title']}"
+                for case in st.session_state.db.get_user_cases(user_id)
+            }
+            by_case.insert(0, 'case', by_case['case_id'].map(labels))
+            st.dataframe(
+                by_case.drop(columns='case_id').round(2),
+                use_container_width=True, hide_index=True,
+                column_config={
+                    'realisation': st.column_config.ProgressColumn(
+                        "Realisation", min_value=0.0, max_value=1.0, format="%.2f"
+                    ),
+                    'share': st.column_config.ProgressColumn(
+                        "Share of Collections", min_value=0.0, max_value=1.0, format="%.2f"
+                    ),
+                }
+            )
+        else:
+            st.info(f"No time recorded for {period.lower()}.")
+        
+        st.markdown("**Record Payment**")
+        unpaid = [invoice for invoice in st.session_state.db.get_invoices(user_id, limit=200)
+                  if invoice['status'] != 'Paid']
+        if unpaid:
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                paid_ids = st.multiselect(
+                    "Invoices", [invoice['id'] for invoice in unpaid],
+                    format_func=lambda invoice_id: next(
+                        f"{invoice['invoice_no']} - {invoice['client_name']} (₹{invoice['total']}, "
+                        f"due {invoice['due_date']})"
+                        for invoice in unpaid if invoice['id'] == invoice_id
+                    )
+                )
+            with col2:
+                paid_date = st.date_input("Payment Date", value=today)
+            if st.button("Mark as Paid", type="primary", disabled=not paid_ids):
+                st.session_state.db.mark_invoices_paid(paid_ids, paid_date)
+                st.success(f"Recorded payment for {len(paid_ids)} invoice(s)")
+                st.rerun()
+        else:
+            st.info("No outstanding invoices.")
+
+def show_performance():
+    """Performance metrics page"""
+    st.markdown('<div class="section-header">📈 Performance</div>', unsafe_allow_html=True)
+    
+    db = st.session_state.db
+    
+    # Stage latency
+    st.subheader("Stage Latency")
+    summary = get_metrics_store().summary()
+    if summary:
+        df = pd.DataFrame(summary)
+        fig = go.Figure()
+        fig.add_trace(go.Bar(x=df['stage'], y=df['p50_ms'], name='p50', marker_color='#3498db'))
+        fig.add_trace(go.Bar(x=df['stage'], y=df['p95_ms'], name='p95', marker_color='#e67e22'))
+        fig.update_layout(barmode='group', plot_bgcolor='white', yaxis_title="Milliseconds")
+        st.plotly_chart(fig, use_container_width=True)
+        st.dataframe(df.round(2), use_container_width=True, hide_index=True)
+        
+        stage = st.selectbox("Recent samples", df['stage'].tolist())
+        samples = get_metrics_store().samples(stage)
+        fig = go.Figure(data=go.Scatter(
+            x=[at for at, _ in samples],
+            y=[ms for _, ms in samples],
+            mode='lines+markers',
+            line=dict(color='#3498db', width=2)
+        ))
+        fig.update_layout(plot_bgcolor='white', yaxis_title="Milliseconds")
+        st.plotly_chart(fig, use_container_width=True)
+    else:
+        st.info("No timings recorded yet.")
+    
+    # Caches and connection pool
+    st.subheader("Database & Caches")
+    pool_stats = db.pool_stats()
+    cache_stats = db.cache_stats()
+    pdf_stats = get_pdf_cache().stats()
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Connections", pool_stats['connections'], f"{pool_stats['reused']} reused")
+    col2.metric("Avg Query", f"{pool_stats['avg_query_ms']:.2f} ms", f"{pool_stats['queries']} queries")
+    col3.metric("Case Cache Hit Rate", f"{cache_stats['hit_rate']:.0%}",
+                f"{cache_stats['hits']} hits / {cache_stats['misses']} misses")
+    col4.metric("PDF Cache Hit Rate", f"{pdf_stats['hit_rate']:.0%}",
+                f"{pdf_stats['entries']} files, {pdf_stats['size_mb']:.1f} MB")
+    
+    # Query plans
+    st.subheader("Query Plans")
+    for check in db.check_query_plans():
+        icon = "✅" if check['ok'] else "⚠️"
+        with st.expander(f"{icon} {check['query']}"):
+            for step in check['plan']:
+                st.code(step)
+            if check['missing_indexes']:
+                st.warning(f"Missing indexes: {', '.join(check['missing_indexes'])}")
+    
+    # Benchmarks
+    st.subheader("Benchmarks")
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("Run PDF Render Benchmark", use_container_width=True):
+            with st.spinner("Rendering..."):
+                results = PDFGenerator.benchmark(iterations=20)
+            st.dataframe(pd.DataFrame(results).T.round(2), use_container_width=True)
+    with col2:
+        if st.button("Run Batch Export Benchmark", use_container_width=True):
+            with st.spinner("Rendering docket..."):
+                results = BatchPDFExporter.benchmark(n_cases=100)
+            st.dataframe(pd.DataFrame(results).round(2), use_container_width=True, hide_index=True)
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("Run Invoice Month-Close Benchmark", use_container_width=True):
+            with st.spinner("Rendering invoices..."):
+                results = InvoiceEngine.benchmark(n_invoices=1000)
+            st.dataframe(pd.DataFrame(results).round(2), use_container_width=True, hide_index=True)
+    with col2:
+        if st.button("Run Billing Analytics Benchmark", use_container_width=True):
+            with st.spinner("Analysing 1,000,000 billing entries..."):
+                results = BillingAnalytics.benchmark(n_rows=1_000_000)
+            st.dataframe(pd.DataFrame([results]).round(3), use_container_width=True, hide_index=True)
+
 # ============================================
 # SIDEBAR NAVIGATION
 # ============================================
@@ -1582,6 +5643,7 @@ def sidebar_navigation():
                 "Court Sync",
                 "Calendar",
                 "Billing",
+                "Performance",
                 "Settings"
             ]
         
@@ -1592,8 +5654,7 @@ def sidebar_navigation():
             
             # Quick Stats
             st.subheader("📊 Quick Stats")
-            cases = st.session_state.db.get_user_cases(st.session_state.current_user['id'])
-            metrics = calculate_case_metrics(cases)
+            metrics = st.session_state.db.get_case_metrics(st.session_state.current_user['id'])
             
             col1, col2 = st.columns(2)
             with col1:
@@ -1612,6 +5673,12 @@ def sidebar_navigation():
 def main():
     """Main application flow"""
     
+    # Serve calendar subscriptions when CALENDAR_FEED_PORT is set
+    get_calendar_feed_server()
+    
+    # Start the scheduled registry sync once per process
+    get_court_sync_worker()
+    
     # Get current page from sidebar
     current_page = sidebar_navigation()
     
@@ -1619,6 +5686,8 @@ def main():
     if not st.session_state.logged_in:
         show_login_page()
     else:
+        notify_status_changes(st.session_state.current_user['id'])
+        
         if current_page == "Dashboard":
             show_dashboard()
         elif current_page == "Case Management":
@@ -1631,9 +5700,11 @@ def main():
             show_calendar()
         elif current_page == "Billing":
             show_billing()
+        elif current_page == "Performance":
+            show_performance()
         elif current_page == "Settings":
             st.markdown('<div class="section-header">⚙️ Settings</div>', unsafe_allow_html=True)
             st.write("Settings page coming soon!")
             # Add settings functionality here
-if _name_ == "_main_":
+if __name__ == "__main__":
     main()
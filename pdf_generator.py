@@ -0,0 +1,263 @@
+"""PDF rendering for Lawyer Portal Pro.
+
+Kept out of app.py so render pool workers, started in fresh interpreters,
+can import it without re-running the Streamlit script.
+"""
+
+import io
+from datetime import datetime
+from decimal import Decimal
+from functools import lru_cache
+from reportlab.lib.pagesizes import letter, A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Table, TableStyle
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+from reportlab.pdfbase import pdfmetrics
+
+@lru_cache(maxsize=None)
+def get_pdf_styles():
+    """Stylesheet shared by every render in this process, with its fonts loaded up front"""
+    styles = getSampleStyleSheet()
+    for name in {getattr(style, "fontName", None) for style in styles.byName.values()} - {None}:
+        pdfmetrics.getFont(name)
+    return styles
+
+class PDFGenerator:
+    @classmethod
+    def _render(cls, story, pagesize, output_path=None):
+        """Build a story into an in-memory PDF, optionally saving a copy"""
+        buffer = io.BytesIO()
+        SimpleDocTemplate(buffer, pagesize=pagesize).build(story)
+        pdf = buffer.getvalue()
+        
+        if output_path:
+            with open(output_path, "wb") as f:
+                f.write(pdf)
+        return pdf
+    
+    @classmethod
+    def generate_case_summary_pdf(cls, case_data, output_path=None, styles=None):
+        """Generate PDF summary for a case and return its bytes"""
+        story = cls._case_summary_story(case_data, styles or get_pdf_styles())
+        return cls._render(story, A4, output_path)
+    
+    @classmethod
+    def generate_docket_pdf(cls, cases, output_path=None, styles=None):
+        """Generate one PDF with a case summary per page"""
+        styles = styles or get_pdf_styles()
+        story = []
+        for case_data in cases:
+            if story:
+                story.append(PageBreak())
+            story.extend(cls._case_summary_story(case_data, styles))
+        return cls._render(story, A4, output_path)
+    
+    CASE_SUMMARY_FIELDS = ('diary_no', 'year', 'case_title', 'petitioner', 'respondent', 'court_name',
+                           'judge_name', 'status', 'next_hearing_date', 'filing_date', 'description',
+                           'lawyer_notes')
+    HEARING_SUMMARY_FIELDS = ('hearing_date', 'purpose', 'outcome', 'notes')
+    
+    @classmethod
+    def case_summary_data(cls, case_data):
+        """Exactly the inputs a case summary renders, in a stable order.
+        
+        Single and batch exports build their render input and cache key
+        from this, so both paths share cached PDFs whichever query loaded
+        the case.
+        """
+        hearings = sorted(case_data.get('hearings') or [],
+                          key=lambda hearing: (hearing.get('hearing_date') or '', hearing.get('id') or 0),
+                          reverse=True)
+        data = {field: case_data[field] for field in cls.CASE_SUMMARY_FIELDS if field in case_data}
+        data['hearings'] = [{field: hearing[field] for field in cls.HEARING_SUMMARY_FIELDS if field in hearing}
+                            for hearing in hearings]
+        return data
+    
+    @staticmethod
+    def _case_summary_story(case_data, styles):
+        """Flowables for one case summary"""
+        story = []
+        
+        # Title
+        title = f"Case Summary: {case_data['diary_no']}/{case_data['year']}"
+        story.append(Paragraph(title, styles['Title']))
+        story.append(Spacer(1, 12))
+        
+        # Case Details
+        details = f"""
+        <b>Case Title:</b> {case_data.get('case_title', 'N/A')}<br/>
+        <b>Petitioner:</b> {case_data.get('petitioner', 'N/A')}<br/>
+        <b>Respondent:</b> {case_data.get('respondent', 'N/A')}<br/>
+        <b>Court:</b> {case_data.get('court_name', 'N/A')}<br/>
+        <b>Judge:</b> {case_data.get('judge_name', 'N/A')}<br/>
+        <b>Status:</b> {case_data.get('status', 'N/A')}<br/>
+        <b>Next Hearing:</b> {case_data.get('next_hearing_date', 'N/A')}<br/>
+        <b>Filing Date:</b> {case_data.get('filing_date', 'N/A')}<br/>
+        """
+        story.append(Paragraph(details, styles['Normal']))
+        story.append(Spacer(1, 12))
+        
+        # Description
+        if case_data.get('description'):
+            story.append(Paragraph("<b>Case Description:</b>", styles['Heading2']))
+            story.append(Paragraph(case_data['description'], styles['Normal']))
+            story.append(Spacer(1, 12))
+        
+        # Lawyer Notes
+        if case_data.get('lawyer_notes'):
+            story.append(Paragraph("<b>Lawyer Notes:</b>", styles['Heading2']))
+            story.append(Paragraph(case_data['lawyer_notes'], styles['Normal']))
+            story.append(Spacer(1, 12))
+        
+        # Hearings History
+        if case_data.get('hearings'):
+            story.append(Paragraph("<b>Hearing History:</b>", styles['Heading2']))
+            for hearing in case_data['hearings']:
+                hearing_text = f"""
+                Date: {hearing.get('hearing_date', 'N/A')}<br/>
+                Purpose: {hearing.get('purpose', 'N/A')}<br/>
+                Outcome: {hearing.get('outcome', 'N/A')}<br/>
+                Notes: {hearing.get('notes', 'N/A')}<br/>
+                """
+                story.append(Paragraph(hearing_text, styles['Normal']))
+                story.append(Spacer(1, 6))
+        
+        # Footer
+        story.append(Spacer(1, 36))
+        footer = Paragraph(f"Generated on: {datetime.now().strftime('%d %B, %Y')}<br/>Lawyer Portal Pro", 
+                          styles['Italic'])
+        story.append(footer)
+        
+        return story
+    
+    @classmethod
+    def generate_invoice_pdf(cls, invoice, output_path=None, styles=None):
+        """Generate an invoice PDF and return its bytes"""
+        styles = styles or get_pdf_styles()
+        story = []
+        
+        story.append(Paragraph(f"TAX INVOICE {invoice['invoice_no']}", styles['Title']))
+        story.append(Spacer(1, 12))
+        
+        issuer = f"""
+        <b>{invoice.get('firm_name') or invoice.get('lawyer_name', '')}</b><br/>
+        {invoice.get('lawyer_name', '')}<br/>
+        {invoice.get('email') or ''}<br/>
+        {f"Bar Council ID: {invoice['bar_council_id']}" if invoice.get('bar_council_id') else ''}
+        """
+        billing = f"""
+        <b>Billed To:</b> {invoice['client_name']}<br/>
+        <b>Invoice Date:</b> {invoice['issued_date']}<br/>
+        <b>Due Date:</b> {invoice.get('due_date') or 'On receipt'}<br/>
+        <b>Period:</b> {invoice.get('period_start')} to {invoice.get('period_end')}<br/>
+        """
+        story.append(Table([[Paragraph(issuer, styles['Normal']), Paragraph(billing, styles['Normal'])]],
+                           colWidths=[3.2 * inch, 3.2 * inch]))
+        story.append(Spacer(1, 18))
+        
+        # Line items
+        rows = [['Matter', 'Activity', 'Hours', 'Rate (Rs.)', 'Amount (Rs.)']]
+        for line in invoice['lines']:
+            rows.append([
+                Paragraph(line['case'], styles['BodyText']), line['activity'],
+                line['hours'], f"{Decimal(line['rate']):,.2f}", f"{Decimal(line['amount']):,.2f}"
+            ])
+        rows.append(['', '', '', 'Subtotal', f"{Decimal(invoice['subtotal']):,.2f}"])
+        rows.append(['', '', '', f"GST @ {invoice['tax_rate']}%", f"{Decimal(invoice['tax_amount']):,.2f}"])
+        rows.append(['', '', '', 'Total', f"{Decimal(invoice['total']):,.2f}"])
+        
+        table = Table(rows, colWidths=[2.6 * inch, 1.4 * inch, 0.6 * inch, 0.9 * inch, 1.1 * inch],
+                      repeatRows=1)
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c3e50')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('ALIGN', (2, 1), (-1, -1), 'RIGHT'),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('LINEBELOW', (0, 0), (-1, -4), 0.25, colors.HexColor('#bdc3c7')),
+            ('FONTNAME', (3, -1), (-1, -1), 'Helvetica-Bold'),
+            ('LINEABOVE', (3, -1), (-1, -1), 1, colors.HexColor('#2c3e50')),
+        ]))
+        story.append(table)
+        
+        story.append(Spacer(1, 36))
+        story.append(Paragraph(f"Generated on: {datetime.now().strftime('%d %B, %Y')}<br/>Lawyer Portal Pro",
+                               styles['Italic']))
+        return cls._render(story, A4, output_path)
+    
+    @classmethod
+    def generate_legal_draft_pdf(cls, draft_data, output_path=None):
+        """Generate legal draft PDF and return its bytes"""
+        story = []
+        styles = get_pdf_styles()
+        
+        # Header
+        header = f"""
+        IN THE {draft_data.get('court', 'SUPREME COURT').upper()} OF INDIA<br/>
+        {draft_data.get('jurisdiction', 'ORIGINAL JURISDICTION').upper()}<br/>
+        {draft_data.get('doc_type', 'WRIT PETITION').upper()} NO. ___ OF {datetime.now().year}<br/>
+        """
+        story.append(Paragraph(header, styles['Heading1']))
+        story.append(Spacer(1, 24))
+        
+        # Parties
+        parties = f"""
+        <b>IN THE MATTER OF:</b><br/>
+        {draft_data.get('petitioner', '[Petitioner Name]')}<br/>
+        <i>Petitioner(s)</i><br/><br/>
+        
+        <b>VERSUS</b><br/><br/>
+        
+        {draft_data.get('respondent', '[Respondent Name]')}<br/>
+        <i>Respondent(s)</i><br/>
+        """
+        story.append(Paragraph(parties, styles['Normal']))
+        story.append(Spacer(1, 24))
+        
+        # Facts
+        if draft_data.get('facts'):
+            story.append(Paragraph("<b>BRIEF FACTS OF THE CASE:</b>", styles['Heading2']))
+            story.append(Paragraph(draft_data['facts'], styles['Normal']))
+            story.append(Spacer(1, 12))
+        
+        # Grounds
+        story.append(Paragraph("<b>GROUNDS:</b>", styles['Heading2']))
+        grounds = draft_data.get('grounds', [
+            "Violation of Fundamental Rights under the Constitution.",
+            "Error apparent on the face of the record.",
+            "Substantial questions of law of general importance."
+        ])
+        
+        for i, ground in enumerate(grounds, 1):
+            story.append(Paragraph(f"{i}. {ground}", styles['Normal']))
+        
+        story.append(Spacer(1, 24))
+        
+        # Prayer
+        story.append(Paragraph("<b>PRAYER:</b>", styles['Heading2']))
+        prayer = f"""
+        For the reasons stated above, it is respectfully prayed that this Hon'ble Court may be pleased to:<br/><br/>
+        
+        a) {draft_data.get('prayer_a', 'Issue appropriate writ, order or direction')};<br/>
+        b) {draft_data.get('prayer_b', 'Grant interim relief')};<br/>
+        c) {draft_data.get('prayer_c', "Pass any other order(s) as this Hon'ble Court may deem fit")}.<br/><br/>
+        
+        <b>PLACE:</b> New Delhi<br/>
+        <b>DATE:</b> {datetime.now().strftime('%d %B, %Y')}<br/><br/>
+        
+        <b>COUNSEL FOR THE PETITIONER(S)</b><br/>
+        [Signature]<br/>
+        """
+        story.append(Paragraph(prayer, styles['Normal']))
+        
+        return cls._render(story, letter, output_path)
+
+
+def render_case_summary(case_data):
+    """Pool worker: render one case summary"""
+    return PDFGenerator.generate_case_summary_pdf(case_data)
+
+def render_invoice(invoice):
+    """Pool worker: render one invoice"""
+    return PDFGenerator.generate_invoice_pdf(invoice)
@@ -0,0 +1,23 @@
+import logging
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+# The app opens lawyer_portal.db and .pdf_cache in the working directory on import
+os.chdir(tempfile.mkdtemp(prefix='lawyer-app-tests-'))
+# Importing the app outside `streamlit run` logs a warning per st.* call
+logging.getLogger('streamlit').setLevel(logging.ERROR)
+
+import app  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A freshly migrated database in a temporary directory"""
+    database = app.LawyerDatabase(str(tmp_path / 'lawyer_portal.db'))
+    yield database
+    database.pool.close()
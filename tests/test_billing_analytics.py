@@ -0,0 +1,42 @@
+from datetime import date
+from decimal import Decimal
+
+import app
+
+
+def test_receivables_match_issued_invoice_totals(db):
+    user_id = 1
+    case_id = db.add_case(user_id, {'diary_no': '77', 'year': 2024, 'case_title': 'A vs B', 'petitioner': 'A'})
+    db.add_time_entries([
+        {'case_id': case_id, 'user_id': user_id, 'billing_date': f'2024-03-{day:02d}',
+         'activity': 'Drafting', 'description': None, 'hours': 1.5, 'rate_per_hour': 1000.01,
+         'amount': 1500.015}
+        for day in range(1, 8)
+    ])
+    # Tax on the subtotal rounds to paise, so it is not the sum of per-line tax
+    db.create_invoices('2024-03-01', '2024-04-01', Decimal('18'), date(2024, 3, 31), date(2024, 4, 30),
+                       user_id=user_id)
+    totals = sum(Decimal(invoice['total']) for invoice in db.get_invoices(user_id))
+
+    report = app.BillingAnalytics(db).report(user_id, as_of=date(2024, 6, 15))
+    assert Decimal(str(report['totals']['receivable'])) == totals
+    ageing = report['ageing'].set_index('bucket')['amount']
+    assert Decimal(str(ageing['31-60 days'])) == totals
+
+
+def test_paid_invoices_leave_receivables(db):
+    user_id = 1
+    case_id = db.add_case(user_id, {'diary_no': '78', 'year': 2024, 'case_title': 'C vs D', 'petitioner': 'C'})
+    db.add_time_entries([
+        {'case_id': case_id, 'user_id': user_id, 'billing_date': '2024-03-05', 'activity': 'Drafting',
+         'description': None, 'hours': 2, 'rate_per_hour': 5000, 'amount': 10000}
+    ])
+    analytics = app.BillingAnalytics(db)
+    (invoice_id,) = db.create_invoices('2024-03-01', '2024-04-01', Decimal('18'), date(2024, 3, 31),
+                                       date(2024, 4, 30), user_id=user_id)
+    assert analytics.report(user_id)['totals']['receivable'] == 11800.0
+
+    db.mark_invoices_paid([invoice_id], date(2024, 5, 2))
+    report = analytics.report(user_id)
+    assert report['totals']['receivable'] == 0.0
+    assert report['realisation']['collection'] == 1.0
@@ -0,0 +1,133 @@
+import urllib.error
+import urllib.request
+
+import pytest
+
+import app
+
+
+def unfold(data):
+    """Content lines of an ICS payload with RFC 5545 folding undone"""
+    assert data.endswith(b'\r\n')
+    return data.replace(b'\r\n ', b'').decode('utf-8').split('\r\n')[:-1]
+
+
+def unescape(value):
+    out, chars = [], iter(value)
+    for char in chars:
+        if char == '\\':
+            char = next(chars)
+            out.append('\n' if char in 'nN' else char)
+        else:
+            out.append(char)
+    return ''.join(out)
+
+
+def events(data):
+    """Each VEVENT as a dict of property name -> unescaped value"""
+    parsed, current = [], None
+    for line in unfold(data):
+        if line == 'BEGIN:VEVENT':
+            current = {}
+        elif line == 'END:VEVENT':
+            parsed.append(current)
+            current = None
+        elif current is not None:
+            name, _, value = line.partition(':')
+            current[name.split(';')[0]] = unescape(value)
+    return parsed
+
+
+@pytest.fixture
+def user_case(db):
+    user_id = 1
+    case_id = db.add_case(user_id, {
+        'diary_no': '4521', 'year': 2024, 'petitioner': 'Ramesh',
+        'case_title': 'Ramesh Kumar, Trustee; Shri Ganesh Trust vs Union of India — '
+                      'challenge to the notification dated 1.4.2024 under Section 12',
+    })
+    db.add_hearing_series(case_id, {
+        'hearing_time': '10:30', 'court_room': '4',
+        'purpose': 'Arguments\nPart-heard, listed "after notice"',
+        'notes': 'Bring the paper book; C:\\briefs\\4521 ✓ ' * 3,
+    }, ['2024-07-01'])
+    return user_id, case_id
+
+
+def test_lines_are_folded_at_75_octets(db, user_case):
+    feed = app.CalendarFeed(db)
+    data = b''.join(feed.iter_ics(user_case[0]))
+    physical = data.split(b'\r\n')[:-1]
+    assert all(len(line) <= 75 for line in physical)
+    assert any(line.startswith(b' ') for line in physical)
+    # Folding never splits a multi-byte character
+    for line in physical:
+        line.decode('utf-8')
+
+
+def test_calendar_structure(db, user_case):
+    lines = unfold(b''.join(app.CalendarFeed(db).iter_ics(user_case[0])))
+    assert lines[0] == 'BEGIN:VCALENDAR'
+    assert lines[-1] == 'END:VCALENDAR'
+    assert 'VERSION:2.0' in lines
+
+
+def test_event_fields_round_trip_through_escaping(db, user_case):
+    (event,) = events(b''.join(app.CalendarFeed(db).iter_ics(user_case[0])))
+    assert event['SUMMARY'] == ('Ramesh Kumar, Trustee; Shri Ganesh Trust vs Union of India — '
+                                'challenge to the notification dated 1.4.2024 under Section 12 (4521/2024)')
+    assert event['DESCRIPTION'].startswith('Purpose: Arguments\nPart-heard, listed "after notice"\n')
+    assert 'C:\\briefs\\4521 ✓' in event['DESCRIPTION']
+    assert event['LOCATION'] == 'Supreme Court, Court Room 4'
+    assert event['DTSTART'] == '20240701T103000'
+    assert event['UID'].startswith('hearing-')
+
+
+def test_unchanged_feed_is_not_modified(db, user_case):
+    feed = app.CalendarFeed(db)
+    first = feed.export(user_case[0])
+    again = feed.export(user_case[0], if_none_match=first['etag'])
+    assert again['not_modified'] and again['body'] is None
+    assert feed.export(user_case[0], since=first['version'])['not_modified']
+
+
+def test_changes_in_the_same_second_are_sent(db, user_case):
+    user_id, case_id = user_case
+    feed = app.CalendarFeed(db)
+    version = feed.export(user_id)['version']
+    db.add_hearing_series(case_id, {'purpose': 'Mention'}, ['2024-07-08'])
+    result = feed.export(user_id, since=version)
+    assert not result['not_modified']
+    assert [event['DTSTART'] for event in events(b''.join(result['body']))] == ['20240708']
+
+
+def test_case_edits_reach_the_incremental_feed(db, user_case):
+    user_id, case_id = user_case
+    feed = app.CalendarFeed(db)
+    version = feed.export(user_id)['version']
+    db.update_case_status(case_id, 'Disposed')
+    result = feed.export(user_id, since=version)
+    assert not result['not_modified']
+    (event,) = events(b''.join(result['body']))
+    assert 'Status: Disposed' in event['DESCRIPTION']
+
+
+def test_feed_server_streams_and_answers_conditional_requests(db, user_case):
+    user_id = user_case[0]
+    server = app.CalendarFeedServer(db, 'test-secret')
+    try:
+        with urllib.request.urlopen(server.url(user_id)) as response:
+            assert response.headers['Transfer-Encoding'] == 'chunked'
+            etag = response.headers['ETag']
+            assert len(events(response.read())) == 1
+
+        request = urllib.request.Request(server.url(user_id), headers={'If-None-Match': etag})
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(request)
+        assert error.value.code == 304
+
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(server.url(user_id).replace('token=', 'token=x'))
+        assert error.value.code == 403
+    finally:
+        server.close()
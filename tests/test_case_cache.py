@@ -0,0 +1,65 @@
+import pytest
+
+import app
+
+CASE = ('4521', 2024, 'Ramesh vs Union of India', 'Ramesh', None, 'Civil', 'Supreme Court', None,
+        'Filed', None, None, None, None)
+
+
+@pytest.fixture
+def loads(db, monkeypatch):
+    """Users whose case list was read from the database, in order"""
+    calls = []
+    load = db._load_user_cases
+
+    def counting(user_id):
+        calls.append(user_id)
+        return load(user_id)
+
+    monkeypatch.setattr(db, '_load_user_cases', counting)
+    return calls
+
+
+@pytest.fixture
+def cases(db):
+    """One case for user 1 and one for user 2"""
+    ids = {}
+    for user_id, diary_no in [(1, '4521'), (2, '9000')]:
+        ids[user_id] = db.add_case(user_id, {'diary_no': diary_no, 'year': 2024,
+                                             'case_title': f'Case {diary_no}', 'petitioner': 'Client'})
+    return ids
+
+
+def test_repeat_reads_are_served_from_cache(db, cases, loads):
+    first = db.get_user_cases(1)
+    assert db.get_user_cases(1) == first
+    assert loads == [1]
+    assert db.cache_stats()['hits'] == 1
+
+
+def test_cached_list_is_a_copy(db, cases, loads):
+    db.get_user_cases(1).clear()
+    assert len(db.get_user_cases(1)) == 1
+
+
+@pytest.mark.parametrize('write', [
+    lambda db, case_id: db.update_case_status(case_id, 'Listed', '2024-07-01'),
+    lambda db, case_id: db.add_hearing(case_id, {'hearing_date': '2024-07-01', 'purpose': 'Mention'}),
+    lambda db, case_id: db.upsert_cases(1, [CASE[:2] + ('Renamed',) + CASE[3:]]),
+], ids=['status_update', 'hearing_insert', 'upsert'])
+def test_writes_invalidate_only_the_owner(db, cases, loads, write):
+    db.get_user_cases(1)
+    db.get_user_cases(2)
+    write(db, cases[1])
+    db.get_user_cases(1)
+    db.get_user_cases(2)
+    assert loads == [1, 2, 1]
+    assert db.cache_stats()['invalidations'] == 1
+
+
+def test_reads_after_a_write_see_it(db, cases):
+    assert db.get_user_cases(1)[0]['status'] == 'Filed'
+    db.update_case_status(cases[1], 'Listed', '2024-07-01')
+    assert db.get_user_cases(1)[0]['status'] == 'Listed'
+    db.upsert_cases(1, [CASE[:2] + ('Renamed',) + CASE[3:]])
+    assert db.get_user_cases(1)[0]['case_title'] == 'Renamed'
@@ -0,0 +1,28 @@
+import io
+
+import app
+
+HEADER = b'diary_no,year,case_title,petitioner\n'
+
+
+def test_malformed_csv_is_reported_not_raised(db):
+    data = HEADER + b'101,2024,Ramesh vs Union,Ramesh\n102,2024,"' + b'x' * 200_000 + b'",Suresh\n'
+    report = app.CaseImporter(db).import_file(1, io.BytesIO(data), 'cases.csv')
+    assert report['inserted'] == 1
+    (error,) = report['errors']
+    assert error['row'] == 3
+    assert error['error'].startswith('malformed CSV')
+
+
+def test_non_utf8_csv_is_reported(db):
+    data = HEADER + b'101,2024,Ramesh vs Union,R\xe4mesh\n'
+    report = app.CaseImporter(db).import_file(1, io.BytesIO(data), 'cases.csv')
+    assert report['inserted'] == 0
+    assert report['errors'][0]['error'].startswith('malformed CSV')
+
+
+def test_corrupt_workbook_is_reported(db):
+    report = app.CaseImporter(db).import_file(1, io.BytesIO(b'not a workbook'), 'cases.xlsx')
+    assert report['rows'] == 0
+    (error,) = report['errors']
+    assert error['error'].startswith('unreadable Excel file')
@@ -0,0 +1,43 @@
+import pytest
+
+import app
+
+
+@pytest.fixture
+def cases(db):
+    """Cases sharing hearing dates and creation times, some unscheduled"""
+    dates = ['2024-07-01', '2024-07-01', '2024-08-15', None, '2024-07-01', None, '2024-08-15']
+    for i in range(21):
+        db.add_case(1, {'diary_no': str(1000 + i), 'year': 2024, 'case_title': f'Case {i}',
+                        'petitioner': 'Client', 'next_hearing_date': dates[i % len(dates)]})
+        db.add_case(2, {'diary_no': str(5000 + i), 'year': 2024, 'case_title': f'Other {i}',
+                        'petitioner': 'Client', 'next_hearing_date': '2024-07-01'})
+    with db.pool.transaction() as cursor:
+        # Two creation times, so created_at ties as well as breaking them
+        cursor.execute("UPDATE cases SET created_at = '2024-01-01 09:00:00' WHERE id % 3 = 0")
+        cursor.execute("UPDATE cases SET created_at = '2024-01-02 09:00:00' WHERE id % 3 != 0")
+    with db.pool.cursor() as cursor:
+        cursor.execute('''
+            SELECT id FROM cases WHERE user_id = 1
+            ORDER BY next_hearing_date IS NULL, next_hearing_date DESC, created_at DESC, id DESC
+        ''')
+        return [row['id'] for row in cursor.fetchall()]
+
+
+@pytest.mark.parametrize('page_size', [1, 2, 5, 9, 15, 21, 25])
+def test_pages_cover_every_case_once_in_order(db, cases, page_size):
+    seen, cursor, pages = [], None, 0
+    while True:
+        page, cursor = db.get_user_cases_page(1, page_size=page_size, after=cursor)
+        assert len(page) <= page_size
+        seen += [case['id'] for case in page]
+        pages += 1
+        if cursor is None:
+            break
+    assert seen == cases
+    assert pages == -(-len(cases) // page_size)
+
+
+def test_last_page_has_no_cursor(db, cases):
+    page, cursor = db.get_user_cases_page(1, page_size=len(cases))
+    assert len(page) == len(cases) and cursor is None
@@ -0,0 +1,106 @@
+import io
+
+import pytest
+
+import app
+
+CAUSE_LIST = '''SUPREME COURT OF INDIA
+DAILY CAUSE LIST FOR 15-07-2024
+
+COURT NO. 2
+1. Diary No. 4521-2024  Ramesh Kumar vs Union of India
+   Connected: Diary No. 4522/2024
+2. Diary No. 9911-2024  Ramesh Traders vs Commissioner
+
+COURT ROOM 11
+1. Diary No. 7788-2023  Shri Ganesh Trust vs State of Bihar
+2. Diary No. 1234-2020  Unknown vs Nobody
+3. D. No. 4521-2024  Ramesh Kumar vs Union of India (listed again)
+'''
+
+CAUSE_LIST_HTML = '''<html><body>
+<h2>SUPREME COURT OF INDIA</h2><p>DAILY CAUSE LIST FOR 15-07-2024</p>
+<h3>COURT NO. 2</h3>
+<table>
+<tr><td>1.</td><td>Diary No. 4521-2024</td><td>Ramesh Kumar vs Union of India</td></tr>
+<tr><td></td><td>Connected: Diary No. 4522/2024</td></tr>
+<tr><td>2.</td><td>Diary No. 9911-2024</td><td>Ramesh Traders vs Commissioner</td></tr>
+</table>
+<h3>COURT ROOM 11</h3>
+<table>
+<tr><td>1.</td><td>Diary No. 7788-2023</td><td>Shri Ganesh Trust vs State of Bihar</td></tr>
+<tr><td>2.</td><td>Diary No. 1234-2020</td><td>Unknown vs Nobody</td></tr>
+<tr><td>3.</td><td>D. No. 4521-2024</td><td>Ramesh Kumar vs Union of India (listed again)</td></tr>
+</table>
+</body></html>'''
+
+EXPECTED = [
+    (1, '2', '4521', 2024),
+    (1, '2', '4522', 2024),
+    (2, '2', '9911', 2024),
+    (1, '11', '7788', 2023),
+    (2, '11', '1234', 2020),
+    (3, '11', '4521', 2024),
+]
+
+
+def parse(text, filename, chunk_size=64 * 1024):
+    ingester = app.CauseListIngester(None, chunk_size=chunk_size)
+    return list(ingester.parse(ingester.iter_lines(io.BytesIO(text.encode()), filename)))
+
+
+def test_text_list_carries_court_rooms_and_connected_matters():
+    assert parse(CAUSE_LIST, 'list.txt') == EXPECTED
+
+
+@pytest.mark.parametrize('chunk_size', [7, 64 * 1024])
+def test_html_list_parses_like_text(chunk_size):
+    assert parse(CAUSE_LIST_HTML, 'list.html', chunk_size=chunk_size) == EXPECTED
+
+
+@pytest.fixture
+def cases(db):
+    def add(user_id, diary_no, year):
+        return db.add_case(user_id, {'diary_no': diary_no, 'year': year,
+                                     'case_title': f'Case {diary_no}', 'petitioner': 'Client'})
+    return {
+        '4521': add(1, '4521', 2024),
+        '4522': add(1, '4522', 2024),
+        '9911': add(2, '9911', 2024),
+        '7788': add(1, '7788', 2023),
+    }
+
+
+def hearings(db):
+    with db.pool.cursor() as cursor:
+        cursor.execute('SELECT case_id, hearing_date, court_room, purpose FROM hearings ORDER BY case_id')
+        return [tuple(row) for row in cursor.fetchall()]
+
+
+def ingest(db, text=CAUSE_LIST, filename='list.txt'):
+    return app.CauseListIngester(db).ingest(io.BytesIO(text.encode()), filename, '2024-07-15')
+
+
+def test_ingest_matches_every_users_cases(db, cases):
+    report = ingest(db)
+    assert (report['items'], report['matched'], report['inserted']) == (6, 4, 4)
+    assert hearings(db) == [
+        (cases['4521'], '2024-07-15', '2', 'Cause list item 1'),
+        (cases['4522'], '2024-07-15', '2', 'Cause list item 1'),
+        (cases['9911'], '2024-07-15', '2', 'Cause list item 2'),
+        (cases['7788'], '2024-07-15', '11', 'Cause list item 1'),
+    ]
+
+
+def test_ingest_refreshes_cached_case_lists(db, cases):
+    db.get_user_cases(2)
+    ingest(db)
+    assert db.cache_stats()['invalidations'] == 1
+
+
+def test_reingesting_adds_no_duplicates(db, cases):
+    ingest(db)
+    report = ingest(db, CAUSE_LIST_HTML, 'list.html')
+    assert report['matched'] == 4
+    assert report['inserted'] == 0
+    assert len(hearings(db)) == 4
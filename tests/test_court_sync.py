@@ -0,0 +1,29 @@
+import time
+
+import app
+
+
+class UnreachableRegistry:
+    def fetch_many(self, keys):
+        raise app.RegistryError('registry unreachable')
+
+
+def test_scheduled_failures_are_recorded(db):
+    db.add_case(1, {'diary_no': '300', 'year': 2024, 'case_title': 'I vs J', 'petitioner': 'I'})
+    worker = app.CourtSyncWorker(db, UnreachableRegistry(), interval=3600)
+    worker.start()
+    try:
+        deadline = time.monotonic() + 5
+        while worker.last_error is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert worker.last_error[1] == 'RegistryError: registry unreachable'
+    finally:
+        worker.stop()
+
+
+def test_registry_statuses_outside_the_case_statuses_are_ignored():
+    case = {'status': 'Pending', 'next_hearing_date': '2024-05-01'}
+    assert app.CourtSyncWorker._changes(case, {'status': 'Reserved', 'next_date': '2024-05-01'}) is None
+    assert app.CourtSyncWorker._changes(case, {'status': 'Listed', 'next_date': '2024-06-01'}) == (
+        'Listed', '2024-06-01'
+    )
@@ -0,0 +1,54 @@
+from datetime import date
+
+import pytest
+
+import app
+
+series = app.LawyerDatabase.hearing_series_dates
+
+
+@pytest.mark.parametrize('start, expected', [
+    (date(2024, 1, 31), [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)]),
+    (date(2023, 1, 31), [date(2023, 1, 31), date(2023, 2, 28), date(2023, 3, 31), date(2023, 4, 30)]),
+    (date(2024, 11, 30), [date(2024, 11, 30), date(2024, 12, 30), date(2025, 1, 30), date(2025, 2, 28)]),
+    (date(2024, 2, 29), [date(2024, 2, 29), date(2024, 3, 29), date(2024, 4, 29), date(2024, 5, 29)]),
+])
+def test_monthly_series_clamps_to_month_end(start, expected):
+    assert series(start, 'monthly', 4) == expected
+
+
+def test_weekly_and_fortnightly_series():
+    assert series(date(2024, 12, 25), 'weekly', 2) == [date(2024, 12, 25), date(2025, 1, 1)]
+    assert series(date(2024, 2, 22), 'fortnightly', 2) == [date(2024, 2, 22), date(2024, 3, 7)]
+
+
+@pytest.fixture
+def booked(db):
+    """User 1 has a 10:00 hearing on 1 and 3 July; user 2 has one on 2 July"""
+    case_id = db.add_case(1, {'diary_no': '4521', 'year': 2024, 'case_title': 'Case', 'petitioner': 'Client'})
+    db.add_hearing_series(case_id, {'hearing_time': '10:00', 'purpose': 'Arguments'},
+                          ['2024-07-01', '2024-07-03'])
+    db.add_hearing(case_id, {'hearing_date': '2024-07-02', 'purpose': 'Untimed mention'})
+    other = db.add_case(2, {'diary_no': '9911', 'year': 2024, 'case_title': 'Other', 'petitioner': 'Client'})
+    db.add_hearing(other, {'hearing_date': '2024-07-02', 'hearing_time': '10:00', 'purpose': 'Arguments'})
+    return db
+
+
+@pytest.mark.parametrize('hearing_time, conflict', [
+    ('09:00', False), ('09:01', True), ('10:00', True), ('10:59', True), ('11:00', False),
+])
+def test_conflict_window_is_under_sixty_minutes(booked, hearing_time, conflict):
+    found = booked.find_hearing_conflicts(1, [date(2024, 7, 1)], hearing_time)
+    assert bool(found) is conflict
+
+
+def test_conflicts_only_on_requested_dates_for_the_user(booked):
+    found = booked.find_hearing_conflicts(1, [date(2024, 7, 1), date(2024, 7, 2)], '10:30')
+    assert [day for day, _ in found] == ['2024-07-01']
+    found = booked.find_hearing_conflicts(1, [date(2024, 7, 2), date(2024, 7, 3)], '10:30')
+    assert [day for day, _ in found] == ['2024-07-03']
+
+
+def test_custom_window(booked):
+    assert booked.find_hearing_conflicts(1, [date(2024, 7, 1)], '10:20', window_minutes=15) == []
+    assert booked.find_hearing_conflicts(1, [date(2024, 7, 1)], '10:14', window_minutes=15)
@@ -0,0 +1,42 @@
+from datetime import date
+from decimal import Decimal
+
+import app
+
+
+def test_invoicing_flushes_buffered_time(db):
+    user_id = 1
+    case_id = db.add_case(user_id, {'diary_no': '79', 'year': 2024, 'case_title': 'G vs H', 'petitioner': 'G'})
+    ledger = app.TimeLedger(db, batch_size=1000, flush_interval=3600)
+    try:
+        ledger.add(user_id, case_id, 2, 5000, activity='Drafting', billing_date=date(2024, 3, 5))
+        engine = app.InvoiceEngine(db, ledger=ledger)
+        (invoice_id,) = engine.create(date(2024, 3, 1), date(2024, 4, 1), user_id=user_id,
+                                      issued_date=date(2024, 3, 31))
+        (document,) = db.get_invoice_documents([invoice_id])
+        assert document['total'] == '11800.00'
+        assert [line['hours'] for line in document['lines']] == ['2']
+    finally:
+        ledger.close()
+
+
+def test_documents_keep_requested_order_across_chunks(db):
+    user_id = 1
+    for n in range(5):
+        case_id = db.add_case(user_id, {'diary_no': str(100 + n), 'year': 2024, 'case_title': f'Matter {n}',
+                                        'petitioner': f'Client {n}'})
+        db.add_time_entries([
+            {'case_id': case_id, 'user_id': user_id, 'billing_date': '2024-03-05', 'activity': activity,
+             'description': None, 'hours': 1, 'rate_per_hour': 1000, 'amount': 1000}
+            for activity in ('Drafting', 'Drafting', 'Court Appearance')
+        ])
+    invoice_ids = db.create_invoices('2024-03-01', '2024-04-01', Decimal('18'), date(2024, 3, 31),
+                                     date(2024, 4, 30), user_id=user_id)
+    requested = invoice_ids[::-1] + [999999]
+
+    documents = db.get_invoice_documents(requested, chunk_size=2)
+    assert [document['id'] for document in documents] == invoice_ids[::-1]
+    for document in documents:
+        assert sorted((line['activity'], line['hours']) for line in document['lines']) == [
+            ('Court Appearance', '1'), ('Drafting', '2')
+        ]
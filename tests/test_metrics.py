@@ -0,0 +1,18 @@
+import app
+
+
+def test_summary_percentiles_use_nearest_rank():
+    store = app.MetricsStore()
+    for ms in range(1, 11):
+        store.record('stage', ms / 1000)
+    (row,) = store.summary()
+    assert row['p50_ms'] == 6
+    assert row['p95_ms'] == 10
+    assert row['max_ms'] == 10
+
+
+def test_percentile_of_small_samples():
+    assert app.MetricsStore.percentile([5.0], 0.95) == 5.0
+    assert app.MetricsStore.percentile([1.0, 2.0], 0.95) == 2.0
+    assert app.MetricsStore.percentile(list(range(20)), 0.95) == 19
+
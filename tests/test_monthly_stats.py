@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+import app
+
+BACKFILL = [sql for version, statements in app.LawyerDatabase.MIGRATIONS if version == 3
+            for sql in statements if 'GROUP BY' in sql]
+
+
+def rollup(db):
+    with db.pool.cursor() as cursor:
+        cursor.execute('SELECT * FROM case_monthly_stats ORDER BY user_id, month')
+        return [tuple(row) for row in cursor.fetchall()]
+
+
+def recomputed(db):
+    """The rollup rebuilt from scratch with the migration 3 backfill"""
+    with db.pool.transaction() as cursor:
+        cursor.execute('SAVEPOINT recompute')
+        cursor.execute('DELETE FROM case_monthly_stats')
+        for sql in BACKFILL:
+            cursor.execute(sql)
+        cursor.execute('SELECT * FROM case_monthly_stats ORDER BY user_id, month')
+        rows = [tuple(row) for row in cursor.fetchall()]
+        cursor.execute('ROLLBACK TO recompute')
+        cursor.execute('RELEASE recompute')
+    return rows
+
+
+@pytest.fixture
+def far_east(monkeypatch):
+    """A local clock a day away from UTC, so local and UTC months disagree near a boundary"""
+    monkeypatch.setenv('TZ', 'Pacific/Kiritimati')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_live_counts_match_a_recomputation(db, far_east):
+    a = db.add_case(1, {'diary_no': '1', 'year': 2024, 'case_title': 'A', 'petitioner': 'P',
+                        'filing_date': '2024-03-05'})
+    b = db.add_case(1, {'diary_no': '2', 'year': 2024, 'case_title': 'B', 'petitioner': 'P'})
+    db.add_case(2, {'diary_no': '3', 'year': 2024, 'case_title': 'C', 'petitioner': 'P', 'status': 'Disposed'})
+    db.add_hearing_series(a, {'purpose': 'Hearing'}, ['2024-03-31', '2024-04-01'])
+    db.update_case_status(b, 'Disposed')
+    db.update_case_status(b, 'Disposed')
+    db.upsert_cases(2, [('4', 2024, 'D', 'P', None, 'Civil', 'Supreme Court', None,
+                         'Disposed', '2023-12-31', None, None, None)])
+
+    assert rollup(db) == recomputed(db)
+
+
+def test_month_boundary_rows_bucket_by_utc(db, far_east):
+    with db.pool.transaction() as cursor:
+        cursor.execute('''
+            INSERT INTO cases (user_id, diary_no, year, case_title, petitioner, created_at, updated_at)
+            VALUES (1, '10', 2024, 'Late filing', 'P', '2024-01-31 23:30:00', '2024-01-31 23:30:00')
+        ''')
+        cursor.execute('''
+            UPDATE cases SET status = 'Disposed', updated_at = '2024-02-29 23:59:00' WHERE diary_no = '10'
+        ''')
+    assert rollup(db) == [(1, '2024-01', 1, 0, 0), (1, '2024-02', 0, 1, 0)]
+    assert rollup(db) == recomputed(db)
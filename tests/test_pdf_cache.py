@@ -0,0 +1,48 @@
+import os
+import time
+
+import app
+
+
+def test_single_and_batch_exports_share_cache_keys(db):
+    case_id = db.add_case(1, {
+        'diary_no': '4521', 'year': 2024, 'case_title': 'Ramesh vs Union of India', 'petitioner': 'Ramesh',
+    })
+    db.add_hearing_series(case_id, {'purpose': 'Arguments'}, ['2024-07-01', '2024-07-08'])
+    db.add_hearing_series(case_id, {'purpose': 'Mention'}, ['2024-07-08'])
+
+    single = app.PDFGenerator.case_summary_data(db.get_case_details(case_id))
+    (batch_case,) = db.get_cases_with_hearings(1)
+    batch = app.PDFGenerator.case_summary_data(batch_case)
+
+    assert single == batch
+    assert app.PDFCache.key('case_summary', single) == app.PDFCache.key('case_summary', batch)
+    assert [h['hearing_date'] for h in single['hearings']] == ['2024-07-08', '2024-07-08', '2024-07-01']
+
+
+def test_eviction_sweeps_stale_temp_files(tmp_path):
+    cache = app.PDFCache(tmp_path, max_bytes=10)
+    stale = tmp_path / 'abc.123.tmp'
+    fresh = tmp_path / 'def.456.tmp'
+    stale.write_bytes(b'partial')
+    fresh.write_bytes(b'partial')
+    old = time.time() - app.PDFCache.STALE_TMP_SECONDS - 60
+    os.utime(stale, (old, old))
+
+    cache.put('first', b'x' * 8)
+    cache.put('second', b'y' * 8)
+
+    assert cache.stats()['evictions'] == 1
+    assert not stale.exists()
+    assert fresh.exists()
+
+
+def test_startup_sweeps_stale_temp_files(tmp_path):
+    stale = tmp_path / 'abc.123.tmp'
+    stale.write_bytes(b'partial')
+    old = time.time() - app.PDFCache.STALE_TMP_SECONDS - 60
+    os.utime(stale, (old, old))
+
+    app.PDFCache(tmp_path)
+
+    assert not stale.exists()
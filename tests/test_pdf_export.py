@@ -0,0 +1,51 @@
+import io
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import app
+
+
+@pytest.mark.parametrize('engine', [app.BatchPDFExporter, app.InvoiceEngine])
+def test_worker_count_is_honoured(engine, monkeypatch):
+    monkeypatch.setattr(app.os, 'cpu_count', lambda: 1)
+    assert engine(None, max_workers=2).max_workers == 2
+    assert engine(None, max_workers=1).max_workers == 1
+    assert engine(None).max_workers == 1
+
+
+def test_bounded_map_caps_calls_in_flight():
+    lock = threading.Lock()
+    running, peak = 0, 0
+
+    def work(item):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.01)
+        with lock:
+            running -= 1
+        return item * 2
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert list(app._bounded_map(executor, work, range(20), 3)) == [item * 2 for item in range(20)]
+    assert peak == 3
+
+
+def test_parallel_export_matches_cases():
+    cases = [{'diary_no': str(100 + i), 'year': 2024, 'case_title': f'Case {i}', 'petitioner': 'P',
+              'hearings': [{'hearing_date': '2024-07-01', 'purpose': 'Hearing'}]} for i in range(4)]
+    data = app.BatchPDFExporter(None, max_workers=2).render_zip(cases)
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        names = archive.namelist()
+        assert names == [f'case_{100 + i}_2024.pdf' for i in range(4)]
+        assert all(archive.read(name).startswith(b'%PDF') for name in names)
+
+
+def test_invoice_benchmark_reports_worker_counts():
+    results = app.InvoiceEngine.benchmark(n_invoices=4, lines_per_invoice=2, worker_counts=(1, 2))
+    assert [row['workers'] for row in results] == [1, 2]
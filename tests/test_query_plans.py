@@ -0,0 +1,51 @@
+import pytest
+
+import app
+
+
+def seed(db, users=40, cases_per_user=10):
+    """A small multi-lawyer dataset, with statistics gathered by ANALYZE"""
+    with db.pool.transaction() as cursor:
+        user_ids = []
+        for n in range(users):
+            cursor.execute('INSERT INTO users (email, password_hash, full_name) VALUES (?, ?, ?)',
+                           (f'lawyer{n}@example.com', 'x', f'Lawyer {n}'))
+            user_ids.append(cursor.lastrowid)
+        for i in range(users * cases_per_user):
+            user_id = user_ids[i % users]
+            cursor.execute('''
+                INSERT INTO cases (user_id, diary_no, year, case_title, petitioner, status, next_hearing_date)
+                VALUES (?, ?, 2024, ?, ?, 'Pending', ?)
+            ''', (user_id, str(1000 + i), f'Case {i}', f'Client {i % 20}', f'2024-{i % 12 + 1:02d}-15'))
+            case_id = cursor.lastrowid
+            cursor.execute('INSERT INTO hearings (case_id, hearing_date, purpose) VALUES (?, ?, ?)',
+                           (case_id, f'2024-{i % 12 + 1:02d}-15', 'Hearing'))
+            # Most of a working ledger has already been invoiced
+            cursor.execute('''
+                INSERT INTO billing (case_id, user_id, billing_date, activity, hours, rate_per_hour, amount,
+                                     invoice_id)
+                VALUES (?, ?, ?, 'Drafting', 1.5, 5000, 7500, ?)
+            ''', (case_id, user_id, f'2024-{i % 12 + 1:02d}-10', i // 10 + 1 if i % 10 else None))
+        cursor.execute('ANALYZE')
+
+
+@pytest.mark.parametrize('name', list(app.LawyerDatabase.QUERY_PLAN_CHECKS))
+def test_query_plan_on_fresh_database(db, name):
+    check = next(check for check in db.check_query_plans() if check['query'] == name)
+    assert check['ok'], check['plan']
+
+
+@pytest.mark.parametrize('name', list(app.LawyerDatabase.QUERY_PLAN_CHECKS))
+def test_query_plan_after_analyze(db, name):
+    seed(db)
+    check = next(check for check in db.check_query_plans() if check['query'] == name)
+    assert check['ok'], check['plan']
+
+
+def test_upcoming_hearings_are_driven_by_the_user(db):
+    seed(db)
+    check = next(check for check in db.check_query_plans() if check['query'] == 'upcoming_hearings')
+    assert check['plan'][0].startswith('SEARCH c USING INDEX idx_cases_user_hearing (user_id=?)')
+    assert check['plan'][1].startswith(
+        'SEARCH h USING INDEX idx_hearings_case_date (case_id=? AND hearing_date>? AND hearing_date<?)'
+    )
@@ -0,0 +1,73 @@
+import time
+from concurrent.futures import Future
+
+import pytest
+
+import app
+
+OLD = {'found': True, 'status': 'Pending', 'next_hearing_date': '2024-07-01'}
+NEW = {'found': True, 'status': 'Listed', 'next_hearing_date': '2024-07-15'}
+
+
+class ManualClient:
+    """Registry client whose background lookups complete when the test says so"""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, diary_no, year):
+        future = Future()
+        self.submitted.append(((diary_no, year), future))
+        return future
+
+    def fetch(self, diary_no, year):
+        raise AssertionError('stale entries must not be fetched inline')
+
+
+@pytest.fixture
+def cache(db):
+    db.save_registry_response('4521', 2024, OLD, time.time() - 120)
+    registry_cache = app.RegistryCache(db, ManualClient(), ttl=60)
+    yield registry_cache
+    registry_cache._writer.shutdown(wait=True)
+
+
+def drain(cache):
+    """Wait for the writer thread to finish what it has been given"""
+    cache._writer.submit(lambda: None).result()
+
+
+def test_stale_entry_is_served_while_one_refresh_runs(db, cache):
+    assert cache.get('4521', 2024) == OLD
+    assert cache.get('4521', 2024) == OLD
+    assert cache.get(' 4521 ', '2024') == OLD
+    assert [key for key, _ in cache.client.submitted] == [('4521', 2024)]
+    assert cache.stats()['stale'] == 3
+    assert cache.stats()['refreshes'] == 1
+
+
+def test_refreshed_value_is_persisted(db, cache):
+    cache.get('4521', 2024)
+    (_, future), = cache.client.submitted
+    future.set_result(NEW)
+    drain(cache)
+
+    payload, fetched_at = db.get_registry_response('4521', 2024)
+    assert payload == NEW
+    assert time.time() - fetched_at < 60
+    assert cache.get('4521', 2024) == NEW
+    assert cache.stats()['hits'] == 1
+    # A later stale read may refresh again once this one has finished
+    assert cache._refreshing == set()
+
+
+def test_failed_refresh_keeps_serving_the_stale_entry(db, cache):
+    cache.get('4521', 2024)
+    (_, future), = cache.client.submitted
+    future.set_exception(app.RegistryError('registry returned HTTP 503'))
+    drain(cache)
+
+    assert cache.stats()['errors'] == 1
+    assert db.get_registry_response('4521', 2024)[0] == OLD
+    assert cache.get('4521', 2024) == OLD
+    assert len(cache.client.submitted) == 2
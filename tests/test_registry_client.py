@@ -0,0 +1,122 @@
+import time
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def stub():
+    server = app.RegistryStubServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def make_client(stub):
+    clients = []
+
+    def make(**options):
+        options.setdefault('backoff', 0.01)
+        client = app.RegistryClient(stub.url, **options)
+        clients.append(client)
+        return client
+
+    yield make
+    for client in clients:
+        client.close()
+
+
+def test_fetch_returns_registry_payload(stub, make_client):
+    result = make_client().fetch('12345', 2024)
+    assert result['found'] is True
+    assert (result['diary_no'], result['year']) == ('12345', 2024)
+    assert stub.requests == 1
+
+
+def test_unknown_case_is_not_retried(stub, make_client):
+    assert make_client().fetch('', 2024) == {'found': False}
+    assert stub.requests == 1
+
+
+def test_transient_failures_are_retried(stub, make_client):
+    stub.fail_first = 2
+    assert make_client(max_retries=3).fetch('12345', 2024)['found'] is True
+    assert stub.requests == 3
+
+
+def test_gives_up_after_max_retries(stub, make_client):
+    stub.failure_rate = 1.0
+    with pytest.raises(app.RegistryError, match='HTTP 503'):
+        make_client(max_retries=2).fetch('12345', 2024)
+    assert stub.requests == 3
+
+
+def test_honours_retry_after_on_429(stub, make_client):
+    stub.fail_first, stub.failure_status, stub.retry_after = 1, 429, 1
+    start = time.perf_counter()
+    assert make_client(max_retries=1).fetch('12345', 2024)['found'] is True
+    assert time.perf_counter() - start >= 1.0
+    assert stub.requests == 2
+
+
+@pytest.mark.parametrize('status', [400, 401, 403, 422])
+def test_rejected_requests_are_not_retried(stub, make_client, status):
+    stub.fail_first, stub.failure_status = 1, status
+    with pytest.raises(app.RegistryError, match=f'HTTP {status}'):
+        make_client(max_retries=3).fetch('12345', 2024)
+    assert stub.requests == 1
+
+
+def test_timeouts_are_retried_then_raised(stub, make_client):
+    stub.latency = 0.5
+    with pytest.raises(app.RegistryError):
+        make_client(timeout=0.1, max_retries=1).fetch('12345', 2024)
+    assert stub.requests == 2
+
+
+def test_fetch_many_survives_random_failures(stub, make_client):
+    stub.failure_rate = 0.3
+    keys = [(str(10000 + i), 2024) for i in range(30)]
+    results = make_client(rate=1000, burst=1000, max_retries=10).fetch_many(keys)
+    assert set(results) == set(keys)
+    assert all(result['found'] for result in results.values())
+    assert stub.requests > len(keys)
+
+
+def test_fetch_many_runs_lookups_concurrently(stub, make_client):
+    stub.latency = 0.2
+    keys = [(str(10000 + i), 2024) for i in range(10)]
+    start = time.perf_counter()
+    results = make_client(rate=1000, burst=1000).fetch_many(keys)
+    assert all(result['found'] for result in results.values())
+    # One at a time, ten lookups would take two seconds
+    assert time.perf_counter() - start < 1.5
+
+
+def test_token_bucket_limits_request_rate(stub, make_client):
+    keys = [(str(10000 + i), 2024) for i in range(11)]
+    start = time.perf_counter()
+    make_client(rate=20, burst=1).fetch_many(keys)
+    # One token up front, then one every 1/20 s
+    assert time.perf_counter() - start >= 10 / 20 * 0.9
+
+
+def test_token_bucket_allows_bursts(stub, make_client):
+    keys = [(str(10000 + i), 2024) for i in range(10)]
+    start = time.perf_counter()
+    make_client(rate=1, burst=10).fetch_many(keys)
+    # Without the burst, ten requests at 1/sec would take nine seconds
+    assert time.perf_counter() - start < 5.0
+
+
+def test_unconfigured_registry_fails_loudly(monkeypatch):
+    monkeypatch.delenv('SCI_REGISTRY_URL', raising=False)
+    monkeypatch.delenv('SCI_REGISTRY_STUB', raising=False)
+    app.get_registry_client.clear()
+    app.get_court_sync_worker.clear()
+    assert app.registry_source() is None
+    assert app.get_court_sync_worker() is None
+    with pytest.raises(app.RegistryError, match='No registry configured'):
+        app.get_registry_client()
+    assert app.fetch_supreme_court_status('12345', 2024)['found'] is False
@@ -0,0 +1,73 @@
+import pytest
+
+import app
+
+
+@pytest.fixture
+def cases(db):
+    ids = {
+        'ramesh': db.add_case(1, {
+            'diary_no': '4521', 'year': 2024, 'case_title': 'Ramesh Kumar vs Union of India',
+            'petitioner': 'Ramesh Kumar', 'respondent': 'Union of India', 'status': 'Listed',
+            'description': 'Challenge to a land acquisition notification. ' * 6
+                           + 'The acquisition ignored the statutory hearing under Section 5A. '
+                           + 'Compensation was never determined. ' * 6,
+        }),
+        'trust': db.add_case(1, {
+            'diary_no': '7788', 'year': 2023, 'case_title': 'Shri Ganesh Trust vs State of Bihar',
+            'petitioner': 'Shri Ganesh Trust', 'status': 'Pending',
+        }),
+        'other_user': db.add_case(2, {
+            'diary_no': '9911', 'year': 2024, 'case_title': 'Ramesh Traders vs Commissioner',
+            'petitioner': 'Ramesh Traders',
+        }),
+    }
+    db.add_hearing(ids['trust'], {'hearing_date': '2024-07-01', 'purpose': 'Arguments',
+                                  'notes': 'Counsel to file the mutation register'})
+    return ids
+
+
+def ids(results):
+    return [case['id'] for case in results]
+
+
+def test_words_match_as_prefixes(db, cases):
+    assert ids(db.search_cases(1, 'Rame')) == [cases['ramesh']]
+    assert ids(db.search_cases(1, 'gan tru')) == [cases['trust']]
+
+
+def test_every_word_must_match(db, cases):
+    assert db.search_cases(1, 'Ramesh Bihar') == []
+
+
+def test_hearing_notes_are_searched(db, cases):
+    (case,) = db.search_cases(1, 'mutation')
+    assert case['id'] == cases['trust']
+    assert '**mutation**' in case['snippet']
+
+
+def test_snippet_marks_matches_with_one_ellipsis(db, cases):
+    (case,) = db.search_cases(1, 'statutory')
+    assert '**statutory**' in case['snippet']
+    assert case['snippet'].count('…') >= 1
+    assert '……' not in case['snippet']
+
+
+def test_results_are_limited_to_the_user_and_statuses(db, cases):
+    assert ids(db.search_cases(2, 'Ramesh')) == [cases['other_user']]
+    assert db.search_cases(1, 'Ramesh', statuses=['Pending']) == []
+    assert ids(db.search_cases(1, '', statuses=['Pending'])) == [cases['trust']]
+
+
+@pytest.mark.parametrize('query', [
+    '"Ramesh', 'Ramesh"', 'Rame*', '*', '-Ramesh', 'Ramesh -Kumar', 'Ramesh NEAR Kumar',
+    'NEAR(Ramesh Kumar)', 'Ramesh OR', 'AND', 'Ramesh^', '(Ramesh', 'diary_no:4521', '',
+])
+def test_fts_syntax_in_queries_is_treated_as_text(db, cases, query):
+    results = db.search_cases(1, query)
+    assert all(case['id'] in (cases['ramesh'], cases['trust']) for case in results)
+
+
+def test_operator_words_are_plain_terms(db, cases):
+    assert ids(db.search_cases(1, 'Ramesh -Kumar')) == [cases['ramesh']]
+    assert db.search_cases(1, 'Ramesh NEAR Kumar') == []
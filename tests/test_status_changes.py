@@ -0,0 +1,31 @@
+from datetime import datetime, timedelta, timezone
+
+import app
+
+
+def record_change(db, case_id, changed_at):
+    with db.pool.transaction() as cursor:
+        cursor.execute('''
+            INSERT INTO case_status_changes (diary_no, year, field, old_value, new_value, changed_at)
+            SELECT diary_no, year, 'status', 'Pending', 'Listed', ? FROM cases WHERE id = ?
+        ''', (changed_at.strftime('%Y-%m-%d %H:%M:%S'), case_id))
+
+
+def test_today_starts_at_local_midnight(db, monkeypatch):
+    monkeypatch.setenv('TZ', 'Asia/Kolkata')
+    app.time.tzset()
+    try:
+        case_id = db.add_case(1, {'diary_no': '9', 'year': 2024, 'case_title': 'E vs F', 'petitioner': 'E'})
+        local_midnight = datetime.now().astimezone().replace(hour=0, minute=0, second=0, microsecond=0)
+        utc_midnight = local_midnight.astimezone(timezone.utc)
+        # 00:10 IST is still the previous day in UTC
+        record_change(db, case_id, utc_midnight + timedelta(minutes=10))
+        record_change(db, case_id, utc_midnight - timedelta(minutes=10))
+
+        changes = db.get_status_changes(1)
+        assert [change['changed_at'] for change in changes] == [
+            (utc_midnight + timedelta(minutes=10)).strftime('%Y-%m-%d %H:%M:%S')
+        ]
+    finally:
+        monkeypatch.delenv('TZ')
+        app.time.tzset()
@@ -0,0 +1,45 @@
+import string
+from pathlib import Path
+
+import pytest
+
+import app
+
+TEMPLATES = Path(app.__file__).parent / 'templates'
+VALUES = {
+    'facts': 'Demand of {amount} under ${section} — Rs. $500, see {{note}} and 100% }{',
+    'date': '15 July, 2024',
+    'year': 2024,
+}
+
+
+@pytest.fixture(scope='module')
+def registry():
+    return app.TemplateRegistry(TEMPLATES)
+
+
+@pytest.mark.parametrize('doc_type, file_name', list(app.TemplateRegistry.TEMPLATE_FILES.items()))
+def test_template_renders_like_string_template(registry, doc_type, file_name):
+    text = (TEMPLATES / file_name).read_text(encoding='utf-8').rstrip('\n')
+    rendered = registry.render(doc_type, VALUES)
+    assert rendered == string.Template(text).substitute(VALUES)
+    assert VALUES['facts'] in rendered
+    assert '2024' in rendered and '$year' not in rendered and '$date' not in rendered
+
+
+def test_unknown_and_short_types_fall_back(registry):
+    assert registry.render('SLP', VALUES) == registry.render('SLP (Special Leave Petition)', VALUES)
+    assert registry.render('Caveat', VALUES) == registry.render('Writ Petition', VALUES)
+
+
+def test_literal_braces_and_dollars_in_template_text():
+    template = app.DraftTemplate('Fee {fixed}: $$${amount} in ${year}; {{raw}}')
+    assert template.placeholders == {'amount', 'year'}
+    assert template.render({'amount': '5,000', 'year': 2024}) == 'Fee {fixed}: $5,000 in 2024; {{raw}}'
+
+
+def test_invalid_placeholder_is_rejected_like_string_template():
+    with pytest.raises(ValueError):
+        string.Template('Fee $').substitute({})
+    with pytest.raises(ValueError, match='Invalid placeholder'):
+        app.DraftTemplate('Fee $')
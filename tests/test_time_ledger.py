@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def case_ids(db):
+    return [
+        db.add_case(1, {'diary_no': str(200 + n), 'year': 2024, 'case_title': f'Matter {n}', 'petitioner': 'P'})
+        for n in range(2)
+    ]
+
+
+def test_restarted_timer_replaces_the_saved_one(db, case_ids):
+    ledger = app.TimeLedger(db, flush_interval=3600)
+    try:
+        ledger.start_timer(1, case_ids[0], 1000, activity='Drafting')
+        ledger.start_timer(1, case_ids[1], 2500, activity='Court Appearance')
+    finally:
+        ledger.close()
+
+    saved = db.load_timers()[1]
+    assert (saved['case_id'], saved['rate_per_hour'], saved['activity']) == (case_ids[1], 2500, 'Court Appearance')
+
+
+def test_background_flush_failures_are_reported_and_retried(db, case_ids, monkeypatch):
+    ledger = app.TimeLedger(db, batch_size=1000, flush_interval=0.05)
+    try:
+        def fail(entries):
+            raise RuntimeError('database is locked')
+        with monkeypatch.context() as patch:
+            patch.setattr(db, 'add_time_entries', fail)
+            ledger.add(1, case_ids[0], 1.5, 2000, billing_date='2024-03-05')
+            deadline = time.monotonic() + 5
+            while not ledger.stats()['errors'] and time.monotonic() < deadline:
+                time.sleep(0.01)
+            stats = ledger.stats()
+            assert stats['last_error'] == 'RuntimeError: database is locked'
+            assert stats['buffered'] == 1
+
+        # Either this call or the next background pass writes the entry
+        ledger.flush()
+        assert ledger.stats()['last_error'] is None
+        assert len(db.get_time_entries(1)) == 1
+    finally:
+        ledger.close()
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_running_timers_are_checkpointed_without_a_page_open(db, case_ids):
+    ledger = app.TimeLedger(db, flush_interval=0.02, checkpoint_interval=0.1)
+    try:
+        ledger.start_timer(1, case_ids[0], 1000, activity='Drafting')
+        started = db.load_timers()[1]
+        assert started['elapsed'] == 0
+        assert wait_for(lambda: db.load_timers()[1]['elapsed'] >= 0.1)
+        assert ledger.stats()['checkpoints'] >= 1
+    finally:
+        ledger.close()
+
+
+def test_stopped_timer_stays_stopped(db, case_ids):
+    ledger = app.TimeLedger(db, flush_interval=0.01, checkpoint_interval=0)
+    try:
+        ledger.start_timer(1, case_ids[0], 1000)
+        assert wait_for(lambda: ledger.stats()['checkpoints'] >= 3)
+        ledger.stop_timer(1, billing_date='2024-03-05')
+        time.sleep(0.1)
+        assert db.load_timers() == {}
+    finally:
+        ledger.close()